@@ -0,0 +1,101 @@
+"""
+Build the AI opening book from self-play
+
+Usage:
+    python build_opening_book.py [--games N] [--plies N] [--time SECONDS]
+                                 [--explore P] [--seed N] [--output PATH]
+
+Every position reached in the first plies of the self-play games is
+searched once by AlphaBetaAI; the move found is stored in the book. To
+cover more than one line, a random move among the best candidates is
+played instead of the book move with probability --explore.
+"""
+
+import sys
+import os
+import argparse
+import random
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.constants import *
+from shared.game_logic import BoardState, BITBOARD_WIDTH
+from shared.ai_search import AlphaBetaAI
+from shared.pattern_eval import PatternState
+from shared.opening_book import OpeningBook, SYMMETRIES, INVERSE_SYMMETRIES, position_key, write_book
+
+
+def build_book(games, plies, time_limit, explore, seed):
+    """
+    Generate book records from self-play
+
+    Args:
+        games: Number of self-play games
+        plies: Moves played per game
+        time_limit: Search time per new position in seconds
+        explore: Probability of branching off with a random good move
+        seed: Random seed
+
+    Returns:
+        List of (key, canonical move, weight) records
+    """
+    rng = random.Random(seed)
+    engine = AlphaBetaAI(time_limit=time_limit, use_book=False)
+    book_moves = {}  # position key -> canonical move
+    weights = {}  # position key -> times the position was reached
+
+    for game in range(games):
+        state = BoardState()
+        state.patterns = PatternState()
+        for ply in range(plies):
+            player = state.get_current_player()
+            key, symmetry = position_key(state.bitboard, player)
+            if key not in book_moves:
+                index = engine.search(state, player)
+                book_moves[key] = SYMMETRIES[symmetry][index]
+            weights[key] = weights.get(key, 0) + 1
+
+            index = INVERSE_SYMMETRIES[symmetry][book_moves[key]]
+            if ply and rng.random() < explore:
+                candidates = state.patterns.order_moves(state.get_candidates(), player, 5)
+                index = rng.choice(candidates)
+            x, y = divmod(index, BITBOARD_WIDTH)
+            if state.play(x, y, player):
+                break
+
+        if (game + 1) % 10 == 0:
+            print(f"  {game + 1}/{games} games, {len(book_moves)} positions")
+
+    return [(key, move, weights[key]) for key, move in book_moves.items()]
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Build the AI opening book from self-play")
+    parser.add_argument('--games', type=int, default=200, help="self-play games")
+    parser.add_argument('--plies', type=int, default=AI_BOOK_MAX_PLY, help="moves per game")
+    parser.add_argument('--time', type=float, default=0.2, help="search seconds per position")
+    parser.add_argument('--explore', type=float, default=0.35, help="probability of a side line")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         AI_OPENING_BOOK_PATH))
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CARO GAME - OPENING BOOK BUILDER")
+    print("=" * 60)
+
+    start = time.time()
+    records = build_book(args.games, args.plies, args.time, args.explore, args.seed)
+    write_book(args.output, records)
+
+    book = OpeningBook(args.output)
+    print(f"Wrote {len(book)} positions to {args.output} "
+          f"({os.path.getsize(args.output)} bytes) in {time.time() - start:.0f}s")
+    book.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,63 @@ import socket
 import threading
 from shared.user import User
 from shared.utils import log, create_message
+from shared.framing import LineDecoder, FrameTooLarge, encode_line
+from shared.dispatch import CommandHandlerMixin
 from shared.constants import *
 
-class SocketHandle(threading.Thread):
+class SocketHandle(CommandHandlerMixin, threading.Thread):
     """Handles socket communication with server"""
     
+    # Command -> (handler method, argument passed: 'parts' or None)
+    COMMAND_HANDLERS = (
+        # Game
+        (PROTOCOL_CARO, 'handle_caro', 'parts'),
+        (PROTOCOL_NEW_GAME, 'handle_new_game', None),
+        (PROTOCOL_DRAW_REQUEST, 'handle_draw_request', None),
+        (PROTOCOL_DRAW_REFUSE, 'handle_draw_refuse', None),
+        (PROTOCOL_DRAW_GAME, 'handle_draw_game', None),
+        (PROTOCOL_COMPETITOR_TIME_OUT, 'handle_competitor_time_out', None),
+        
+        # Chat
+        (PROTOCOL_CHAT_SERVER, 'handle_chat_server', 'parts'),
+        (PROTOCOL_CHAT, 'handle_chat', 'parts'),
+        
+        # Authentication responses
+        (PROTOCOL_LOGIN_SUCCESS, 'handle_login_success', 'parts'),
+        (PROTOCOL_WRONG_USER, 'handle_wrong_user', 'parts'),
+        (PROTOCOL_DUPLICATE_LOGIN, 'handle_duplicate_login', 'parts'),
+        (PROTOCOL_BANNED_USER, 'handle_banned_user', 'parts'),
+        (PROTOCOL_DUPLICATE_USERNAME, 'handle_duplicate_username', None),
+        
+        # Friends
+        (PROTOCOL_RETURN_FRIEND_LIST, 'handle_return_friend_list', 'parts'),
+        (PROTOCOL_CHECK_FRIEND_RESPONSE, 'handle_check_friend_response', 'parts'),
+        (PROTOCOL_MAKE_FRIEND_REQUEST, 'handle_make_friend_request', 'parts'),
+        
+        # Rooms
+        (PROTOCOL_ROOM_LIST, 'handle_room_list', 'parts'),
+        (PROTOCOL_YOUR_CREATED_ROOM, 'handle_your_created_room', 'parts'),
+        (PROTOCOL_GO_TO_ROOM, 'handle_go_to_room', 'parts'),
+        (PROTOCOL_ROOM_FULLY, 'handle_room_fully', None),
+        (PROTOCOL_ROOM_NOT_FOUND, 'handle_room_not_found', None),
+        (PROTOCOL_ROOM_WRONG_PASSWORD, 'handle_room_wrong_password', None),
+        (PROTOCOL_LEFT_ROOM, 'handle_left_room', None),
+        
+        # Rank
+        (PROTOCOL_RETURN_GET_RANK_CHARTS, 'handle_return_get_rank_charts', 'parts'),
+        (PROTOCOL_RANK_CHARTS_NOT_MODIFIED, 'handle_rank_charts_not_modified', None),
+        
+        # Duel
+        (PROTOCOL_DUEL_NOTICE, 'handle_duel_notice', 'parts'),
+        (PROTOCOL_DISAGREE_DUEL, 'handle_disagree_duel', None),
+        
+        # Other
+        (PROTOCOL_VOICE_MESSAGE, 'handle_voice_message', 'parts'),
+        (PROTOCOL_BANNED_NOTICE, 'handle_banned_notice', 'parts'),
+        (PROTOCOL_WARNING_NOTICE, 'handle_warning_notice', 'parts'),
+        (PROTOCOL_ADMIN_BROADCAST, 'handle_admin_broadcast', 'parts'),
+    )
+    
     def __init__(self, client):
         """
         Initialize socket handler
@@ -22,6 +74,11 @@ class SocketHandle(threading.Thread):
         self.client = client
         self.socket = None
         self.running = False
+        self.dispatcher = self.get_dispatcher()
+        
+        # Last rank chart received, sent again by the server only when changed
+        self.rank_chart_version = None
+        self.rank_chart_users = []
     
     def connect(self, host, port):
         """
@@ -63,7 +120,7 @@ class SocketHandle(threading.Thread):
         """
         try:
             if self.socket:
-                self.socket.send((message + '\n').encode(ENCODING))
+                self.socket.sendall(encode_line(message))
         except Exception as e:
             log(f"Send error: {e}", "ERROR")
     
@@ -126,27 +183,25 @@ class SocketHandle(threading.Thread):
     
     def run(self):
         """Main message receiving loop"""
-        buffer = ""  # Buffer for incomplete messages
+        decoder = LineDecoder()  # Buffers incomplete messages
+        receive_buffer = bytearray(BUFFER_SIZE)
+        receive_view = memoryview(receive_buffer)
         
         while self.running:
             try:
-                data = self.socket.recv(BUFFER_SIZE).decode(ENCODING)
-                if not data:
+                size = self.socket.recv_into(receive_buffer)
+                if not size:
                     break
                 
-                # Add to buffer
-                buffer += data
-                
-                # Process complete messages (separated by newlines)
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    line = line.strip()
-                    if line:
-                        # Handle each message separately
-                        self.handle_message(line)
+                # Handle each complete message separately
+                for message in decoder.feed(receive_view[:size]):
+                    self.handle_message(message)
             
             except socket.timeout:
                 continue
+            except FrameTooLarge as e:
+                log(f"Oversized message from server: {e}", "ERROR")
+                break
             except Exception as e:
                 if self.running:
                     log(f"Receive error: {e}", "ERROR")
@@ -157,110 +212,8 @@ class SocketHandle(threading.Thread):
     def handle_message(self, message):
         """Handle incoming message from server"""
         log(f"[RECV] {message}", "DEBUG")  # Debug log
-        parts = message.split(',')
-        if not parts:
-            return
-        
-        command = parts[0]
-        
         try:
-            # Authentication responses
-            if command == PROTOCOL_LOGIN_SUCCESS:
-                self.handle_login_success(parts)
-            
-            elif command == PROTOCOL_WRONG_USER:
-                self.handle_wrong_user(parts)
-            
-            elif command == PROTOCOL_DUPLICATE_LOGIN:
-                self.handle_duplicate_login(parts)
-            
-            elif command == PROTOCOL_BANNED_USER:
-                self.handle_banned_user(parts)
-            
-            elif command == PROTOCOL_DUPLICATE_USERNAME:
-                self.handle_duplicate_username()
-            
-            # Chat
-            elif command == PROTOCOL_CHAT_SERVER:
-                self.handle_chat_server(parts)
-            
-            elif command == PROTOCOL_CHAT:
-                self.handle_chat(parts)
-            
-            # Friends
-            elif command == PROTOCOL_RETURN_FRIEND_LIST:
-                self.handle_return_friend_list(parts)
-            
-            elif command == PROTOCOL_CHECK_FRIEND_RESPONSE:
-                self.handle_check_friend_response(parts)
-            
-            elif command == PROTOCOL_MAKE_FRIEND_REQUEST:
-                self.handle_make_friend_request(parts)
-            
-            # Rooms
-            elif command == PROTOCOL_ROOM_LIST:
-                self.handle_room_list(parts)
-            
-            elif command == PROTOCOL_YOUR_CREATED_ROOM:
-                self.handle_your_created_room(parts)
-            
-            elif command == PROTOCOL_GO_TO_ROOM:
-                self.handle_go_to_room(parts)
-            
-            elif command == PROTOCOL_ROOM_FULLY:
-                self.handle_room_fully()
-            
-            elif command == PROTOCOL_ROOM_NOT_FOUND:
-                self.handle_room_not_found()
-            
-            elif command == PROTOCOL_ROOM_WRONG_PASSWORD:
-                self.handle_room_wrong_password()
-            
-            # Rank
-            elif command == PROTOCOL_RETURN_GET_RANK_CHARTS:
-                self.handle_return_get_rank_charts(parts)
-            
-            # Game
-            elif command == PROTOCOL_CARO:
-                self.handle_caro(parts)
-            
-            elif command == PROTOCOL_NEW_GAME:
-                self.handle_new_game()
-            
-            elif command == PROTOCOL_DRAW_REQUEST:
-                self.handle_draw_request()
-            
-            elif command == PROTOCOL_DRAW_REFUSE:
-                self.handle_draw_refuse()
-            
-            elif command == PROTOCOL_DRAW_GAME:
-                self.handle_draw_game()
-            
-            elif command == PROTOCOL_COMPETITOR_TIME_OUT:
-                self.handle_competitor_time_out()
-            
-            # Duel
-            elif command == PROTOCOL_DUEL_NOTICE:
-                self.handle_duel_notice(parts)
-            
-            elif command == PROTOCOL_DISAGREE_DUEL:
-                self.handle_disagree_duel()
-            
-            # Other
-            elif command == PROTOCOL_LEFT_ROOM:
-                self.handle_left_room()
-            
-            elif command == PROTOCOL_VOICE_MESSAGE:
-                self.handle_voice_message(parts)
-            
-            elif command == PROTOCOL_BANNED_NOTICE:
-                self.handle_banned_notice(parts)
-            
-            elif command == PROTOCOL_WARNING_NOTICE:
-                self.handle_warning_notice(parts)
-            
-            elif command == PROTOCOL_ADMIN_BROADCAST:
-                self.handle_admin_broadcast(parts)
+            self.dispatcher.dispatch(self, message)
         
         except Exception as e:
             log(f"Handle message error: {e}", "ERROR")
@@ -374,11 +327,27 @@ class SocketHandle(threading.Thread):
         if hasattr(self.client, 'on_room_wrong_password'):
             self.client.on_room_wrong_password()
     
+    def request_rank_charts(self):
+        """Ask for the rank chart, sending the version of the cached one"""
+        if self.rank_chart_version:
+            self.write(create_message(PROTOCOL_GET_RANK_CHARTS, self.rank_chart_version))
+        else:
+            self.write(create_message(PROTOCOL_GET_RANK_CHARTS))
+    
     def handle_return_get_rank_charts(self, parts):
-        """Handle rank list response"""
-        users = self.get_list_rank(parts)
+        """Handle rank list response: version, then the users"""
+        if len(parts) < 2:
+            return
+        self.rank_chart_version = parts[1]
+        # get_list_rank skips the first element, here the version
+        self.rank_chart_users = self.get_list_rank(parts[1:])
+        if hasattr(self.client, 'on_rank_list'):
+            self.client.on_rank_list(self.rank_chart_users)
+    
+    def handle_rank_charts_not_modified(self):
+        """Handle unchanged rank list: show the cached one"""
         if hasattr(self.client, 'on_rank_list'):
-            self.client.on_rank_list(users)
+            self.client.on_rank_list(self.rank_chart_users)
     
     def handle_caro(self, parts):
         """Handle game move"""
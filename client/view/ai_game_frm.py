@@ -7,7 +7,8 @@ from tkinter import messagebox
 from client.controller.client import Client
 from shared.user import User
 from shared.constants import *
-from shared.game_logic import GameLogic, SimpleAI
+from shared.game_logic import GameLogic, BoardState
+from shared.parallel_search import create_ai
 from shared.point import Point
 import threading
 import time
@@ -24,13 +25,14 @@ class AIGameFrm:
         self.window.protocol("WM_DELETE_WINDOW", self.on_closing)
         
         # Game state
-        self.board = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+        self.board = BoardState(first_player=1)
         self.buttons = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
         self.my_turn = True  # Player starts first
         self.game_started = True
         self.game_ended = False
         self.player_marker = 1  # Player is X
         self.ai_marker = 2  # AI is O
+        self.ai = create_ai(time_limit=AI_TIME_LIMIT)
         
         # Timer
         self.time_left = TURN_TIME_LIMIT
@@ -257,7 +259,7 @@ class AIGameFrm:
             return
         
         # Make move
-        self.board[x][y] = self.player_marker
+        self.board.play(x, y, self.player_marker)
         self.buttons[x][y].config(
             text="X",
             fg=COLOR_PRIMARY,
@@ -287,10 +289,15 @@ class AIGameFrm:
     
     def ai_move(self):
         """AI makes a move"""
-        time.sleep(0.5)  # Small delay for better UX
+        start = time.time()
         
-        # Get best move from AI
-        move = SimpleAI.get_best_move(self.board, self.ai_marker, self.player_marker)
+        # Get best move from AI (searches a private copy of the board)
+        move = self.ai.get_best_move(self.board, self.ai_marker, self.player_marker)
+        
+        # Small delay for better UX when the search finished early
+        elapsed = time.time() - start
+        if elapsed < 0.5:
+            time.sleep(0.5 - elapsed)
         
         if move:
             x, y = move.x, move.y
@@ -303,7 +310,7 @@ class AIGameFrm:
         if self.game_ended:
             return
         
-        self.board[x][y] = self.ai_marker
+        self.board.play(x, y, self.ai_marker)
         self.buttons[x][y].config(
             text="O",
             fg=COLOR_DANGER,
@@ -385,7 +392,7 @@ class AIGameFrm:
                 return
         
         # Reset game state
-        self.board = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+        self.board = BoardState(first_player=1)
         self.my_turn = True
         self.game_started = True
         self.game_ended = False
@@ -409,7 +416,9 @@ class AIGameFrm:
         if not self.game_ended:
             if messagebox.askyesno("Xác nhận", "Bạn có chắc muốn thoát?"):
                 self.stop_timer()
+                self.ai.close()
                 self.window.destroy()
         else:
             self.stop_timer()
+            self.ai.close()
             self.window.destroy()
@@ -7,7 +7,8 @@ from tkinter import messagebox, scrolledtext
 from client.controller.client import Client
 from shared.utils import create_message, log
 from shared.constants import *
-from shared.game_logic import GameLogic, SimpleAI
+from shared.game_logic import GameLogic, BoardState
+from shared.parallel_search import create_ai
 from shared.point import Point
 import time
 import threading
@@ -43,8 +44,8 @@ class GameClientFrm:
         self.game_started = True
         self.game_ended = False
         
-        # Board state
-        self.board = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+        # Board state (1 = my piece, 2 = opponent)
+        self.board = BoardState(first_player=1 if self.my_turn else 2)
         self.buttons = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
         
         # Timer
@@ -53,6 +54,7 @@ class GameClientFrm:
         
         # AI mode
         self.is_ai_mode = (competitor.get_nickname() == "AI")
+        self.ai = create_ai(time_limit=AI_TIME_LIMIT) if self.is_ai_mode else None
         
         self.setup_ui()
         self.center_window()
@@ -271,8 +273,8 @@ class GameClientFrm:
             self.on_game_win(row, col)
             return
         
-        # Check draw
-        if GameLogic.is_board_full(self.board):
+        # Check draw (online, the server announces it with draw-game)
+        if self.is_ai_mode and GameLogic.is_board_full(self.board):
             self.on_game_draw()
             return
         
@@ -301,7 +303,7 @@ class GameClientFrm:
             row, col: Position
             player: 1 for me, 2 for opponent
         """
-        self.board[row][col] = player
+        self.board.play(row, col, player)
         
         # Determine symbol based on numberOfMatch and player
         # Java logic:
@@ -329,31 +331,41 @@ class GameClientFrm:
         )
     
     def ai_make_move(self):
-        """AI makes a move"""
+        """AI makes a move (search runs off the Tk main thread)"""
         if self.game_ended:
             return
         
-        # Get AI's best move
-        move = SimpleAI.get_best_move(self.board, 2, 1)
+        threading.Thread(target=self.ai_search_move, daemon=True).start()
+    
+    def ai_search_move(self):
+        """Search AI's best move in background, then apply it on main thread"""
+        move = self.ai.get_best_move(self.board, 2, 1)
         
         if move:
             row, col = move.get_x(), move.get_y()
-            self.make_move(row, col, 2)
-            
-            # Check win
-            if GameLogic.check_win(self.board, row, col, 2):
-                self.on_game_loss()
-                return
-            
-            # Check draw
-            if GameLogic.is_board_full(self.board):
-                self.on_game_draw()
-                return
-            
-            # Switch turn back to player
-            self.my_turn = True
-            self.start_timer()
-            self.update_status("Lượt của bạn!")
+            self.window.after(0, lambda: self.apply_ai_move(row, col))
+    
+    def apply_ai_move(self, row, col):
+        """Apply AI move to board (called on main thread)"""
+        if self.game_ended:
+            return
+        
+        self.make_move(row, col, 2)
+        
+        # Check win
+        if GameLogic.check_win(self.board, row, col, 2):
+            self.on_game_loss()
+            return
+        
+        # Check draw
+        if GameLogic.is_board_full(self.board):
+            self.on_game_draw()
+            return
+        
+        # Switch turn back to player
+        self.my_turn = True
+        self.start_timer()
+        self.update_status("Lượt của bạn!")
     
     def receive_move(self, row, col):
         """
@@ -362,7 +374,7 @@ class GameClientFrm:
         Args:
             row, col: Position of opponent's move
         """
-        if self.game_ended:
+        if self.game_ended or self.board[row][col] != 0:
             return
         
         self.make_move(row, col, 2)
@@ -372,8 +384,8 @@ class GameClientFrm:
             self.on_game_loss()
             return
         
-        # Check draw
-        if GameLogic.is_board_full(self.board):
+        # Check draw (announced by the server with draw-game)
+        if self.is_ai_mode and GameLogic.is_board_full(self.board):
             self.on_game_draw()
             return
         
@@ -391,6 +403,10 @@ class GameClientFrm:
         Args:
             row, col: Position of competitor's move
         """
+        # Ignore moves on taken cells
+        if self.board[row][col] != 0:
+            return
+        
         # Mark opponent's move on board
         self.make_move(row, col, 2)  # 2 = opponent
         
@@ -399,9 +415,8 @@ class GameClientFrm:
             self.on_game_loss()
             return
         
-        # Check for draw
+        # A full board is announced by the server with draw-game
         if GameLogic.is_board_full(self.board):
-            self.on_game_draw()
             return
         
         # Enable my turn - THIS IS THE KEY FIX!
@@ -539,6 +554,9 @@ class GameClientFrm:
         self.window.lift()
         self.window.focus_force()
         messagebox.showinfo("Chiến thắng!", "🎉 Đối thủ đã hết thời gian! Bạn thắng!", parent=self.window)
+        
+        # The server starts the next game for both players
+        self.new_game()
     
     def new_game(self):
         """
@@ -552,11 +570,11 @@ class GameClientFrm:
         # Reset game state
         self.game_ended = False
         self.game_started = True
-        self.board = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
         
         # Determine turn based on new numberOfMatch
         # Java: if (numberOfMatch % 2 == 0) → current player goes first
         self.my_turn = (self.number_of_match % 2 == 0)
+        self.board = BoardState(first_player=1 if self.my_turn else 2)
         
         # Reset UI
         for i in range(BOARD_SIZE):
@@ -744,6 +762,8 @@ class GameClientFrm:
     def close(self):
         """Close window"""
         self.stop_timer()
+        if self.ai:
+            self.ai.close()
         try:
             # Disable chat scrollbar to prevent TclError
             if hasattr(self, 'chat_display'):
@@ -5,7 +5,7 @@ Rank Form - Complete implementation with sorting
 import tkinter as tk
 from tkinter import ttk
 from client.controller.client import Client
-from shared.utils import create_message, calculate_win_ratio
+from shared.utils import calculate_win_ratio
 from shared.constants import *
 
 class RankFrm:
@@ -28,7 +28,7 @@ class RankFrm:
         
         # Request rank list from server
         if Client.socket_handle:
-            Client.socket_handle.write(create_message(PROTOCOL_GET_RANK_CHARTS))
+            Client.socket_handle.request_rank_charts()
     
     def center_window(self):
         """Center window on screen"""
@@ -302,7 +302,7 @@ class RankFrm:
     def refresh_ranks(self):
         """Refresh rank list"""
         if Client.socket_handle:
-            Client.socket_handle.write(create_message(PROTOCOL_GET_RANK_CHARTS))
+            Client.socket_handle.request_rank_charts()
     
     def back(self):
         """Go back to homepage"""
@@ -10,7 +10,7 @@ import threading
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from server.controller.server import Server
+from server.controller.server import create_server
 from server.view.admin import Admin
 
 
@@ -23,8 +23,8 @@ def main():
     # Create root window
     root = tk.Tk()
     
-    # Create server
-    server = Server()
+    # Create server (threaded or asyncio, see Config.SERVER_MODE)
+    server = create_server()
     
     # Create admin panel
     admin = Admin(root, server)
@@ -5,6 +5,8 @@ Server controller package
 from .room import Room
 from .server_thread import ServerThread
 from .server_thread_bus import ServerThreadBus
-from .server import Server
+from .server import Server, create_server
+from .async_server import AsyncServer, AsyncServerThread
 
-__all__ = ['Room', 'ServerThread', 'ServerThreadBus', 'Server']
+__all__ = ['Room', 'ServerThread', 'ServerThreadBus', 'Server', 'create_server',
+           'AsyncServer', 'AsyncServerThread']
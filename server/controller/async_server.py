@@ -0,0 +1,228 @@
+"""
+Asyncio server - serves all client connections from one event loop
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from server.controller.server import Server
+from server.controller.server_thread import ServerThread
+from shared.utils import log, create_message
+from shared.framing import LineDecoder, encode_line
+from shared.config import Config
+from shared.constants import *
+
+class AsyncServerThread(ServerThread):
+    """
+    Client connection served by the event loop
+
+    Keeps all handle_* logic of ServerThread; only reading, writing and
+    closing go through asyncio streams. Messages are handled on a shared
+    worker pool (handlers do blocking database calls), one at a time per
+    connection, so an idle connection costs no thread.
+
+    The transport buffers and coalesces outgoing data itself; the
+    slow-consumer policy applies once its buffer passes OUTBOUND_QUEUE_LIMIT.
+    """
+
+    def __init__(self, reader, writer, client_number, server_thread_bus, admin, loop):
+        """
+        Initialize connection
+
+        Args:
+            reader: asyncio.StreamReader of the connection
+            writer: asyncio.StreamWriter of the connection
+            client_number: Unique client identifier
+            server_thread_bus: Reference to ServerThreadBus
+            admin: Reference to admin panel
+            loop: Event loop serving the connection
+        """
+        self.reader = reader
+        self.writer = writer
+        self.loop = loop
+        self.dropped_messages = 0
+        super().__init__(writer.get_extra_info('socket'), client_number, server_thread_bus, admin)
+
+    async def serve(self, executor):
+        """
+        Connection main loop (replaces ServerThread.run)
+
+        Args:
+            executor: Worker pool running the message handlers
+        """
+        log(f"Client {self.client_number} connection started")
+        self.write(create_message(PROTOCOL_SERVER_SEND_ID, self.client_number))
+
+        decoder = LineDecoder()
+        try:
+            while not self.is_closed:
+                data = await self.reader.read(BUFFER_SIZE)
+                if not data:
+                    break
+
+                for message in decoder.feed(data):
+                    await self.loop.run_in_executor(executor, self.handle_message, message)
+
+        except (ConnectionError, ValueError) as e:
+            log(f"Client {self.client_number} receive error: {e}", "ERROR")
+
+        finally:
+            # cleanup() may already have run, e.g. after a duplicate login
+            if not self.is_closed:
+                try:
+                    await self.loop.run_in_executor(executor, self.cleanup)
+                except RuntimeError:
+                    # Worker pool already shut down with the server
+                    self.cleanup()
+
+    def create_outbound_queue(self):
+        """Outgoing data is queued by the transport"""
+        return None
+
+    def write(self, message):
+        """
+        Send message to client (safe to call from any thread)
+
+        Args:
+            message: Message string
+        """
+        self.write_encoded(encode_line(message), self.is_droppable(message))
+
+    def write_encoded(self, data, droppable=False):
+        """
+        Send an already encoded message (safe to call from any thread)
+
+        Args:
+            data: Message bytes (see encode_line)
+            droppable: Whether a slow client may miss the message
+        """
+        try:
+            self.loop.call_soon_threadsafe(self._send, data, droppable)
+        except RuntimeError as e:
+            log(f"Write error to client {self.client_number}: {e}", "ERROR")
+
+    @classmethod
+    def fan_out(cls, threads, message):
+        """
+        Send one message to many connections with a single event loop wakeup
+
+        Args:
+            threads: Sequence of connections served by the same loop
+            message: Message string
+        """
+        data = encode_line(message)
+        droppable = cls.is_droppable(message)
+
+        def send_all():
+            for thread in threads:
+                thread._send(data, droppable)
+
+        try:
+            threads[0].loop.call_soon_threadsafe(send_all)
+        except RuntimeError as e:
+            log(f"Broadcast error: {e}", "ERROR")
+
+    def _send(self, data, droppable):
+        """Queue data on the transport (event loop thread only)"""
+        if self.writer.is_closing():
+            return
+        transport = self.writer.transport
+        if transport.get_write_buffer_size() + len(data) > OUTBOUND_QUEUE_LIMIT:
+            if droppable and Config.SLOW_CONSUMER_POLICY == "drop_chat":
+                self.dropped_messages += 1
+                return
+            log(f"Client {self.client_number} is not reading, disconnecting", "WARNING")
+            # Ends the read loop in serve(), which then runs cleanup()
+            transport.abort()
+            return
+        self.writer.write(data)
+
+    def close_connection(self):
+        """Close the stream (safe to call from any thread)"""
+        try:
+            self.loop.call_soon_threadsafe(self.writer.close)
+        except RuntimeError:
+            pass
+
+
+class AsyncServer(Server):
+    """Game server built on asyncio.start_server"""
+
+    def __init__(self, host=None, port=None):
+        """
+        Initialize server
+
+        Args:
+            host: Server host address
+            port: Server port
+        """
+        super().__init__(host, port)
+        self.loop = None
+        self.listener = None
+        self.executor = None
+
+    def start(self):
+        """Start server (blocks until the server is stopped)"""
+        try:
+            asyncio.run(self._serve())
+        except Exception as e:
+            log(f"Server error: {e}", "ERROR")
+        finally:
+            self.stop()
+
+    async def _serve(self):
+        """Accept connections until the listener is closed"""
+        self.loop = asyncio.get_running_loop()
+        self.executor = ThreadPoolExecutor(
+            max_workers=MAX_THREADS,
+            thread_name_prefix="ClientHandler"
+        )
+
+        try:
+            self.listener = await asyncio.start_server(
+                self._handle_client,
+                self.host,
+                self.port,
+                reuse_address=True,
+                backlog=ASYNC_BACKLOG
+            )
+
+            self.running = True
+            log(f"Server started on {self.host}:{self.port} (asyncio)")
+            log("Waiting for connections...")
+
+            async with self.listener:
+                await self.listener.serve_forever()
+
+        except asyncio.CancelledError:
+            pass
+
+        finally:
+            self.executor.shutdown(wait=False)
+
+    async def _handle_client(self, reader, writer):
+        """Serve one new connection"""
+        log(f"New connection from {writer.get_extra_info('peername')}")
+
+        connection = AsyncServerThread(
+            reader,
+            writer,
+            self.client_counter,
+            self.server_thread_bus,
+            self.admin,
+            self.loop
+        )
+
+        self.server_thread_bus.add(connection)
+        self.client_counter += 1
+
+        await connection.serve(self.executor)
+
+    def stop(self):
+        """Stop server"""
+        if self.loop is not None and self.listener is not None:
+            try:
+                self.loop.call_soon_threadsafe(self.listener.close)
+            except RuntimeError:
+                pass
+
+        super().stop()
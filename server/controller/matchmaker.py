@@ -0,0 +1,294 @@
+"""
+Matchmaker - skill-bucketed quick match queue
+"""
+
+import time
+import threading
+from server.controller.room_registry import ROOM_FILLED, ROOM_CLOSED
+from shared.utils import log
+from shared.constants import *
+
+class MatchTicket:
+    """A player waiting for a quick match opponent"""
+
+    def __init__(self, server_thread, room, rating, bucket):
+        """
+        Initialize ticket
+
+        Args:
+            server_thread: ServerThread of the waiting player
+            room: Room the player waits in
+            rating: Player rating
+            bucket: Queue bucket of the rating
+        """
+        self.server_thread = server_thread
+        self.room = room
+        self.rating = rating
+        self.bucket = bucket
+        self.enqueued_at = time.time()
+
+
+class Matchmaker:
+    """
+    Quick match queue indexed by rating bucket
+
+    Players waiting in a room made by quick-room are queued by
+    ServerThread.handle_quick_room under their rating; rooms made with
+    create-room are never matched. A waiting player accepts opponents within a rating window that widens
+    the longer they wait. Arriving players are matched against the queue
+    at once; a pairing pass every MATCH_INTERVAL seconds matches waiting
+    players whose windows have grown to overlap. A pair from the pass is
+    seated by on_match while neither player handles a message, and only
+    if both still wait; whoever still waits otherwise is queued again.
+    """
+
+    def __init__(self, room_registry, on_match=None, bucket_size=MATCH_BUCKET_SIZE,
+                 base_window=MATCH_WINDOW_BASE, growth=MATCH_WINDOW_GROWTH,
+                 max_window=MATCH_WINDOW_MAX, interval=MATCH_INTERVAL):
+        """
+        Initialize matchmaker
+
+        Args:
+            room_registry: RoomRegistry holding the waiting rooms
+            on_match: Callable (ticket, partner) completing a pair of the
+                pairing pass: it keeps both players from handling messages
+                and calls seat(); seat() alone is used if None
+            bucket_size: Rating points per bucket
+            base_window: Rating difference accepted right away
+            growth: Rating difference added per second of waiting
+            max_window: Largest rating difference ever accepted
+            interval: Seconds between pairing passes
+        """
+        self.room_registry = room_registry
+        self.on_match = on_match
+        self.bucket_size = bucket_size
+        self.base_window = base_window
+        self.growth = growth
+        self.max_window = max_window
+        self.interval = interval
+
+        self.lock = threading.Condition()
+        self.buckets = {}  # bucket -> {client number: MatchTicket}, oldest first
+        self.tickets = {}  # client number -> MatchTicket
+        self.thread = None
+        self.running = True
+
+        # Statistics
+        self.matches = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        room_registry.add_listener(self._on_room_event)
+
+    def window(self, ticket, now):
+        """Rating difference a ticket accepts at time now"""
+        return min(self.base_window + self.growth * (now - ticket.enqueued_at), self.max_window)
+
+    def _find_partner(self, rating, window, now, exclude=None):
+        """
+        Best queued ticket for a player (lock held)
+
+        Searches the nearest buckets first; a pair is accepted when the
+        difference fits the wider of the two windows.
+
+        Returns:
+            MatchTicket or None
+        """
+        bucket = rating // self.bucket_size
+        reach = int(self.max_window // self.bucket_size) + 1
+        best = None
+        for distance in range(reach + 1):
+            for index in ((bucket,) if distance == 0 else (bucket - distance, bucket + distance)):
+                for ticket in self.buckets.get(index, {}).values():
+                    if ticket is exclude:
+                        continue
+                    difference = abs(ticket.rating - rating)
+                    if difference > max(window, self.window(ticket, now)):
+                        continue
+                    if best is None or (difference, ticket.enqueued_at) < (abs(best.rating - rating), best.enqueued_at):
+                        best = ticket
+            # Tickets in farther buckets differ by at least this much
+            if best is not None and abs(best.rating - rating) <= (distance * self.bucket_size):
+                break
+        return best
+
+    def _remove(self, ticket):
+        """Drop a ticket from the queue (lock held)"""
+        client_number = ticket.server_thread.get_client_number()
+        if self.tickets.get(client_number) is not ticket:
+            return
+        del self.tickets[client_number]
+        bucket = self.buckets[ticket.bucket]
+        del bucket[client_number]
+        if not bucket:
+            del self.buckets[ticket.bucket]
+
+    def _record_match(self, ticket, now):
+        """Update time-to-match statistics (lock held)"""
+        wait = now - ticket.enqueued_at
+        self.matches += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        log(f"Matched in room {ticket.room.get_id()} after {wait:.1f}s")
+
+    def find_match(self, server_thread, rating):
+        """
+        Join the best waiting room for an arriving player
+
+        Args:
+            server_thread: ServerThread of the arriving player
+            rating: Player rating
+
+        Returns:
+            Joined Room, or None if nobody suitable is waiting
+        """
+        with self.lock:
+            now = time.time()
+            while True:
+                ticket = self._find_partner(rating, self.base_window, now)
+                if ticket is None:
+                    return None
+                self._remove(ticket)
+                if self.room_registry.try_join(ticket.room, server_thread):
+                    self._record_match(ticket, now)
+                    return ticket.room
+
+    def enqueue(self, server_thread, room, rating):
+        """
+        Queue a player waiting in a room
+
+        Args:
+            server_thread: ServerThread of the waiting player
+            room: Room the player waits in
+            rating: Player rating
+        """
+        ticket = MatchTicket(server_thread, room, rating, rating // self.bucket_size)
+        with self.lock:
+            old_ticket = self.tickets.get(server_thread.get_client_number())
+            if old_ticket is not None:
+                self._remove(old_ticket)
+            self.tickets[server_thread.get_client_number()] = ticket
+            self.buckets.setdefault(ticket.bucket, {})[server_thread.get_client_number()] = ticket
+            if self.thread is None and self.running:
+                self.thread = threading.Thread(target=self._run, name="Matchmaker", daemon=True)
+                self.thread.start()
+
+    def cancel(self, server_thread):
+        """Remove a player from the queue (no-op if not queued)"""
+        with self.lock:
+            ticket = self.tickets.get(server_thread.get_client_number())
+            if ticket is not None:
+                self._remove(ticket)
+
+    def _on_room_event(self, event, room):
+        """Registry listener: drop the tickets of joined or closed rooms"""
+        if event in (ROOM_FILLED, ROOM_CLOSED):
+            with self.lock:
+                ticket = self.tickets.get(room.get_user1().get_client_number())
+                if ticket is not None and ticket.room is room:
+                    self._remove(ticket)
+
+    def pair_waiting(self):
+        """
+        Pairing pass over the queue, oldest tickets first
+
+        Returns:
+            List of (ticket, partner) pairs taken off the queue; the player
+            who waited longer (ticket) keeps the room, see seat()
+        """
+        pairs = []
+        with self.lock:
+            now = time.time()
+            for ticket in sorted(self.tickets.values(), key=lambda t: t.enqueued_at):
+                if self.tickets.get(ticket.server_thread.get_client_number()) is not ticket:
+                    continue  # already paired in this pass
+                partner = self._find_partner(ticket.rating, self.window(ticket, now), now, exclude=ticket)
+                if partner is None:
+                    continue
+                self._remove(ticket)
+                self._remove(partner)
+                pairs.append((ticket, partner))
+        return pairs
+
+    def is_waiting(self, ticket):
+        """Whether the player of a ticket is connected and still alone in its room"""
+        server_thread = ticket.server_thread
+        return (not server_thread.is_closed and server_thread.get_room() is ticket.room
+                and self.room_registry.is_waiting(ticket.room))
+
+    def seat(self, ticket, partner):
+        """
+        Complete a pair of the pairing pass
+
+        The caller keeps both players from handling messages meanwhile.
+        If both still wait, the partner takes the free seat of the ticket's
+        room and the partner's room is closed; otherwise whoever still
+        waits is queued again, with their waiting time kept.
+
+        Returns:
+            True if the partner was seated (it still has to enter the room)
+        """
+        ticket_waiting = self.is_waiting(ticket)
+        partner_waiting = self.is_waiting(partner)
+        if ticket_waiting and partner_waiting and self.room_registry.try_join(ticket.room, partner.server_thread):
+            self.room_registry.close(partner.room)
+            with self.lock:
+                self._record_match(ticket, time.time())
+            return True
+
+        for waiting_ticket, waiting in ((ticket, ticket_waiting), (partner, partner_waiting)):
+            if waiting:
+                self._requeue(waiting_ticket)
+        return False
+
+    def _requeue(self, ticket):
+        """Queue a ticket again unless its player queued anew meanwhile"""
+        client_number = ticket.server_thread.get_client_number()
+        with self.lock:
+            if client_number in self.tickets:
+                return
+            self.tickets[client_number] = ticket
+            self.buckets.setdefault(ticket.bucket, {})[client_number] = ticket
+            if self.thread is None and self.running:
+                self.thread = threading.Thread(target=self._run, name="Matchmaker", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        """Pairing thread: runs while players are queued"""
+        while True:
+            with self.lock:
+                self.lock.wait(self.interval)
+                if not self.running or not self.tickets:
+                    self.thread = None
+                    return
+
+            for ticket, partner in self.pair_waiting():
+                try:
+                    if self.on_match:
+                        self.on_match(ticket, partner)
+                    else:
+                        self.seat(ticket, partner)
+                except Exception as e:
+                    log(f"Match callback error: {e}", "ERROR")
+
+    def stop(self):
+        """Stop the pairing thread"""
+        with self.lock:
+            self.running = False
+            self.lock.notify_all()
+
+    def get_stats(self):
+        """
+        Get matchmaking metrics
+
+        Returns:
+            Dict with queued players, matches made, average and max
+            time-to-match in seconds
+        """
+        with self.lock:
+            return {
+                'queued': len(self.tickets),
+                'matches': self.matches,
+                'average_wait': self.total_wait / self.matches if self.matches else 0.0,
+                'max_wait': self.max_wait,
+            }
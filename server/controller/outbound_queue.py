@@ -0,0 +1,152 @@
+"""
+Outbound queue - per-connection send queue drained by its own writer thread
+"""
+
+import threading
+from collections import deque
+from shared.utils import log
+from shared.constants import *
+
+class OutboundQueue:
+    """
+    Bounded queue of encoded messages for one connection
+
+    Writers (handlers of any client, broadcasts) only append to the queue,
+    so a slow client never blocks them. A writer thread started on the
+    first message drains the queue, joining everything queued since the
+    last send into one sendall() call.
+    """
+
+    def __init__(self, send, on_close, on_overflow, name="Writer",
+                 limit=OUTBOUND_QUEUE_LIMIT, batch_size=OUTBOUND_BATCH_SIZE,
+                 policy=SLOW_CONSUMER_POLICY):
+        """
+        Initialize queue
+
+        Args:
+            send: Callable sending bytes completely (e.g. socket.sendall)
+            on_close: Called once when the queue is closed and drained
+            on_overflow: Called when the client has to be disconnected
+                because the queue is full
+            name: Writer thread name
+            limit: Most bytes queued before the slow-consumer policy applies
+            batch_size: Most bytes joined into one send
+            policy: "drop_chat" or "disconnect"
+        """
+        self.send = send
+        self.on_close = on_close
+        self.on_overflow = on_overflow
+        self.name = name
+        self.limit = limit
+        self.batch_size = batch_size
+        self.policy = policy
+
+        self.condition = threading.Condition()
+        self.items = deque()
+        self.size = 0
+        self.closed = False
+        self.finished = False
+        self.thread = None
+
+        # Statistics
+        self.dropped = 0
+        self.batches = 0
+        self.messages = 0
+
+    def put(self, data, droppable=False):
+        """
+        Queue data for sending
+
+        Args:
+            data: Encoded message bytes
+            droppable: Whether the message may be dropped for a slow client
+
+        Returns:
+            True if queued, False if dropped
+        """
+        with self.condition:
+            if self.closed:
+                return False
+
+            if self.size + len(data) <= self.limit or not self.items:
+                self.items.append(data)
+                self.size += len(data)
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self.thread.start()
+                self.condition.notify()
+                return True
+
+            if droppable and self.policy == "drop_chat":
+                self.dropped += 1
+                return False
+
+        log(f"{self.name}: slow consumer, {self.size} bytes queued - disconnecting", "WARNING")
+        self.close(flush=False)
+        self.on_overflow()
+        return False
+
+    def close(self, flush=True):
+        """
+        Close the queue; on_close runs once queued data is sent
+
+        Args:
+            flush: Send the data already queued (False drops it)
+        """
+        with self.condition:
+            if self.closed and (flush or not self.items):
+                return
+            self.closed = True
+            if not flush:
+                self.items.clear()
+                self.size = 0
+            self.condition.notify()
+            started = self.thread is not None
+        if not started:
+            self._finish()
+
+    def pending(self):
+        """Number of bytes waiting to be sent"""
+        return self.size
+
+    def _finish(self):
+        """Run on_close exactly once"""
+        with self.condition:
+            if self.finished:
+                return
+            self.finished = True
+        try:
+            self.on_close()
+        except Exception as e:
+            log(f"{self.name}: close error: {e}", "ERROR")
+
+    def _run(self):
+        """Writer thread: send queued data in batches until closed"""
+        while True:
+            with self.condition:
+                while not self.items and not self.closed:
+                    self.condition.wait()
+                if not self.items:
+                    break
+
+                batch = [self.items.popleft()]
+                size = len(batch[0])
+                while self.items and size + len(self.items[0]) <= self.batch_size:
+                    data = self.items.popleft()
+                    batch.append(data)
+                    size += len(data)
+                self.size -= size
+
+            try:
+                self.send(batch[0] if len(batch) == 1 else b''.join(batch))
+                self.batches += 1
+                self.messages += len(batch)
+            except OSError as e:
+                log(f"{self.name}: send error: {e}", "ERROR")
+                with self.condition:
+                    self.closed = True
+                    self.items.clear()
+                    self.size = 0
+                break
+
+        self._finish()
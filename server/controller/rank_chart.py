@@ -0,0 +1,91 @@
+"""
+Rank chart - cached, versioned get-rank-charts response
+"""
+
+import threading
+import time
+from server.dao.user_dao import UserDAO
+from shared.utils import create_message
+from shared.constants import *
+
+class RankChartCache:
+    """
+    Pre-encoded rank chart, rebuilt only after the rankings changed
+
+    The version sent with the chart is "<start time>.<leaderboard
+    version>", so a version cached by a client is never mistaken for one
+    of a restarted server. A client sending the current version gets
+    rank-charts-not-modified instead of the chart.
+    """
+
+    def __init__(self, user_dao=None, limit=100):
+        """
+        Initialize cache
+
+        Args:
+            user_dao: UserDAO to read the chart from (created on first
+                use, after the server initialised the database)
+            limit: Players on the chart
+        """
+        self.user_dao = user_dao
+        self.limit = limit
+        self.epoch = int(time.time())
+        self.lock = threading.Lock()
+        self.version = None
+        self.payload = None
+
+        # Statistics
+        self.builds = 0
+        self.not_modified = 0
+
+    def get_user_dao(self):
+        """Get the UserDAO, creating it on first use"""
+        if self.user_dao is None:
+            self.user_dao = UserDAO()
+        return self.user_dao
+
+    def _encode(self, version):
+        """Encode the chart (passwords left out)"""
+        parts = [PROTOCOL_RETURN_GET_RANK_CHARTS, version]
+        for user in self.get_user_dao().get_user_static_rank()[:self.limit]:
+            parts.extend((user.get_id(), user.get_username(), "", user.get_nickname(), user.get_avatar(),
+                          user.get_number_of_game(), user.get_number_of_win(),
+                          user.get_number_of_draw(), user.get_rank()))
+        return create_message(*parts)
+
+    def get_version(self):
+        """Version of the current rankings"""
+        return f"{self.epoch}.{self.get_user_dao().leaderboard.get_version()}"
+
+    def get_response(self, client_version=None):
+        """
+        Response to a get-rank-charts request
+
+        Args:
+            client_version: Version of the chart cached by the client, or None
+
+        Returns:
+            Message string: the chart, or rank-charts-not-modified
+        """
+        # Read before building: a change during the build only makes the
+        # next request rebuild
+        version = self.get_version()
+        if client_version == version:
+            self.not_modified += 1
+            return create_message(PROTOCOL_RANK_CHARTS_NOT_MODIFIED, version)
+
+        with self.lock:
+            if self.version != version:
+                self.payload = self._encode(version)
+                self.version = version
+                self.builds += 1
+            return self.payload
+
+    def get_stats(self):
+        """
+        Get cache metrics
+
+        Returns:
+            Dict with chart builds and not-modified responses
+        """
+        return {'builds': self.builds, 'not_modified': self.not_modified}
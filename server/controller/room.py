@@ -2,12 +2,30 @@
 Room controller - manages game rooms
 """
 
+from threading import Lock
 from server.dao.user_dao import UserDAO
+from shared.game_logic import BoardState
 from shared.utils import log
-from shared.constants import MIN_ROOM_ID
+from shared.constants import MIN_ROOM_ID, BOARD_SIZE
+
+# Results of Room.play_move
+MOVE_INVALID = 0
+MOVE_OK = 1
+MOVE_WIN = 2
+MOVE_DRAW = 3
 
 class Room:
-    """Game room managing two players"""
+    """
+    Game room managing two players
+    
+    The room owns the board of the current game and is the authority on
+    it: moves out of turn or on taken cells are rejected, and wins and
+    draws are detected on the board, not taken from the clients. The second
+    player moves first in the first game, then the first move alternates
+    (the same order the clients derive from GO_TO_ROOM's is_start). The
+    call that ends a game also starts the next one under the room lock,
+    so a move sent right after NEW_GAME or DRAW_GAME is never rejected.
+    """
     
     # Class variable for room ID counter
     _next_room_id = MIN_ROOM_ID
@@ -27,6 +45,12 @@ class Room:
         self.password = " "  # Default no password
         self.user_dao = UserDAO()
         
+        # Current game
+        self.lock = Lock()
+        self.board = None
+        self.first_mover = None
+        self.draw_offer = None
+        
         log(f"Room created: ID={self.id}")
     
     def get_id(self):
@@ -39,8 +63,10 @@ class Room:
         return self.user2
     
     def set_user2(self, user2_thread):
-        """Set second player"""
+        """Set second player (starts the first game)"""
         self.user2 = user2_thread
+        if user2_thread is not None:
+            self.new_game(user2_thread)
     
     def get_password(self):
         return self.password
@@ -68,6 +94,108 @@ class Room:
         except Exception as e:
             log(f"Broadcast error in room {self.id}: {e}", "ERROR")
     
+    def new_game(self, first_mover):
+        """
+        Start a game on an empty board
+        
+        Args:
+            first_mover: ServerThread of the player moving first
+        """
+        with self.lock:
+            self._reset(first_mover)
+    
+    def _reset(self, first_mover):
+        """Empty the board (lock held)"""
+        self.board = BoardState(first_player=1)
+        self.first_mover = first_mover
+        self.draw_offer = None
+    
+    def _next_game(self):
+        """Start the next game (lock held); the other player moves first"""
+        self._reset(self.get_competitor(self.first_mover.get_client_number()))
+    
+    def get_marker(self, user_thread):
+        """Board marker of a player in the current game (1 moves first)"""
+        return 1 if user_thread is self.first_mover else 2
+    
+    def is_player(self, user_thread):
+        """Whether a ServerThread is one of the two players"""
+        return user_thread is not None and (user_thread is self.user1 or user_thread is self.user2)
+    
+    def play_move(self, user_thread, x, y):
+        """
+        Validate and play a move
+        
+        Args:
+            user_thread: ServerThread of the moving player
+            x, y: Position
+        
+        Returns:
+            MOVE_OK, MOVE_WIN (five in a row), MOVE_DRAW (board full), or
+            MOVE_INVALID if the game is not running, it is not the
+            player's turn or the cell is outside the board or taken; the
+            next game is started on a win or draw
+        """
+        with self.lock:
+            board = self.board
+            if board is None or not self.is_player(user_thread):
+                return MOVE_INVALID
+            player = self.get_marker(user_thread)
+            if board.get_current_player() != player:
+                return MOVE_INVALID
+            if not (0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE) or board[x][y] != 0:
+                return MOVE_INVALID
+            
+            self.draw_offer = None
+            if board.play(x, y, player):
+                self._next_game()
+                return MOVE_WIN
+            if board.is_full():
+                self._next_game()
+                return MOVE_DRAW
+            return MOVE_OK
+    
+    def resign(self, user_thread):
+        """
+        End the running game as lost by a player (timeout)
+        
+        Returns:
+            True if a game was running (the next game is started)
+        """
+        with self.lock:
+            if self.board is None or not self.is_player(user_thread):
+                return False
+            self._next_game()
+            return True
+    
+    def offer_draw(self, user_thread):
+        """Record a draw offer; False if no game is running"""
+        with self.lock:
+            if self.board is None or not self.is_player(user_thread):
+                return False
+            self.draw_offer = user_thread
+            return True
+    
+    def accept_draw(self, user_thread):
+        """
+        Accept the competitor's draw offer
+        
+        Returns:
+            True if the competitor offered a draw in the running game
+            (the next game is started)
+        """
+        with self.lock:
+            offer = self.draw_offer
+            if offer is None or offer is user_thread or not self.is_player(user_thread):
+                return False
+            self._next_game()
+            return True
+    
+    def refuse_draw(self):
+        """Drop the pending draw offer"""
+        with self.lock:
+            self.draw_offer = None
+    
     def get_competitor_id(self, client_number):
         """
         Get competitor's user ID
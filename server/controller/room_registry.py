@@ -0,0 +1,149 @@
+"""
+Room registry - index of all game rooms
+"""
+
+from threading import RLock
+from server.controller.room import Room
+from shared.utils import log
+
+# Lifecycle events passed to listeners
+ROOM_CREATED = "created"
+ROOM_FILLED = "filled"
+ROOM_CLOSED = "closed"
+
+class RoomRegistry:
+    """
+    Thread-safe index of rooms by ID
+
+    Rooms waiting for a second player are kept in insertion order, and
+    the open ones (no password) separately for quick match, so lookups
+    and joins take constant time whatever the number of connections.
+    """
+
+    def __init__(self):
+        self.lock = RLock()
+        self.rooms = {}  # room id -> Room
+        self.waiting = {}  # room id -> Room with one player, oldest first
+        self.open_rooms = {}  # subset of waiting without password
+        self.listeners = []
+
+    def add_listener(self, listener):
+        """
+        Add a lifecycle listener
+
+        Args:
+            listener: Callable (event, room), event one of ROOM_CREATED,
+                ROOM_FILLED, ROOM_CLOSED; called outside the registry lock
+        """
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Remove a lifecycle listener"""
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def _notify(self, event, room):
+        for listener in list(self.listeners):
+            try:
+                listener(event, room)
+            except Exception as e:
+                log(f"Room listener error ({event}, room {room.get_id()}): {e}", "ERROR")
+
+    def create(self, user1_thread, password=" ", user2_thread=None):
+        """
+        Create and register a room
+
+        Args:
+            user1_thread: ServerThread of the first player
+            password: Room password (" " for none)
+            user2_thread: Optional second player (room starts full)
+
+        Returns:
+            Room
+        """
+        with self.lock:
+            room = Room(user1_thread)
+            room.set_password(password)
+            self.rooms[room.get_id()] = room
+            if user2_thread is None:
+                self.waiting[room.get_id()] = room
+                if password == " ":
+                    self.open_rooms[room.get_id()] = room
+            else:
+                room.set_user2(user2_thread)
+
+        self._notify(ROOM_CREATED, room)
+        if user2_thread is not None:
+            self._notify(ROOM_FILLED, room)
+        return room
+
+    def get(self, room_id):
+        """Get room by ID, or None"""
+        return self.rooms.get(room_id)
+
+    def try_join(self, room, user2_thread):
+        """
+        Take the free seat of a room
+
+        Args:
+            room: Room to join
+            user2_thread: ServerThread of the joining player
+
+        Returns:
+            True if joined, False if the room is full or closed
+        """
+        with self.lock:
+            if self.waiting.pop(room.get_id(), None) is None:
+                return False
+            self.open_rooms.pop(room.get_id(), None)
+            room.set_user2(user2_thread)
+
+        self._notify(ROOM_FILLED, room)
+        return True
+
+    def close(self, room):
+        """
+        Unregister a room (no-op if already closed)
+
+        Args:
+            room: Room to close
+        """
+        with self.lock:
+            if self.rooms.pop(room.get_id(), None) is None:
+                return
+            self.waiting.pop(room.get_id(), None)
+            self.open_rooms.pop(room.get_id(), None)
+
+        self._notify(ROOM_CLOSED, room)
+
+    def is_waiting(self, room):
+        """Whether a room is registered with its second seat free"""
+        return self.waiting.get(room.get_id()) is room
+
+    def list_waiting(self, limit):
+        """
+        Rooms waiting for a second player
+
+        Args:
+            limit: Most rooms returned
+
+        Returns:
+            List of Room, oldest first
+        """
+        with self.lock:
+            result = []
+            for room in self.waiting.values():
+                if len(result) >= limit:
+                    break
+                result.append(room)
+            return result
+
+    def get_length(self):
+        """Get number of registered rooms"""
+        return len(self.rooms)
+
+    def get_open_count(self):
+        """Get number of rooms open for quick match"""
+        return len(self.open_rooms)
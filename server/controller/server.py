@@ -8,6 +8,8 @@ from concurrent.futures import ThreadPoolExecutor
 from server.controller.server_thread import ServerThread
 from server.controller.server_thread_bus import ServerThreadBus
 from server.dao.database import get_database
+from server.dao.stats_aggregator import get_stats_aggregator
+from server.dao.presence import get_presence
 from server.dao.user_dao import UserDAO
 from shared.config import Config
 from shared.constants import *
@@ -68,6 +70,8 @@ class Server:
                 try:
                     client_socket, client_address = self.server_socket.accept()
                     log(f"New connection from {client_address}")
+                    # Bounds how long a send to an unresponsive client may block
+                    client_socket.settimeout(OUTBOUND_SEND_TIMEOUT)
                     
                     # Create server thread
                     server_thread = ServerThread(
@@ -98,6 +102,7 @@ class Server:
     def stop(self):
         """Stop server"""
         self.running = False
+        self.server_thread_bus.matchmaker.stop()
         
         # Close all client connections
         for thread in self.server_thread_bus.get_list_server_threads():
@@ -109,6 +114,10 @@ class Server:
         # Clear thread bus
         self.server_thread_bus = ServerThreadBus()
         
+        # Write the stat counters of finished games (and presence, if snapshotted)
+        get_stats_aggregator().flush()
+        get_presence().snapshot()
+        
         if self.server_socket:
             try:
                 self.server_socket.close()
@@ -122,13 +131,30 @@ class Server:
         return self.server_thread_bus.get_length()
 
 
+def create_server(host=None, port=None):
+    """
+    Create the server selected by Config.SERVER_MODE
+    
+    Args:
+        host: Server host address
+        port: Server port
+    
+    Returns:
+        AsyncServer for "asyncio" mode, Server otherwise
+    """
+    if Config.SERVER_MODE == "asyncio":
+        from server.controller.async_server import AsyncServer
+        return AsyncServer(host, port)
+    return Server(host, port)
+
+
 def main():
     """Main server entry point"""
     from server.view.admin import Admin
     import tkinter as tk
     
     # Create and run server in separate thread
-    server = Server()
+    server = create_server()
     
     # Create admin GUI
     root = tk.Tk()
@@ -5,14 +5,67 @@ Server thread - handles individual client connection
 import socket
 import threading
 from server.dao.user_dao import UserDAO
-from server.controller.room import Room
+from server.controller.outbound_queue import OutboundQueue
+from server.controller.room import MOVE_INVALID, MOVE_WIN, MOVE_DRAW
 from shared.user import User
-from shared.utils import log, create_message
+from shared.utils import log, create_message, calculate_mark
+from shared.framing import LineDecoder, FrameTooLarge, encode_line
+from shared.dispatch import CommandHandlerMixin
+from shared.config import Config
 from shared.constants import *
 
-class ServerThread(threading.Thread):
+class ServerThread(CommandHandlerMixin, threading.Thread):
     """Thread handling one client connection"""
     
+    # Command -> (handler method, argument passed: 'parts', 'message' or None)
+    COMMAND_HANDLERS = (
+        # Game
+        (PROTOCOL_CARO, 'handle_caro', 'parts'),
+        (PROTOCOL_WIN, 'handle_win', None),
+        (PROTOCOL_LOSE, 'handle_lose', None),
+        (PROTOCOL_DRAW_REQUEST, 'handle_draw_request', 'message'),
+        (PROTOCOL_DRAW_CONFIRM, 'handle_draw_confirm', None),
+        (PROTOCOL_DRAW_REFUSE, 'handle_draw_refuse', None),
+        
+        # Chat
+        (PROTOCOL_CHAT_SERVER, 'handle_chat_server', 'parts'),
+        (PROTOCOL_CHAT, 'handle_chat', 'message'),
+        
+        # Login/Register
+        (PROTOCOL_CLIENT_VERIFY, 'handle_login', 'parts'),
+        (PROTOCOL_REGISTER, 'handle_register', 'parts'),
+        (PROTOCOL_OFFLINE, 'handle_offline', 'parts'),
+        
+        # Friends
+        (PROTOCOL_VIEW_FRIEND_LIST, 'handle_view_friend_list', None),
+        (PROTOCOL_CHECK_FRIEND, 'handle_check_friend', 'parts'),
+        (PROTOCOL_MAKE_FRIEND, 'handle_make_friend', 'parts'),
+        (PROTOCOL_MAKE_FRIEND_CONFIRM, 'handle_make_friend_confirm', 'parts'),
+        
+        # Rooms
+        (PROTOCOL_CREATE_ROOM, 'handle_create_room', 'parts'),
+        (PROTOCOL_VIEW_ROOM_LIST, 'handle_view_room_list', None),
+        (PROTOCOL_QUICK_ROOM, 'handle_quick_room', None),
+        (PROTOCOL_GO_TO_ROOM, 'handle_go_to_room', 'parts'),
+        (PROTOCOL_JOIN_ROOM, 'handle_join_room', 'parts'),
+        (PROTOCOL_CANCEL_ROOM, 'handle_cancel_room', None),
+        (PROTOCOL_LEFT_ROOM, 'handle_left_room', None),
+        
+        # Rank
+        (PROTOCOL_GET_RANK_CHARTS, 'handle_get_rank_charts', 'parts'),
+        
+        # Duel
+        (PROTOCOL_DUEL_REQUEST, 'handle_duel_request', 'parts'),
+        (PROTOCOL_AGREE_DUEL, 'handle_agree_duel', 'parts'),
+        (PROTOCOL_DISAGREE_DUEL, 'handle_disagree_duel', 'parts'),
+        
+        # Voice
+        (PROTOCOL_VOICE_MESSAGE, 'handle_voice_message', 'message'),
+    )
+    
+    # Messages a slow client may miss without breaking its game state
+    DROPPABLE_COMMANDS = frozenset((PROTOCOL_CHAT_SERVER, PROTOCOL_CHAT, PROTOCOL_VOICE_MESSAGE))
+    
     def __init__(self, client_socket, client_number, server_thread_bus, admin=None):
         """
         Initialize server thread
@@ -27,12 +80,18 @@ class ServerThread(threading.Thread):
         self.client_socket = client_socket
         self.client_number = client_number
         self.server_thread_bus = server_thread_bus
+        self.room_registry = server_thread_bus.room_registry
         self.admin = admin
         
         self.user = None
         self.room = None
         self.is_closed = False
+        # Held while handling a message, so other threads (the matchmaker)
+        # change the room of the connection between two messages only
+        self.lock = threading.RLock()
         self.user_dao = UserDAO()
+        self.dispatcher = self.get_dispatcher()
+        self.outbound = self.create_outbound_queue()
         
         # Get client IP
         try:
@@ -50,7 +109,10 @@ class ServerThread(threading.Thread):
         return self.user
     
     def set_user(self, user):
+        """Set the logged-in user and update the bus user index"""
+        old_user = self.user
         self.user = user
+        self.server_thread_bus.update_user(self, old_user, user)
     
     def get_room(self):
         return self.room
@@ -58,6 +120,32 @@ class ServerThread(threading.Thread):
     def set_room(self, room):
         self.room = room
     
+    def get_rating(self):
+        """Matchmaking rating of the logged-in user, from current stats"""
+        user = self.user_dao.get_user_by_id(self.user.get_id()) or self.user
+        return calculate_mark(user.get_number_of_game(), user.get_number_of_win())
+    
+    def enter_room(self, room):
+        """
+        Enter a room whose free seat was taken for this player
+        
+        Args:
+            room: Joined Room
+        """
+        if self.room is not room:
+            self.release_room()
+        self.room = room
+        log(f"Joined room {room.get_id()}")
+        room.increase_number_of_game()
+        self.go_to_partner_room()
+        self.user_dao.update_to_playing(self.user.get_id())
+    
+    def release_room(self):
+        """Close the current room in the registry and leave it"""
+        if self.room:
+            self.room_registry.close(self.room)
+            self.room = None
+    
     def get_client_ip(self):
         return self.client_ip
     
@@ -129,18 +217,24 @@ class ServerThread(threading.Thread):
             # Send client ID
             self.write(create_message(PROTOCOL_SERVER_SEND_ID, self.client_number))
             
-            # Main message loop
+            # Main message loop: one recv may hold several messages or part of one
+            decoder = LineDecoder()
+            receive_buffer = bytearray(BUFFER_SIZE)
+            receive_view = memoryview(receive_buffer)
             while not self.is_closed:
                 try:
-                    message = self.client_socket.recv(BUFFER_SIZE).decode(ENCODING).strip()
-                    if not message:
+                    size = self.client_socket.recv_into(receive_buffer)
+                    if not size:
                         break
                     
-                    # Handle message
-                    self.handle_message(message)
+                    for message in decoder.feed(receive_view[:size]):
+                        self.handle_message(message)
                 
                 except socket.timeout:
                     continue
+                except FrameTooLarge as e:
+                    log(f"Client {self.client_number} sent an oversized message: {e}", "WARNING")
+                    break
                 except Exception as e:
                     log(f"Client {self.client_number} receive error: {e}", "ERROR")
                     break
@@ -159,101 +253,8 @@ class ServerThread(threading.Thread):
             message: Message string from client
         """
         try:
-            parts = message.split(',')
-            if not parts:
-                return
-            
-            command = parts[0]
-            
-            # Login/Register
-            if command == PROTOCOL_CLIENT_VERIFY:
-                self.handle_login(parts)
-            
-            elif command == PROTOCOL_REGISTER:
-                self.handle_register(parts)
-            
-            elif command == PROTOCOL_OFFLINE:
-                self.handle_offline(parts)
-            
-            # Friends
-            elif command == PROTOCOL_VIEW_FRIEND_LIST:
-                self.handle_view_friend_list()
-            
-            elif command == PROTOCOL_CHECK_FRIEND:
-                self.handle_check_friend(parts)
-            
-            elif command == PROTOCOL_MAKE_FRIEND:
-                self.handle_make_friend(parts)
-            
-            elif command == PROTOCOL_MAKE_FRIEND_CONFIRM:
-                self.handle_make_friend_confirm(parts)
-            
-            # Rooms
-            elif command == PROTOCOL_CREATE_ROOM:
-                self.handle_create_room(parts)
-            
-            elif command == PROTOCOL_VIEW_ROOM_LIST:
-                self.handle_view_room_list()
-            
-            elif command == PROTOCOL_QUICK_ROOM:
-                self.handle_quick_room()
-            
-            elif command == PROTOCOL_GO_TO_ROOM:
-                self.handle_go_to_room(parts)
-            
-            elif command == PROTOCOL_JOIN_ROOM:
-                self.handle_join_room(parts)
-            
-            elif command == PROTOCOL_CANCEL_ROOM:
-                self.handle_cancel_room()
-            
-            # Game
-            elif command == PROTOCOL_CARO:
-                self.handle_caro(message)
-            
-            elif command == PROTOCOL_WIN:
-                self.handle_win(parts)
-            
-            elif command == PROTOCOL_LOSE:
-                self.handle_lose()
-            
-            elif command == PROTOCOL_DRAW_REQUEST:
-                self.handle_draw_request(message)
-            
-            elif command == PROTOCOL_DRAW_CONFIRM:
-                self.handle_draw_confirm()
-            
-            elif command == PROTOCOL_DRAW_REFUSE:
-                self.handle_draw_refuse()
-            
-            # Chat
-            elif command == PROTOCOL_CHAT_SERVER:
-                self.handle_chat_server(parts)
-            
-            elif command == PROTOCOL_CHAT:
-                self.handle_chat(message)
-            
-            # Rank
-            elif command == PROTOCOL_GET_RANK_CHARTS:
-                self.handle_get_rank_charts()
-            
-            # Duel
-            elif command == PROTOCOL_DUEL_REQUEST:
-                self.handle_duel_request(parts)
-            
-            elif command == PROTOCOL_AGREE_DUEL:
-                self.handle_agree_duel(parts)
-            
-            elif command == PROTOCOL_DISAGREE_DUEL:
-                self.handle_disagree_duel(parts)
-            
-            # Voice
-            elif command == PROTOCOL_VOICE_MESSAGE:
-                self.handle_voice_message(message)
-            
-            # Leave room
-            elif command == PROTOCOL_LEFT_ROOM:
-                self.handle_left_room()
+            with self.lock:
+                self.dispatcher.dispatch(self, message)
         
         except Exception as e:
             log(f"Handle message error: {e}", "ERROR")
@@ -280,11 +281,7 @@ class ServerThread(threading.Thread):
             log(f"User {username} already online - attempting cleanup", "WARNING")
             
             # Find and close old connection
-            old_thread = None
-            for thread in self.server_thread_bus.get_list_server_threads():
-                if thread.user and thread.user.get_id() == user.get_id():
-                    old_thread = thread
-                    break
+            old_thread = self.server_thread_bus.get_server_thread_by_user_id(user.get_id())
             
             if old_thread:
                 log(f"Forcing disconnect of old connection for {username}")
@@ -298,7 +295,7 @@ class ServerThread(threading.Thread):
             
             # Allow new login
             self.write(create_message(PROTOCOL_LOGIN_SUCCESS, self.get_string_from_user(user)))
-            self.user = user
+            self.set_user(user)
             self.user_dao.update_to_online(self.user.get_id())
             self.server_thread_bus.broadcast(
                 self.client_number,
@@ -310,7 +307,7 @@ class ServerThread(threading.Thread):
         else:
             # Normal login
             self.write(create_message(PROTOCOL_LOGIN_SUCCESS, self.get_string_from_user(user)))
-            self.user = user
+            self.set_user(user)
             self.user_dao.update_to_online(self.user.get_id())
             self.server_thread_bus.broadcast(
                 self.client_number,
@@ -335,7 +332,7 @@ class ServerThread(threading.Thread):
             self.user_dao.add_user(username, password, nickname, avatar)
             user = self.user_dao.verify_user(username, password)
             if user:
-                self.user = user
+                self.set_user(user)
                 self.user_dao.update_to_online(self.user.get_id())
                 self.server_thread_bus.broadcast(
                     self.client_number,
@@ -353,7 +350,7 @@ class ServerThread(threading.Thread):
                 self.client_number,
                 create_message(PROTOCOL_CHAT_SERVER, f"{self.user.get_nickname()} đã offline")
             )
-            self.user = None
+            self.set_user(None)
     
     def handle_view_friend_list(self):
         """Send friend list to client"""
@@ -409,14 +406,15 @@ class ServerThread(threading.Thread):
         if not self.user:
             return
         
-        self.room = Room(self)
+        self.release_room()
         
         if len(parts) >= 2:
             password = parts[1]
-            self.room.set_password(password)
+            self.room = self.room_registry.create(self, password)
             self.write(create_message(PROTOCOL_YOUR_CREATED_ROOM, self.room.get_id(), password))
             log(f"Room {self.room.get_id()} created with password")
         else:
+            self.room = self.room_registry.create(self)
             self.write(create_message(PROTOCOL_YOUR_CREATED_ROOM, self.room.get_id()))
             log(f"Room {self.room.get_id()} created without password")
         
@@ -425,18 +423,9 @@ class ServerThread(threading.Thread):
     def handle_view_room_list(self):
         """Send list of available rooms"""
         result = [PROTOCOL_ROOM_LIST]
-        count = 0
         
-        for thread in self.server_thread_bus.get_list_server_threads():
-            if count >= 8:
-                break
-            
-            if thread.get_room() and thread.get_room().get_number_of_user() == 1:
-                result.extend([
-                    str(thread.get_room().get_id()),
-                    thread.get_room().get_password()
-                ])
-                count += 1
+        for room in self.room_registry.list_waiting(8):
+            result.extend([str(room.get_id()), room.get_password()])
         
         self.write(create_message(*result))
     
@@ -445,24 +434,19 @@ class ServerThread(threading.Thread):
         if not self.user:
             return
         
-        found = False
-        
-        # Try to find existing room
-        for thread in self.server_thread_bus.get_list_server_threads():
-            room = thread.get_room()
-            if room and room.get_number_of_user() == 1 and room.get_password() == " ":
-                thread.get_room().set_user2(self)
-                self.room = thread.get_room()
-                self.room.increase_number_of_game()
-                log(f"Quick joined room {self.room.get_id()}")
-                self.go_to_partner_room()
-                self.user_dao.update_to_playing(self.user.get_id())
-                found = True
-                break
-        
-        # Create new room if not found
-        if not found:
-            self.room = Room(self)
+        self.release_room()
+        
+        # Try to find an opponent of similar rating already waiting
+        matchmaker = self.server_thread_bus.matchmaker
+        rating = self.get_rating()
+        room = matchmaker.find_match(self, rating)
+        if room:
+            self.enter_room(room)
+        
+        # Create new room if not found and wait in the queue
+        else:
+            self.room = self.room_registry.create(self)
+            matchmaker.enqueue(self, self.room, rating)
             self.user_dao.update_to_playing(self.user.get_id())
             log(f"Quick created room {self.room.get_id()} - waiting for opponent...")
             # Send created room notification
@@ -475,30 +459,23 @@ class ServerThread(threading.Thread):
         
         room_id = int(parts[1])
         password = parts[2] if len(parts) >= 3 else ""
-        found = False
-        
-        for thread in self.server_thread_bus.get_list_server_threads():
-            room = thread.get_room()
-            if room and room.get_id() == room_id:
-                found = True
-                
-                if room.get_number_of_user() == 2:
-                    self.write(create_message(PROTOCOL_ROOM_FULLY))
-                
-                elif room.get_password() == " " or room.get_password() == password:
-                    self.room = room
-                    room.set_user2(self)
-                    room.increase_number_of_game()
-                    self.user_dao.update_to_playing(self.user.get_id())
-                    self.go_to_partner_room()
-                
-                else:
-                    self.write(create_message(PROTOCOL_ROOM_WRONG_PASSWORD))
-                
-                break
+        room = self.room_registry.get(room_id)
         
-        if not found:
+        if room is None:
             self.write(create_message(PROTOCOL_ROOM_NOT_FOUND))
+        
+        elif room.get_number_of_user() == 2:
+            self.write(create_message(PROTOCOL_ROOM_FULLY))
+        
+        elif room.get_password() != " " and room.get_password() != password:
+            self.write(create_message(PROTOCOL_ROOM_WRONG_PASSWORD))
+        
+        elif room.get_user1() is self or not self.room_registry.try_join(room, self):
+            # Own room, or taken by another player since the checks above
+            self.write(create_message(PROTOCOL_ROOM_FULLY))
+        
+        else:
+            self.enter_room(room)
     
     def handle_join_room(self, parts):
         """Join room by ID"""
@@ -506,49 +483,55 @@ class ServerThread(threading.Thread):
             return
         
         room_id = int(parts[1])
+        room = self.room_registry.get(room_id)
         
-        for thread in self.server_thread_bus.get_list_server_threads():
-            room = thread.get_room()
-            if room and room.get_id() == room_id:
-                thread.get_room().set_user2(self)
-                self.room = thread.get_room()
-                log(f"Joined room {self.room.get_id()}")
-                self.room.increase_number_of_game()
-                self.go_to_partner_room()
-                self.user_dao.update_to_playing(self.user.get_id())
-                break
+        if room and room.get_user1() is not self and self.room_registry.try_join(room, self):
+            self.enter_room(room)
     
     def handle_cancel_room(self):
         """Cancel waiting room"""
         if self.user:
             self.user_dao.update_to_not_playing(self.user.get_id())
             log("Room cancelled")
-            self.room = None
+            self.release_room()
     
-    def handle_caro(self, message):
-        """Handle game move"""
-        if self.room:
-            competitor = self.room.get_competitor(self.client_number)
-            if competitor:
-                competitor.write(message)
-    
-    def handle_win(self, parts):
-        """Handle win condition"""
-        if not self.room:
+    def handle_caro(self, parts):
+        """Validate a game move and forward it to the competitor"""
+        if not self.room or len(parts) < 3:
             return
         
-        self.user_dao.add_win_game(self.user.get_id())
-        self.room.increase_number_of_game()
+        try:
+            x, y = int(parts[1]), int(parts[2])
+        except ValueError:
+            x = y = -1
+        
+        result = self.room.play_move(self, x, y)
+        if result == MOVE_INVALID:
+            log(f"Client {self.client_number}: rejected move ({parts[1]}, {parts[2]}) in room {self.room.get_id()}", "WARNING")
+            return
         
         competitor = self.room.get_competitor(self.client_number)
-        if competitor and len(parts) >= 3:
-            competitor.write(create_message(PROTOCOL_CARO, parts[1], parts[2]))
+        if competitor:
+            competitor.write(create_message(PROTOCOL_CARO, x, y))
         
-        self.room.broadcast(create_message(PROTOCOL_NEW_GAME))
+        # The server credits and announces the end of a game (the room has
+        # already started the next one)
+        if result == MOVE_WIN:
+            self.user_dao.add_win_game(self.user.get_id())
+            self.room.increase_number_of_game()
+            self.room.broadcast(create_message(PROTOCOL_NEW_GAME))
+        elif result == MOVE_DRAW:
+            self.room.increase_number_of_draw()
+            self.room.increase_number_of_game()
+            self.room.broadcast(create_message(PROTOCOL_DRAW_GAME))
+    
+    def handle_win(self):
+        """Win claim of a client: ignored, wins are credited by handle_caro"""
+        pass
     
     def handle_lose(self):
         """Handle lose/timeout"""
-        if not self.room:
+        if not self.room or not self.room.resign(self):
             return
         
         competitor = self.room.get_competitor(self.client_number)
@@ -561,14 +544,14 @@ class ServerThread(threading.Thread):
     
     def handle_draw_request(self, message):
         """Forward draw request to competitor"""
-        if self.room:
+        if self.room and self.room.offer_draw(self):
             competitor = self.room.get_competitor(self.client_number)
             if competitor:
                 competitor.write(message)
     
     def handle_draw_confirm(self):
-        """Confirm draw game"""
-        if self.room:
+        """Confirm draw game (only after a draw request of the competitor)"""
+        if self.room and self.room.accept_draw(self):
             self.room.increase_number_of_draw()
             self.room.increase_number_of_game()
             self.room.broadcast(create_message(PROTOCOL_DRAW_GAME))
@@ -576,6 +559,7 @@ class ServerThread(threading.Thread):
     def handle_draw_refuse(self):
         """Refuse draw request"""
         if self.room:
+            self.room.refuse_draw()
             competitor = self.room.get_competitor(self.client_number)
             if competitor:
                 competitor.write(create_message(PROTOCOL_DRAW_REFUSE))
@@ -598,15 +582,10 @@ class ServerThread(threading.Thread):
             if competitor:
                 competitor.write(message)
     
-    def handle_get_rank_charts(self):
-        """Send ranking list"""
-        users = self.user_dao.get_user_static_rank()
-        result = [PROTOCOL_RETURN_GET_RANK_CHARTS]
-        
-        for user in users:
-            result.append(self.get_string_from_user(user))
-        
-        self.write(','.join(result))
+    def handle_get_rank_charts(self, parts):
+        """Send ranking list (or not-modified for the client's cached version)"""
+        client_version = parts[1] if len(parts) > 1 else None
+        self.write(self.server_thread_bus.rank_chart.get_response(client_version))
     
     def handle_duel_request(self, parts):
         """Send duel request to friend"""
@@ -624,12 +603,13 @@ class ServerThread(threading.Thread):
         if len(parts) < 2 or not self.user:
             return
         
-        self.room = Room(self)
         user2_id = int(parts[1])
         user2_thread = self.server_thread_bus.get_server_thread_by_user_id(user2_id)
         
         if user2_thread:
-            self.room.set_user2(user2_thread)
+            self.release_room()
+            user2_thread.release_room()
+            self.room = self.room_registry.create(self, user2_thread=user2_thread)
             user2_thread.set_room(self.room)
             self.room.increase_number_of_game()
             self.go_to_own_room()
@@ -661,22 +641,75 @@ class ServerThread(threading.Thread):
                 competitor.write(create_message(PROTOCOL_LEFT_ROOM))
                 competitor.set_room(None)
             
-            self.room = None
+            self.release_room()
+    
+    def create_outbound_queue(self):
+        """Create the send queue of the connection"""
+        return OutboundQueue(
+            self.client_socket.sendall,
+            on_close=self.close_socket,
+            on_overflow=self.disconnect_slow_consumer,
+            name=f"ClientWriter-{self.client_number}",
+            policy=Config.SLOW_CONSUMER_POLICY
+        )
     
     def write(self, message):
         """
-        Send message to client
+        Queue message for the client (never blocks on a slow client)
+        
+        Args:
+            message: Message string
+        """
+        self.write_encoded(encode_line(message), self.is_droppable(message))
+    
+    def write_encoded(self, data, droppable=False):
+        """
+        Queue an already encoded message for the client
+        
+        Args:
+            data: Message bytes (see encode_line)
+            droppable: Whether a slow client may miss the message
+        """
+        self.outbound.put(data, droppable)
+    
+    @classmethod
+    def is_droppable(cls, message):
+        """Whether a slow client may miss this message"""
+        return message.partition(',')[0] in cls.DROPPABLE_COMMANDS
+    
+    @classmethod
+    def fan_out(cls, threads, message):
+        """
+        Send one message to many connections, encoded once
         
         Args:
+            threads: Sequence of connections of this class
             message: Message string
         """
+        data = encode_line(message)
+        droppable = cls.is_droppable(message)
+        for thread in threads:
+            try:
+                thread.write_encoded(data, droppable)
+            except Exception as e:
+                log(f"Broadcast error to client {thread.get_client_number()}: {e}", "ERROR")
+    
+    def disconnect_slow_consumer(self):
+        """Drop a client that does not read its messages fast enough"""
+        log(f"Client {self.client_number} is not reading, disconnecting", "WARNING")
         try:
-            self.client_socket.send((message + '\n').encode(ENCODING))
-        except Exception as e:
-            log(f"Write error to client {self.client_number}: {e}", "ERROR")
+            # Wakes the receive loop, which then runs cleanup()
+            self.client_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
     
     def cleanup(self):
         """Cleanup on disconnect"""
+        with self.lock:
+            self._cleanup()
+    
+    def _cleanup(self):
+        """Cleanup on disconnect (lock held)"""
         self.is_closed = True
         
         # Update user status in database
@@ -706,6 +739,7 @@ class ServerThread(threading.Thread):
                     self.room.decrease_number_of_game()
                     competitor.write(create_message(PROTOCOL_LEFT_ROOM))
                     competitor.set_room(None)
+                self.release_room()
             except Exception as e:
                 log(f"Room cleanup error: {e}", "ERROR")
         
@@ -715,10 +749,17 @@ class ServerThread(threading.Thread):
         except Exception as e:
             log(f"Bus removal error: {e}", "ERROR")
         
-        # Close socket
+        self.close_connection()
+        
+        log(f"Client {self.client_number} disconnected and cleaned up")
+    
+    def close_connection(self):
+        """Close the client socket once the queued messages are sent"""
+        self.outbound.close()
+    
+    def close_socket(self):
+        """Close the client socket"""
         try:
             self.client_socket.close()
         except:
             pass
-        
-        log(f"Client {self.client_number} disconnected and cleaned up")
@@ -2,64 +2,125 @@
 Server thread bus - manages all server threads
 """
 
+import time
 from threading import Lock
+from server.controller.room_registry import RoomRegistry
+from server.controller.matchmaker import Matchmaker
+from server.controller.rank_chart import RankChartCache
+from shared.dispatch import CommandStats
 from shared.utils import log
 
 class ServerThreadBus:
     """Manages all active server threads"""
     
     def __init__(self):
-        self.list_server_threads = []
+        self.threads = {}  # client number -> thread, in connection order
+        self.threads_by_user = {}  # user id -> thread of the logged-in user
         self.lock = Lock()
+        self.room_registry = RoomRegistry()
+        self.matchmaker = Matchmaker(self.room_registry, on_match=self.on_match)
+        self.rank_chart = RankChartCache()
+        
+        # Recipient tuple for broadcasts, rebuilt after the first change
+        self.snapshot = ()
+        # Fan-out latency per broadcast command
+        self.broadcast_stats = CommandStats()
     
     def add(self, server_thread):
         """Add server thread to bus"""
         with self.lock:
-            self.list_server_threads.append(server_thread)
-            log(f"Added thread {server_thread.get_client_number()}, total: {len(self.list_server_threads)}")
+            self.threads[server_thread.get_client_number()] = server_thread
+            self.snapshot = None
+            log(f"Added thread {server_thread.get_client_number()}, total: {len(self.threads)}")
     
     def remove(self, client_number):
         """Remove server thread by client number"""
         with self.lock:
-            self.list_server_threads = [
-                t for t in self.list_server_threads 
-                if t.get_client_number() != client_number
-            ]
-            log(f"Removed thread {client_number}, remaining: {len(self.list_server_threads)}")
+            thread = self.threads.pop(client_number, None)
+            self.snapshot = None
+            if thread is not None and thread.get_user():
+                self._unbind_user(thread, thread.get_user().get_id())
+            log(f"Removed thread {client_number}, remaining: {len(self.threads)}")
+    
+    def update_user(self, server_thread, old_user, new_user):
+        """
+        Move a thread in the user index after login or logout
+        
+        Args:
+            server_thread: Thread whose user changed
+            old_user: Previous User or None
+            new_user: New User or None
+        """
+        with self.lock:
+            if old_user is not None:
+                self._unbind_user(server_thread, old_user.get_id())
+            if new_user is not None and server_thread.get_client_number() in self.threads:
+                self.threads_by_user[new_user.get_id()] = server_thread
+    
+    def _unbind_user(self, server_thread, user_id):
+        """Drop a user index entry if it still points to the thread (lock held)"""
+        if self.threads_by_user.get(user_id) is server_thread:
+            del self.threads_by_user[user_id]
+    
+    def on_match(self, ticket, partner):
+        """Matchmaker callback: move a paired player into the room of the opponent"""
+        # Runs on the matchmaker thread: lock both connections (lowest
+        # client number first), so neither cancels, leaves or disconnects
+        # between the seat check and the move
+        first, second = sorted((ticket.server_thread, partner.server_thread),
+                               key=lambda thread: thread.get_client_number())
+        with first.lock, second.lock:
+            if self.matchmaker.seat(ticket, partner):
+                partner.server_thread.enter_room(ticket.room)
     
     def get_length(self):
         """Get number of active threads"""
-        with self.lock:
-            return len(self.list_server_threads)
+        return len(self.threads)
     
     def get_list_server_threads(self):
         """Get copy of server thread list"""
         with self.lock:
-            return self.list_server_threads.copy()
+            return list(self.threads.values())
+    
+    def get_server_thread(self, client_number):
+        """Get server thread by client number"""
+        return self.threads.get(client_number)
+    
+    def get_snapshot(self):
+        """Get tuple of current threads (shared, must not be modified)"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            with self.lock:
+                if self.snapshot is None:
+                    self.snapshot = tuple(self.threads.values())
+                snapshot = self.snapshot
+        return snapshot
     
     def broadcast(self, client_number, message):
         """
         Broadcast message to all clients except sender
         
+        The bus lock is not held while sending: recipients come from the
+        snapshot and the message is encoded once for all of them.
+        
         Args:
-            client_number: Sender's client number (to exclude)
+            client_number: Sender's client number (to exclude, None for nobody)
             message: Message to broadcast
+        
+        Returns:
+            Number of recipients
         """
-        with self.lock:
-            for thread in self.list_server_threads:
-                if thread.get_client_number() != client_number:
-                    try:
-                        thread.write(message)
-                    except Exception as e:
-                        log(f"Broadcast error to client {thread.get_client_number()}: {e}", "ERROR")
+        start = time.perf_counter()
+        recipients = [thread for thread in self.get_snapshot() if thread.get_client_number() != client_number]
+        if recipients:
+            # All connections of a server share one class
+            type(recipients[0]).fan_out(recipients, message)
+        self.broadcast_stats(message.partition(',')[0], time.perf_counter() - start)
+        return len(recipients)
     
     def get_server_thread_by_user_id(self, user_id):
         """Get server thread by user ID"""
-        with self.lock:
-            for thread in self.list_server_threads:
-                if thread.get_user() and thread.get_user().get_id() == user_id:
-                    return thread
-        return None
+        return self.threads_by_user.get(user_id)
     
     def send_message_to_user_id(self, user_id, message):
         """Send message to specific user by ID"""
@@ -3,6 +3,12 @@ Server DAO package
 """
 
 from .database import Database, get_database
+from .stats_aggregator import StatsAggregator, get_stats_aggregator
+from .leaderboard import Leaderboard, get_leaderboard
+from .presence import PresenceService, get_presence
+from .friend_graph import FriendGraph, get_friend_graph
 from .user_dao import UserDAO
 
-__all__ = ['Database', 'get_database', 'UserDAO']
+__all__ = ['Database', 'get_database', 'StatsAggregator', 'get_stats_aggregator',
+           'Leaderboard', 'get_leaderboard', 'PresenceService', 'get_presence',
+           'FriendGraph', 'get_friend_graph', 'UserDAO']
@@ -4,14 +4,43 @@ Database connection and initialization
 
 import sqlite3
 import os
+import queue
+import threading
+from contextlib import contextmanager
 from shared.utils import log, create_dirs_if_not_exists
+from shared.constants import DB_READER_POOL_SIZE, DB_SYNCHRONOUS, DB_BUSY_TIMEOUT
 
 class Database:
-    """SQLite database manager"""
+    """
+    SQLite database manager
     
-    def __init__(self, db_path="database/caro_game.db"):
+    The database runs in WAL mode, so readers never wait for the writer.
+    All writes go through one connection serialised by a lock; queries
+    borrow a read-only connection from a bounded pool, so lobby reads
+    from many client threads run side by side.
+    """
+    
+    def __init__(self, db_path="database/caro_game.db", pool_size=DB_READER_POOL_SIZE,
+                 synchronous=DB_SYNCHRONOUS):
+        """
+        Initialize database manager (connections open on first use)
+        
+        Args:
+            db_path: SQLite file path
+            pool_size: Most read-only connections open at once
+            synchronous: SQLite synchronous setting of the connections
+        """
         self.db_path = db_path
-        self.connection = None
+        self.pool_size = pool_size
+        self.synchronous = synchronous
+        self.connection = None  # writer connection
+        self.write_lock = threading.RLock()
+        self.local = threading.local()  # last_insert_id of each thread
+        
+        # Idle reader connections, most recently used first
+        self.readers = queue.LifoQueue()
+        self.reader_count = 0
+        self.reader_lock = threading.Lock()
         self._ensure_database_exists()
     
     def _ensure_database_exists(self):
@@ -20,29 +49,93 @@ class Database:
         if db_dir:
             create_dirs_if_not_exists(db_dir)
     
+    def _open(self, read_only=False):
+        """Open a tuned connection usable from any thread"""
+        conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        if read_only:
+            # Autocommit: a reader never holds a transaction (and its snapshot) open
+            conn.isolation_level = None
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+    
     def connect(self):
-        """Connect to database"""
-        try:
-            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.connection.row_factory = sqlite3.Row
-            log(f"Connected to database: {self.db_path}")
-            return self.connection
-        except sqlite3.Error as e:
-            log(f"Database connection error: {e}", "ERROR")
-            return None
+        """Connect the writer to the database and switch it to WAL mode"""
+        with self.write_lock:
+            try:
+                self.connection = self._open()
+                mode = self.connection.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+                if mode.lower() != "wal":
+                    log(f"WAL mode not available, journal mode is {mode}", "WARNING")
+                log(f"Connected to database: {self.db_path}")
+                return self.connection
+            except sqlite3.Error as e:
+                log(f"Database connection error: {e}", "ERROR")
+                self.connection = None
+                return None
     
     def disconnect(self):
-        """Disconnect from database"""
-        if self.connection:
-            self.connection.close()
-            log("Disconnected from database")
+        """Disconnect from database (writer and idle readers)"""
+        with self.reader_lock:
+            while True:
+                try:
+                    self.readers.get_nowait().close()
+                except queue.Empty:
+                    break
+                self.reader_count -= 1
+        
+        with self.write_lock:
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+                log("Disconnected from database")
     
     def get_connection(self):
-        """Get database connection, create if not exists"""
+        """Get the writer connection, create if not exists"""
         if self.connection is None:
-            self.connect()
+            with self.write_lock:
+                if self.connection is None:
+                    self.connect()
         return self.connection
     
+    @contextmanager
+    def reader(self):
+        """
+        Borrow a read-only connection from the pool
+        
+        Waits for a connection to be returned when pool_size are in use.
+        
+        Yields:
+            sqlite3.Connection, or None if it cannot be opened
+        """
+        # The writer sets up WAL mode before the first reader opens
+        self.get_connection()
+        
+        conn = None
+        try:
+            conn = self.readers.get_nowait()
+        except queue.Empty:
+            with self.reader_lock:
+                create = self.reader_count < self.pool_size
+                if create:
+                    self.reader_count += 1
+            if create:
+                try:
+                    conn = self._open(read_only=True)
+                except sqlite3.Error as e:
+                    log(f"Database reader connection error: {e}", "ERROR")
+                    with self.reader_lock:
+                        self.reader_count -= 1
+            else:
+                conn = self.readers.get()
+        
+        try:
+            yield conn
+        finally:
+            if conn is not None:
+                self.readers.put(conn)
+    
     def init_database(self):
         """Initialize database with schema from SQL file"""
         conn = self.get_connection()
@@ -50,6 +143,11 @@ class Database:
             log("Cannot initialize database: connection failed", "ERROR")
             return False
         
+        with self.write_lock:
+            return self._run_script(conn)
+    
+    def _run_script(self, conn):
+        """Run the schema script on the writer connection (lock held)"""
         try:
             # Read SQL file
             sql_file = "database/init_database.sql"
@@ -85,22 +183,65 @@ class Database:
         Returns:
             True if successful, False otherwise
         """
+        return self.execute_insert(query, params) is not None
+    
+    def execute_insert(self, query, params=None):
+        """
+        Execute a write query and get the row ID it inserted
+        
+        Args:
+            query: SQL query string
+            params: Query parameters (tuple or dict)
+        
+        Returns:
+            Row ID of the last row inserted by this query (0 if it inserted
+            none), or None on failure
+        """
         conn = self.get_connection()
         if conn is None:
-            return False
+            return None
         
-        try:
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            conn.commit()
-            return True
-        except sqlite3.Error as e:
-            log(f"Query execution error: {e}", "ERROR")
-            log(f"Query: {query}", "ERROR")
+        with self.write_lock:
+            try:
+                cursor = conn.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                conn.commit()
+                row_id = cursor.lastrowid or 0
+                self.local.last_insert_id = row_id
+                return row_id
+            except sqlite3.Error as e:
+                conn.rollback()
+                log(f"Query execution error: {e}", "ERROR")
+                log(f"Query: {query}", "ERROR")
+                return None
+    
+    def execute_batch(self, query, params_list):
+        """
+        Execute a query once per parameter set in a single transaction
+        
+        Args:
+            query: SQL query string
+            params_list: Sequence of query parameters
+        
+        Returns:
+            True if all were committed, False otherwise (nothing applied)
+        """
+        conn = self.get_connection()
+        if conn is None:
             return False
+        
+        with self.write_lock:
+            try:
+                with conn:
+                    conn.executemany(query, params_list)
+                return True
+            except sqlite3.Error as e:
+                log(f"Batch execution error: {e}", "ERROR")
+                log(f"Query: {query}", "ERROR")
+                return False
     
     def fetch_one(self, query, params=None):
         """
@@ -113,20 +254,23 @@ class Database:
         Returns:
             Single row result or None
         """
-        conn = self.get_connection()
-        if conn is None:
-            return None
-        
-        try:
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            return cursor.fetchone()
-        except sqlite3.Error as e:
-            log(f"Fetch one error: {e}", "ERROR")
-            return None
+        with self.reader() as conn:
+            if conn is None:
+                return None
+            
+            try:
+                cursor = conn.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                row = cursor.fetchone()
+                # Finish the statement so the connection holds no read snapshot
+                cursor.close()
+                return row
+            except sqlite3.Error as e:
+                log(f"Fetch one error: {e}", "ERROR")
+                return None
     
     def fetch_all(self, query, params=None):
         """
@@ -139,33 +283,24 @@ class Database:
         Returns:
             List of rows or empty list
         """
-        conn = self.get_connection()
-        if conn is None:
-            return []
-        
-        try:
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            return cursor.fetchall()
-        except sqlite3.Error as e:
-            log(f"Fetch all error: {e}", "ERROR")
-            return []
+        with self.reader() as conn:
+            if conn is None:
+                return []
+            
+            try:
+                cursor = conn.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                return cursor.fetchall()
+            except sqlite3.Error as e:
+                log(f"Fetch all error: {e}", "ERROR")
+                return []
     
     def get_last_insert_id(self):
-        """Get last inserted row ID"""
-        conn = self.get_connection()
-        if conn is None:
-            return None
-        
-        try:
-            cursor = conn.cursor()
-            return cursor.lastrowid
-        except sqlite3.Error as e:
-            log(f"Get last insert ID error: {e}", "ERROR")
-            return None
+        """Get row ID inserted by the last execute_query() of the calling thread"""
+        return getattr(self.local, 'last_insert_id', None)
 
 
 # Global database instance
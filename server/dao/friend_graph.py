@@ -0,0 +1,151 @@
+"""
+Friend graph - cached adjacency sets of the friend table
+"""
+
+import threading
+from collections import OrderedDict
+from server.dao.database import get_database
+from shared.constants import FRIEND_CACHE_SIZE, FRIEND_NICKNAME_CACHE_SIZE
+
+FRIENDS_QUERY = """
+    SELECT user.ID, user.Nickname FROM friend JOIN user ON user.ID = friend.ID_User2
+    WHERE friend.ID_User1 = ?
+    UNION
+    SELECT user.ID, user.Nickname FROM friend JOIN user ON user.ID = friend.ID_User1
+    WHERE friend.ID_User2 = ?
+"""
+
+class FriendGraph:
+    """
+    Friends of each user, loaded from the database on first use
+
+    A user's friend set is read with one query the first time it is
+    needed and then kept up to date by add_friendship, so friend lists
+    and friendship checks cost no query afterwards. Nicknames of the
+    friends are cached with them (they never change). Both caches drop
+    their least recently used entries beyond their size limits, and
+    UserDAO drops the set of a user going offline.
+    """
+
+    def __init__(self, db, capacity=FRIEND_CACHE_SIZE, nickname_capacity=FRIEND_NICKNAME_CACHE_SIZE):
+        """
+        Initialize graph
+
+        Args:
+            db: Database holding the friend table
+            capacity: Most friend sets kept
+            nickname_capacity: Most nicknames kept
+        """
+        self.db = db
+        self.capacity = capacity
+        self.nickname_capacity = nickname_capacity
+        self.lock = threading.Lock()
+        self.adjacency = OrderedDict()  # user id -> set of friend ids, least recently used first
+        self.nicknames = OrderedDict()  # user id -> nickname, least recently used first
+        self.changes = 0  # friendships added, to detect stale loads
+
+        # Statistics
+        self.loads = 0
+
+    def _cache_nickname(self, user_id, nickname):
+        """Store a nickname, dropping the least recently used (lock held)"""
+        self.nicknames[user_id] = nickname
+        self.nicknames.move_to_end(user_id)
+        while len(self.nicknames) > self.nickname_capacity:
+            self.nicknames.popitem(last=False)
+
+    def get_friends(self, user_id):
+        """
+        Friends of a user
+
+        Returns:
+            Frozenset of friend IDs
+        """
+        with self.lock:
+            friends = self.adjacency.get(user_id)
+            if friends is not None:
+                self.adjacency.move_to_end(user_id)
+                return frozenset(friends)
+
+        while True:
+            with self.lock:
+                changes = self.changes
+            rows = self.db.fetch_all(FRIENDS_QUERY, (user_id, user_id))
+            with self.lock:
+                if user_id in self.adjacency:
+                    return frozenset(self.adjacency[user_id])
+                # A friendship added during the query may be missing from it
+                if self.changes != changes:
+                    continue
+                friends = set()
+                for row in rows:
+                    friends.add(row['ID'])
+                    self._cache_nickname(row['ID'], row['Nickname'])
+                self.adjacency[user_id] = friends
+                while len(self.adjacency) > self.capacity:
+                    self.adjacency.popitem(last=False)
+                self.loads += 1
+                return frozenset(friends)
+
+    def get_nickname(self, user_id):
+        """Cached nickname of a friend, or None"""
+        with self.lock:
+            nickname = self.nicknames.get(user_id)
+            if nickname is not None:
+                self.nicknames.move_to_end(user_id)
+            return nickname
+
+    def set_nickname(self, user_id, nickname):
+        """Cache the nickname of a user"""
+        with self.lock:
+            self._cache_nickname(user_id, nickname)
+
+    def is_friend(self, user_id1, user_id2):
+        """Whether two users are friends"""
+        return user_id2 in self.get_friends(user_id1)
+
+    def add_friendship(self, user_id1, user_id2):
+        """Record a friendship stored in the database"""
+        with self.lock:
+            self.changes += 1
+            for user_id, friend_id in ((user_id1, user_id2), (user_id2, user_id1)):
+                friends = self.adjacency.get(user_id)
+                if friends is not None:
+                    friends.add(friend_id)
+
+    def invalidate(self, user_id=None):
+        """
+        Drop cached friend sets so they are read again
+
+        Args:
+            user_id: User whose set is dropped, None for all
+        """
+        with self.lock:
+            if user_id is None:
+                self.adjacency.clear()
+            else:
+                self.adjacency.pop(user_id, None)
+
+    def get_stats(self):
+        """
+        Get cache metrics
+
+        Returns:
+            Dict with cached users and friend set loads
+        """
+        with self.lock:
+            return {'cached': len(self.adjacency), 'loads': self.loads}
+
+
+# Global friend graph instance
+_friend_graph_instance = None
+_friend_graph_lock = threading.Lock()
+
+def get_friend_graph():
+    """Get global friend graph"""
+    global _friend_graph_instance
+    if _friend_graph_instance is None:
+        with _friend_graph_lock:
+            if _friend_graph_instance is None:
+                _friend_graph_instance = FriendGraph(get_database())
+    return _friend_graph_instance
@@ -0,0 +1,311 @@
+"""
+Leaderboard - in-memory rank ordering of players by wins
+"""
+
+import threading
+from bisect import bisect_left, insort
+from server.dao.database import get_database
+
+
+class FenwickTree:
+    """Prefix sums over counts indexed 0..size-1, growing on demand"""
+
+    def __init__(self, size=64):
+        self.tree = [0] * (size + 1)
+
+    def _grow(self, index):
+        """Rebuild with room for index (doubling the size)"""
+        counts = [self.range_sum(i) for i in range(len(self.tree) - 1)]
+        size = len(self.tree) - 1
+        while size <= index:
+            size *= 2
+        self.tree = [0] * (size + 1)
+        for i, count in enumerate(counts):
+            if count:
+                self.add(i, count)
+
+    def add(self, index, delta):
+        """Add delta to the count at index"""
+        if index >= len(self.tree) - 1:
+            self._grow(index)
+        i = index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index):
+        """Sum of the counts at 0..index"""
+        i = min(index + 1, len(self.tree) - 1)
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def range_sum(self, index):
+        """Count at index"""
+        return self.prefix(index) - (self.prefix(index - 1) if index > 0 else 0)
+
+
+class ChunkedSortedList:
+    """
+    Sorted list stored as a list of sorted chunks
+
+    A chunk is found by bisecting the chunk maximums, so an insert or
+    delete costs O(log N) comparisons and moves at most 2 * load entries
+    inside its chunk (a split or an emptied chunk also shifts the chunk
+    index, N / load entries, rarely).
+    """
+
+    def __init__(self, load=256):
+        """
+        Initialize list
+
+        Args:
+            load: Chunk size after a split (chunks hold up to 2 * load)
+        """
+        self.load = load
+        self.chunks = []  # sorted lists, each after the previous
+        self.maxes = []  # last item of each chunk
+        self.length = 0
+
+    def add(self, item):
+        """Insert an item in order"""
+        if not self.chunks:
+            self.chunks.append([item])
+            self.maxes.append(item)
+        else:
+            i = bisect_left(self.maxes, item)
+            if i == len(self.maxes):
+                i -= 1
+                self.chunks[i].append(item)
+                self.maxes[i] = item
+            else:
+                insort(self.chunks[i], item)
+            chunk = self.chunks[i]
+            if len(chunk) > 2 * self.load:
+                self.chunks[i:i + 1] = [chunk[:self.load], chunk[self.load:]]
+                self.maxes[i:i + 1] = [chunk[self.load - 1], chunk[-1]]
+        self.length += 1
+
+    def remove(self, item):
+        """Delete an item (it must be present)"""
+        i = bisect_left(self.maxes, item)
+        chunk = self.chunks[i]
+        del chunk[bisect_left(chunk, item)]
+        if chunk:
+            self.maxes[i] = chunk[-1]
+        else:
+            del self.chunks[i]
+            del self.maxes[i]
+        self.length -= 1
+
+    def head(self, limit):
+        """First limit items"""
+        result = []
+        for chunk in self.chunks:
+            if len(result) >= limit:
+                break
+            result.extend(chunk[:limit - len(result)])
+        return result
+
+    def __len__(self):
+        return self.length
+
+
+class Leaderboard:
+    """
+    Rank ordering of all players, kept in step with their stat counters
+
+    A player's rank is 1 + the number of players with more wins (ties
+    share a rank), answered from a Fenwick tree over win counts in
+    O(log W). The chart order (wins descending, then fewer games) is a
+    ChunkedSortedList of keys, updated in O(log N) plus a bounded chunk
+    move, and the top K are its first K entries. The version grows with
+    every change, so cached charts can tell they are stale.
+
+    Game counts follow the database rule: the count written is clamped
+    at zero once per flush of the summed deltas (see StatsAggregator),
+    and the count shown is the written count plus the deltas not yet
+    written, clamped at zero.
+    """
+
+    def __init__(self, rows=()):
+        """
+        Initialize leaderboard
+
+        Args:
+            rows: Iterable of (user id, wins, games)
+        """
+        self.lock = threading.Lock()
+        self.users = {}  # user id -> (wins, games) as shown
+        self.written_games = {}  # user id -> game count in the database
+        self.unwritten_games = {}  # user id -> game count delta not yet written
+        self.order = ChunkedSortedList()  # sorted (-wins, games, user id)
+        self.win_counts = FenwickTree()
+        self.total = 0
+        self.version = 0
+        for user_id, wins, games in rows:
+            self._insert(user_id, wins, games)
+
+    @classmethod
+    def from_database(cls, db, stats=None):
+        """
+        Load the counters of all players
+
+        Args:
+            db: Database to read
+            stats: Optional StatsAggregator holding the updates not yet
+                written; its flushes are followed from then on
+
+        Returns:
+            Leaderboard
+        """
+        leaderboard = cls()
+
+        def query():
+            return db.fetch_all("SELECT ID, NumberOfWin, NumberOfGame FROM user")
+
+        if stats is None:
+            rows, pending = query(), {}
+        else:
+            # Follow flushes first: one made before the snapshot is in the
+            # rows, so the listener skips the players not loaded yet
+            stats.add_listener(leaderboard.flushed)
+            rows, pending = stats.read(query)
+
+        with leaderboard.lock:
+            for row in rows:
+                games, wins, _ = pending.get(row['ID'], (0, 0, 0))
+                leaderboard._insert(row['ID'], row['NumberOfWin'] + wins, row['NumberOfGame'], games)
+        return leaderboard
+
+    def _insert(self, user_id, wins, games, unwritten_games=0):
+        """Add a player (lock held or during construction)"""
+        self.written_games[user_id] = games
+        if unwritten_games:
+            self.unwritten_games[user_id] = unwritten_games
+        self._place(user_id, wins)
+        self.win_counts.add(wins, 1)
+        self.total += 1
+
+    def _place(self, user_id, wins):
+        """Put a player in the chart order with their current game count (lock held)"""
+        games = max(self.written_games.get(user_id, 0) + self.unwritten_games.get(user_id, 0), 0)
+        self.users[user_id] = (wins, games)
+        self.order.add((-wins, games, user_id))
+
+    def _unplace(self, user_id):
+        """Take a player out of the chart order (lock held)"""
+        wins, games = self.users.pop(user_id)
+        self.order.remove((-wins, games, user_id))
+        return wins
+
+    def add_user(self, user_id, wins=0, games=0):
+        """Add a new player (no-op if already known)"""
+        with self.lock:
+            if user_id not in self.users:
+                self._insert(user_id, wins, games)
+                self.version += 1
+
+    def update(self, user_id, games=0, wins=0, draws=0):
+        """
+        Apply a counter change
+
+        Args:
+            user_id: Player ID
+            games: Games played delta (the count shown never drops below zero)
+            wins: Wins delta
+            draws: Draws delta (shown on the chart, no effect on the order)
+        """
+        with self.lock:
+            self.version += 1
+            if not games and not wins:
+                return
+            if games:
+                self.unwritten_games[user_id] = self.unwritten_games.get(user_id, 0) + games
+            if user_id not in self.users:
+                self._insert(user_id, max(wins, 0), 0)
+                return
+            old_wins = self._unplace(user_id)
+            new_wins = max(old_wins + wins, 0)
+            self.win_counts.add(old_wins, -1)
+            self.win_counts.add(new_wins, 1)
+            self._place(user_id, new_wins)
+
+    def flushed(self, rows):
+        """
+        StatsAggregator listener: game count deltas were written
+
+        Args:
+            rows: (games, wins, draws, user id) rows of the flush
+        """
+        with self.lock:
+            for games, _, _, user_id in rows:
+                if not games or user_id not in self.users:
+                    continue
+                self.written_games[user_id] = max(self.written_games[user_id] + games, 0)
+                unwritten = self.unwritten_games.get(user_id, 0) - games
+                if unwritten:
+                    self.unwritten_games[user_id] = unwritten
+                else:
+                    self.unwritten_games.pop(user_id, None)
+                self._place(user_id, self._unplace(user_id))
+                self.version += 1
+
+    def get_rank(self, user_id):
+        """
+        Rank of a player
+
+        Returns:
+            1 + number of players with more wins, or 0 for unknown players
+        """
+        with self.lock:
+            entry = self.users.get(user_id)
+            if entry is None:
+                return 0
+            return 1 + self.total - self.win_counts.prefix(entry[0])
+
+    def top(self, limit):
+        """
+        Best players in chart order
+
+        Args:
+            limit: Most players returned
+
+        Returns:
+            List of (user id, rank)
+        """
+        with self.lock:
+            return [
+                (user_id, 1 + self.total - self.win_counts.prefix(-negative_wins))
+                for negative_wins, _, user_id in self.order.head(limit)
+            ]
+
+    def get_version(self):
+        """Get change counter of the rankings"""
+        return self.version
+
+    def get_length(self):
+        """Get number of ranked players"""
+        return self.total
+
+
+# Global leaderboard instance
+_leaderboard_instance = None
+_leaderboard_lock = threading.Lock()
+
+def get_leaderboard(stats=None):
+    """
+    Get global leaderboard, loaded from the database on first use
+
+    Args:
+        stats: Optional StatsAggregator holding the updates not yet
+            written, used by the first load only
+    """
+    global _leaderboard_instance
+    if _leaderboard_instance is None:
+        with _leaderboard_lock:
+            if _leaderboard_instance is None:
+                _leaderboard_instance = Leaderboard.from_database(get_database(), stats)
+    return _leaderboard_instance
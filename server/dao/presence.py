@@ -0,0 +1,142 @@
+"""
+Presence - in-memory online/playing state of users
+"""
+
+import threading
+from server.dao.database import get_database
+from shared.config import Config
+from shared.utils import log
+from shared.constants import *
+
+SNAPSHOT_QUERY = "UPDATE user SET IsOnline = ?, IsPlaying = ? WHERE ID = ?"
+
+class PresenceService:
+    """
+    Online and playing flags by user ID
+
+    Presence changes on every login, room join, leave and disconnect, and
+    none of it has to survive a restart, so it lives in memory only. With
+    snapshot_interval > 0 the users changed since the last snapshot are
+    copied to the IsOnline/IsPlaying columns in one transaction, for
+    tools reading the database directly.
+    """
+
+    def __init__(self, db=None, snapshot_interval=PRESENCE_SNAPSHOT_INTERVAL):
+        """
+        Initialize presence
+
+        Args:
+            db: Database for snapshots
+            snapshot_interval: Seconds between snapshots (0 = never)
+        """
+        self.db = db
+        self.snapshot_interval = snapshot_interval
+
+        self.condition = threading.Condition()
+        self.online = set()  # user ids
+        self.playing = set()  # user ids
+        self.changed = set()  # user ids not yet in the snapshot
+        self.snapshot_lock = threading.Lock()
+        self.version = 0
+        self.thread = None
+
+    def _changed(self, user_id):
+        """Record a change (lock held)"""
+        self.version += 1
+        if self.snapshot_interval > 0 and self.db is not None:
+            self.changed.add(user_id)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="PresenceSnapshot", daemon=True)
+                self.thread.start()
+
+    def set_online(self, user_id, online=True):
+        """Mark a user online or offline"""
+        with self.condition:
+            if online == (user_id in self.online):
+                return
+            if online:
+                self.online.add(user_id)
+            else:
+                self.online.discard(user_id)
+            self._changed(user_id)
+
+    def set_playing(self, user_id, playing=True):
+        """Mark a user playing or not playing"""
+        with self.condition:
+            if playing == (user_id in self.playing):
+                return
+            if playing:
+                self.playing.add(user_id)
+            else:
+                self.playing.discard(user_id)
+            self._changed(user_id)
+
+    def is_online(self, user_id):
+        return user_id in self.online
+
+    def is_playing(self, user_id):
+        return user_id in self.playing
+
+    def get_online_ids(self):
+        """Get set of online user IDs"""
+        with self.condition:
+            return set(self.online)
+
+    def get_version(self):
+        """Get change counter of the presence state"""
+        return self.version
+
+    def reset(self):
+        """Mark everybody offline and not playing"""
+        with self.condition:
+            for user_id in self.online | self.playing:
+                self._changed(user_id)
+            self.online.clear()
+            self.playing.clear()
+
+    def snapshot(self):
+        """
+        Write the users changed since the last snapshot
+
+        Returns:
+            Number of users written
+        """
+        with self.snapshot_lock:
+            with self.condition:
+                if not self.changed or self.db is None:
+                    return 0
+                rows = [(int(user_id in self.online), int(user_id in self.playing), user_id)
+                        for user_id in self.changed]
+                self.changed = set()
+
+            if not self.db.execute_batch(SNAPSHOT_QUERY, rows):
+                with self.condition:
+                    self.changed.update(user_id for _, _, user_id in rows)
+                log("Presence snapshot failed", "ERROR")
+                return 0
+            return len(rows)
+
+    def _run(self):
+        """Snapshot thread: runs while presence keeps changing"""
+        while True:
+            with self.condition:
+                self.condition.wait(self.snapshot_interval)
+                if not self.changed:
+                    self.thread = None
+                    return
+
+            self.snapshot()
+
+
+# Global presence instance
+_presence_instance = None
+_presence_lock = threading.Lock()
+
+def get_presence():
+    """Get global presence service"""
+    global _presence_instance
+    if _presence_instance is None:
+        with _presence_lock:
+            if _presence_instance is None:
+                _presence_instance = PresenceService(get_database(), Config.PRESENCE_SNAPSHOT_INTERVAL)
+    return _presence_instance
@@ -0,0 +1,220 @@
+"""
+Stats aggregator - write-behind batching of player stat counters
+"""
+
+import atexit
+import threading
+from server.dao.database import get_database
+from shared.config import Config
+from shared.utils import log
+from shared.constants import *
+
+# One row per player and flush; the game count never drops below zero
+FLUSH_QUERY = """
+    UPDATE user SET
+        NumberOfGame = MAX(NumberOfGame + ?, 0),
+        NumberOfWin = NumberOfWin + ?,
+        NumberOfDraw = NumberOfDraw + ?
+    WHERE ID = ?
+"""
+
+class StatsAggregator:
+    """
+    In-memory accumulator of game, win and draw counter deltas
+
+    Updates only add to a per-player delta, so a finished game costs no
+    database write. Pending deltas are written in one transaction every
+    interval seconds, as soon as max_events updates are pending, and on
+    flush() (server stop, interpreter exit). A crash loses the pending
+    deltas; durability "immediate" writes every update at once instead.
+    """
+
+    def __init__(self, db, interval=STATS_FLUSH_INTERVAL, max_events=STATS_FLUSH_EVENTS,
+                 durability=STATS_DURABILITY):
+        """
+        Initialize aggregator
+
+        Args:
+            db: Database the counters are written to
+            interval: Most seconds an update waits before being written
+            max_events: Pending updates that trigger a write right away
+            durability: "batched" or "immediate"
+        """
+        self.db = db
+        self.interval = interval
+        self.max_events = max_events
+        self.durability = durability
+
+        self.condition = threading.Condition()
+        self.flush_lock = threading.Lock()
+        self.pending = {}  # user id -> [games, wins, draws]
+        self.flushing = {}  # deltas being written, still visible to get_pending
+        self.events = 0
+        self.thread = None
+        self.listeners = []
+
+        # Statistics
+        self.flushes = 0
+        self.updates = 0
+
+    def add(self, user_id, games=0, wins=0, draws=0):
+        """
+        Record a counter change
+
+        Args:
+            user_id: Player ID
+            games: Games played delta
+            wins: Wins delta
+            draws: Draws delta
+        """
+        with self.condition:
+            delta = self.pending.get(user_id)
+            if delta is None:
+                self.pending[user_id] = [games, wins, draws]
+            else:
+                delta[0] += games
+                delta[1] += wins
+                delta[2] += draws
+            self.events += 1
+            self.updates += 1
+
+            immediate = self.durability == "immediate"
+            if not immediate:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="StatsWriter", daemon=True)
+                    self.thread.start()
+                if self.events >= self.max_events:
+                    self.condition.notify()
+
+        if immediate:
+            self.flush()
+
+    def get_pending(self, user_id):
+        """
+        Deltas of a player not yet in the database
+
+        Returns:
+            Tuple (games, wins, draws)
+        """
+        with self.condition:
+            games = wins = draws = 0
+            for deltas in (self.flushing, self.pending):
+                delta = deltas.get(user_id)
+                if delta is not None:
+                    games += delta[0]
+                    wins += delta[1]
+                    draws += delta[2]
+            return games, wins, draws
+
+    def add_listener(self, listener):
+        """
+        Add a flush listener
+
+        Args:
+            listener: Callable (rows) run after each successful write with
+                its (games, wins, draws, user id) rows, in flush order
+        """
+        with self.condition:
+            self.listeners.append(listener)
+
+    def read(self, query):
+        """
+        Run a database read together with the deltas it does not include
+
+        The read waits for a running flush, so the rows and the deltas
+        never both count (or both miss) the deltas being written.
+
+        Args:
+            query: Callable reading the database
+
+        Returns:
+            Tuple (result of query, dict user id -> (games, wins, draws))
+        """
+        with self.flush_lock:
+            result = query()
+            with self.condition:
+                pending = {user_id: tuple(delta) for user_id, delta in self.pending.items()}
+            return result, pending
+
+    def flush(self):
+        """
+        Write all pending deltas in one transaction
+
+        Returns:
+            Number of players updated
+        """
+        with self.flush_lock:
+            with self.condition:
+                if not self.pending:
+                    return 0
+                self.flushing, self.pending = self.pending, {}
+                self.events = 0
+
+            rows = [(games, wins, draws, user_id)
+                    for user_id, (games, wins, draws) in self.flushing.items()
+                    if games or wins or draws]
+            written = not rows or self.db.execute_batch(FLUSH_QUERY, rows)
+
+            with self.condition:
+                if not written:
+                    # Keep the deltas for the next attempt
+                    for user_id, (games, wins, draws) in self.flushing.items():
+                        delta = self.pending.setdefault(user_id, [0, 0, 0])
+                        delta[0] += games
+                        delta[1] += wins
+                        delta[2] += draws
+                    self.events += len(self.flushing)
+                    log(f"Stats flush failed, {len(self.flushing)} players kept pending", "ERROR")
+                    self.flushing = {}
+                    return 0
+                self.flushing = {}
+                self.flushes += 1
+                listeners = list(self.listeners)
+
+            for listener in listeners:
+                try:
+                    listener(rows)
+                except Exception as e:
+                    log(f"Stats listener error: {e}", "ERROR")
+            return len(rows)
+
+    def _run(self):
+        """Writer thread: flushes while updates keep arriving"""
+        while True:
+            with self.condition:
+                if self.events < self.max_events:
+                    self.condition.wait(self.interval)
+                if not self.pending:
+                    self.thread = None
+                    return
+
+            self.flush()
+
+    def get_stats(self):
+        """
+        Get write-behind metrics
+
+        Returns:
+            Dict with updates recorded, flushes made and players pending
+        """
+        with self.condition:
+            return {
+                'updates': self.updates,
+                'flushes': self.flushes,
+                'pending': len(self.pending),
+            }
+
+
+# Global aggregator instance
+_stats_instance = None
+_stats_lock = threading.Lock()
+
+def get_stats_aggregator():
+    """Get global stats aggregator (flushed at interpreter exit)"""
+    global _stats_instance
+    if _stats_instance is None:
+        with _stats_lock:
+            if _stats_instance is None:
+                _stats_instance = StatsAggregator(get_database(), durability=Config.STATS_DURABILITY)
+                atexit.register(_stats_instance.flush)
+    return _stats_instance
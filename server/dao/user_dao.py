@@ -3,6 +3,10 @@ User Data Access Object
 """
 
 from server.dao.database import get_database
+from server.dao.stats_aggregator import get_stats_aggregator
+from server.dao.leaderboard import get_leaderboard
+from server.dao.presence import get_presence
+from server.dao.friend_graph import get_friend_graph
 from shared.user import User
 from shared.utils import log, calculate_mark
 
@@ -11,6 +15,10 @@ class UserDAO:
     
     def __init__(self):
         self.db = get_database()
+        self.stats = get_stats_aggregator()
+        self.leaderboard = get_leaderboard(self.stats)
+        self.presence = get_presence()
+        self.friend_graph = get_friend_graph()
     
     def verify_user(self, username, password):
         """
@@ -24,20 +32,21 @@ class UserDAO:
             User object if verified, None otherwise
         """
         query = "SELECT * FROM user WHERE Username = ? AND Password = ?"
-        row = self.db.fetch_one(query, (username, password))
+        row, pending = self.stats.read(lambda: self.db.fetch_one(query, (username, password)))
         
         if row:
+            number_of_game, number_of_win, number_of_draw = self._get_counters(row, pending)
             user = User(
                 user_id=row['ID'],
                 username=row['Username'],
                 password=row['Password'],
                 nickname=row['Nickname'],
                 avatar=row['Avatar'],
-                number_of_game=row['NumberOfGame'],
-                number_of_win=row['NumberOfWin'],
-                number_of_draw=row['NumberOfDraw'],
-                is_online=bool(row['IsOnline']),
-                is_playing=bool(row['IsPlaying']),
+                number_of_game=number_of_game,
+                number_of_win=number_of_win,
+                number_of_draw=number_of_draw,
+                is_online=self.presence.is_online(row['ID']),
+                is_playing=self.presence.is_playing(row['ID']),
                 rank=self.get_rank(row['ID'])
             )
             return user
@@ -57,7 +66,12 @@ class UserDAO:
             True if successful, False otherwise
         """
         query = "INSERT INTO user (Username, Password, Nickname, Avatar) VALUES (?, ?, ?, ?)"
-        return self.db.execute_query(query, (username, password, nickname, avatar))
+        user_id = self.db.execute_insert(query, (username, password, nickname, avatar))
+        if not user_id:
+            return False
+        
+        self.leaderboard.add_user(user_id)
+        return True
     
     def check_duplicated(self, username):
         """
@@ -107,24 +121,25 @@ class UserDAO:
             return self.db.execute_query(query, (user_id,))
     
     def update_to_online(self, user_id):
-        """Set user status to online"""
-        query = "UPDATE user SET IsOnline = 1 WHERE ID = ?"
-        return self.db.execute_query(query, (user_id,))
+        """Set user status to online (in memory, see PresenceService)"""
+        self.presence.set_online(user_id, True)
+        return True
     
     def update_to_offline(self, user_id):
-        """Set user status to offline"""
-        query = "UPDATE user SET IsOnline = 0 WHERE ID = ?"
-        return self.db.execute_query(query, (user_id,))
+        """Set user status to offline (their friend set leaves the cache)"""
+        self.presence.set_online(user_id, False)
+        self.friend_graph.invalidate(user_id)
+        return True
     
     def update_to_playing(self, user_id):
         """Set user status to playing"""
-        query = "UPDATE user SET IsPlaying = 1 WHERE ID = ?"
-        return self.db.execute_query(query, (user_id,))
+        self.presence.set_playing(user_id, True)
+        return True
     
     def update_to_not_playing(self, user_id):
         """Set user status to not playing"""
-        query = "UPDATE user SET IsPlaying = 0 WHERE ID = ?"
-        return self.db.execute_query(query, (user_id,))
+        self.presence.set_playing(user_id, False)
+        return True
     
     def get_list_friend(self, user_id):
         """
@@ -134,26 +149,19 @@ class UserDAO:
             user_id: User ID
         
         Returns:
-            List of User objects
-        """
-        query = """
-            SELECT User.ID, User.Nickname, User.IsOnline, User.IsPlaying
-            FROM user
-            WHERE User.ID IN (
-                SELECT ID_User1 FROM friend WHERE ID_User2 = ?
-            ) OR User.ID IN (
-                SELECT ID_User2 FROM friend WHERE ID_User1 = ?
-            )
+            List of User objects (from the friend graph and live presence)
         """
-        rows = self.db.fetch_all(query, (user_id, user_id))
-        
         friends = []
-        for row in rows:
+        for friend_id in sorted(self.friend_graph.get_friends(user_id)):
+            nickname = self.friend_graph.get_nickname(friend_id)
+            if nickname is None:
+                nickname = self.get_nickname_by_id(friend_id)
+                self.friend_graph.set_nickname(friend_id, nickname)
             user = User(
-                user_id=row['ID'],
-                nickname=row['Nickname'],
-                is_online=bool(row['IsOnline']),
-                is_playing=bool(row['IsPlaying'])
+                user_id=friend_id,
+                nickname=nickname,
+                is_online=self.presence.is_online(friend_id),
+                is_playing=self.presence.is_playing(friend_id)
             )
             friends.append(user)
         
@@ -163,45 +171,47 @@ class UserDAO:
     
     def check_is_friend(self, user_id1, user_id2):
         """Check if two users are friends"""
-        query = """
-            SELECT * FROM friend 
-            WHERE (ID_User1 = ? AND ID_User2 = ?) 
-               OR (ID_User1 = ? AND ID_User2 = ?)
-        """
-        row = self.db.fetch_one(query, (user_id1, user_id2, user_id2, user_id1))
-        return row is not None
+        return self.friend_graph.is_friend(user_id1, user_id2)
     
     def make_friend(self, user_id1, user_id2):
         """Add friendship between two users"""
         query = "INSERT OR IGNORE INTO friend (ID_User1, ID_User2) VALUES (?, ?)"
-        return self.db.execute_query(query, (user_id1, user_id2))
+        if not self.db.execute_query(query, (user_id1, user_id2)):
+            return False
+        self.friend_graph.add_friendship(user_id1, user_id2)
+        return True
     
     def get_user_static_rank(self):
         """
         Get user ranking sorted by stats
         
         Returns:
-            List of User objects sorted by rank
+            List of User objects sorted by rank (wins, then fewer games)
         """
-        query = """
-            SELECT * FROM user 
-            ORDER BY NumberOfWin DESC, NumberOfGame ASC
-            LIMIT 100
-        """
-        rows = self.db.fetch_all(query)
+        top = self.leaderboard.top(100)
+        if not top:
+            return []
+        
+        query = f"SELECT * FROM user WHERE ID IN ({','.join('?' * len(top))})"
+        rows, pending = self.stats.read(lambda: self.db.fetch_all(query, tuple(user_id for user_id, _ in top)))
+        rows = {row['ID']: row for row in rows}
         
         users = []
-        for row in rows:
+        for user_id, rank in top:
+            row = rows.get(user_id)
+            if row is None:
+                continue
+            number_of_game, number_of_win, number_of_draw = self._get_counters(row, pending)
             user = User(
                 user_id=row['ID'],
                 username=row['Username'],
                 password=row['Password'],
                 nickname=row['Nickname'],
                 avatar=row['Avatar'],
-                number_of_game=row['NumberOfGame'],
-                number_of_win=row['NumberOfWin'],
-                number_of_draw=row['NumberOfDraw'],
-                rank=self.get_rank(row['ID'])
+                number_of_game=number_of_game,
+                number_of_win=number_of_win,
+                number_of_draw=number_of_draw,
+                rank=rank
             )
             users.append(user)
         
@@ -215,61 +225,71 @@ class UserDAO:
     
     def get_rank(self, user_id):
         """
-        Calculate user rank based on wins
+        Get user rank based on wins (from the in-memory leaderboard)
         
         Args:
             user_id: User ID
         
         Returns:
-            Rank position (1-based)
-        """
-        query = """
-            SELECT COUNT(*) + 1 as rank
-            FROM user
-            WHERE NumberOfWin > (
-                SELECT NumberOfWin FROM user WHERE ID = ?
-            )
+            Rank position (1-based), 0 for unknown users
         """
-        row = self.db.fetch_one(query, (user_id,))
-        return row['rank'] if row else 0
+        return self.leaderboard.get_rank(user_id)
     
     def add_game(self, user_id):
-        """Increment user's game count"""
-        query = "UPDATE user SET NumberOfGame = NumberOfGame + 1 WHERE ID = ?"
-        return self.db.execute_query(query, (user_id,))
+        """Increment user's game count (written behind, see StatsAggregator)"""
+        self.stats.add(user_id, games=1)
+        self.leaderboard.update(user_id, games=1)
+        return True
     
     def decrease_game(self, user_id):
-        """Decrement user's game count"""
-        query = "UPDATE user SET NumberOfGame = NumberOfGame - 1 WHERE ID = ? AND NumberOfGame > 0"
-        return self.db.execute_query(query, (user_id,))
+        """Decrement user's game count (never below zero)"""
+        self.stats.add(user_id, games=-1)
+        self.leaderboard.update(user_id, games=-1)
+        return True
     
     def add_win_game(self, user_id):
         """Increment user's win count"""
-        query = "UPDATE user SET NumberOfWin = NumberOfWin + 1 WHERE ID = ?"
-        return self.db.execute_query(query, (user_id,))
+        self.stats.add(user_id, wins=1)
+        self.leaderboard.update(user_id, wins=1)
+        return True
     
     def add_draw_game(self, user_id):
         """Increment user's draw count"""
-        query = "UPDATE user SET NumberOfDraw = NumberOfDraw + 1 WHERE ID = ?"
-        return self.db.execute_query(query, (user_id,))
+        self.stats.add(user_id, draws=1)
+        self.leaderboard.update(user_id, draws=1)
+        return True
+    
+    def _get_counters(self, row, pending):
+        """
+        Stat counters of a user row including updates not yet written
+        
+        Args:
+            row: User row
+            pending: Deltas read with the row (StatsAggregator.read)
+        """
+        games, wins, draws = pending.get(row['ID'], (0, 0, 0))
+        return (max(row['NumberOfGame'] + games, 0),
+                row['NumberOfWin'] + wins,
+                row['NumberOfDraw'] + draws)
     
     def get_user_by_id(self, user_id):
         """Get full user info by ID"""
         query = "SELECT * FROM user WHERE ID = ?"
-        row = self.db.fetch_one(query, (user_id,))
+        row, pending = self.stats.read(lambda: self.db.fetch_one(query, (user_id,)))
         
         if row:
+            number_of_game, number_of_win, number_of_draw = self._get_counters(row, pending)
             return User(
                 user_id=row['ID'],
                 username=row['Username'],
                 password=row['Password'],
                 nickname=row['Nickname'],
                 avatar=row['Avatar'],
-                number_of_game=row['NumberOfGame'],
-                number_of_win=row['NumberOfWin'],
-                number_of_draw=row['NumberOfDraw'],
-                is_online=bool(row['IsOnline']),
-                is_playing=bool(row['IsPlaying']),
+                number_of_game=number_of_game,
+                number_of_win=number_of_win,
+                number_of_draw=number_of_draw,
+                is_online=self.presence.is_online(row['ID']),
+                is_playing=self.presence.is_playing(row['ID']),
                 rank=self.get_rank(row['ID'])
             )
         return None
@@ -285,14 +305,15 @@ class UserDAO:
                 user_id=row['ID'],
                 username=row['Username'],
                 nickname=row['Nickname'],
-                is_online=bool(row['IsOnline']),
-                is_playing=bool(row['IsPlaying'])
+                is_online=self.presence.is_online(row['ID']),
+                is_playing=self.presence.is_playing(row['ID'])
             )
             users.append(user)
         
         return users
     
     def reset_all_users_status(self):
-        """Reset all users to offline and not playing status"""
+        """Reset all users to offline and not playing status (also in the snapshot columns)"""
+        self.presence.reset()
         query = "UPDATE user SET IsOnline = 0, IsPlaying = 0"
         return self.db.execute_query(query)
@@ -286,12 +286,7 @@ class Admin:
         # Send to all connected clients
         count = 0
         if hasattr(self.server, 'server_thread_bus'):
-            for thread in self.server.server_thread_bus.get_list_server_threads():
-                try:
-                    thread.write(create_message(PROTOCOL_ADMIN_BROADCAST, message))
-                    count += 1
-                except:
-                    pass
+            count = self.server.server_thread_bus.broadcast(None, create_message(PROTOCOL_ADMIN_BROADCAST, message))
         
         # Add to history
         timestamp = get_timestamp()
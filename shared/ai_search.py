@@ -0,0 +1,445 @@
+"""
+AI Search - Alpha-beta search engine for the AI opponent
+"""
+
+import time
+from array import array
+from shared.constants import *
+from shared.point import Point
+from shared.game_logic import Bitboard, BoardState, BITBOARD_WIDTH
+from shared.pattern_eval import PatternState
+from shared.threat_search import ThreatSolver
+from shared.opening_book import get_opening_book
+
+# Score of a won position (minus the number of plies needed to win)
+WIN_SCORE = 1000000
+INFINITY = WIN_SCORE + 1
+
+# Scores this close to WIN_SCORE encode a distance to a win
+MATE_BOUND = WIN_SCORE - 1000
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is used up"""
+    pass
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table keyed by Zobrist hash
+
+    Entries live in parallel arrays (one slot per hash bucket), so memory
+    use is fixed at construction. A slot is replaced when it is empty,
+    holds the same position, was written by an older search or holds a
+    shallower result (depth-preferred with aging).
+    """
+
+    # Bound types
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+    def __init__(self, size=AI_TT_SIZE):
+        """
+        Initialize table
+
+        Args:
+            size: Number of entries (rounded up to a power of two)
+        """
+        self.size = 1 << max(0, (size - 1).bit_length())
+        self.mask = self.size - 1
+        self.keys = array('Q', bytes(8 * self.size))
+        self.values = array('i', bytes(4 * self.size))
+        self.depths = array('b', [-1]) * self.size
+        self.flags = array('b', bytes(self.size))
+        self.moves = array('h', [-1]) * self.size
+        self.generations = array('B', bytes(self.size))
+        self.generation = 0
+
+        # Counters
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """Age existing entries so they are replaced before fresh ones"""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        """Drop all entries and reset counters"""
+        self.__init__(self.size)
+
+    def probe(self, key):
+        """
+        Look up a position
+
+        Args:
+            key: Zobrist hash
+
+        Returns:
+            Tuple (depth, flag, value, move) or None; move is -1 if unknown
+        """
+        self.probes += 1
+        slot = key & self.mask
+        if self.depths[slot] < 0 or self.keys[slot] != key:
+            return None
+        self.hits += 1
+        return self.depths[slot], self.flags[slot], self.values[slot], self.moves[slot]
+
+    def store(self, key, depth, flag, value, move):
+        """
+        Save a search result
+
+        Args:
+            key: Zobrist hash
+            depth: Remaining depth the value was searched to
+            flag: EXACT, LOWER or UPPER
+            value: Score
+            move: Best move cell index, or -1
+        """
+        slot = key & self.mask
+        stored_depth = self.depths[slot]
+        same = self.keys[slot] == key
+        if (stored_depth >= 0 and not same
+                and self.generations[slot] == self.generation
+                and stored_depth > depth):
+            return
+        if stored_depth >= 0 and not same:
+            self.overwrites += 1
+        if same and move < 0:
+            # Keep the best move we already know for this position
+            move = self.moves[slot]
+        self.stores += 1
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.flags[slot] = flag
+        self.values[slot] = value
+        self.moves[slot] = move
+        self.generations[slot] = self.generation
+
+    def hit_rate(self):
+        """Fraction of probes that found their position"""
+        return self.hits / self.probes if self.probes else 0.0
+
+    def memory_bytes(self):
+        """Memory held by the entry arrays"""
+        return sum(
+            table.itemsize * len(table)
+            for table in (self.keys, self.values, self.depths,
+                          self.flags, self.moves, self.generations)
+        )
+
+    def get_stats(self):
+        """Counters for sizing the table"""
+        return {
+            'size': self.size,
+            'memory_bytes': self.memory_bytes(),
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hit_rate(),
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+        }
+
+
+class AlphaBetaAI:
+    """
+    Negamax alpha-beta search with iterative deepening and a time budget
+
+    Usable anywhere SimpleAI is: get_best_move(board, ai_player,
+    human_player) returns the best move found before time runs out.
+    """
+
+    def __init__(self, time_limit=AI_TIME_LIMIT, max_depth=AI_MAX_DEPTH,
+                 branch_limit=AI_BRANCH_LIMIT, tt_size=AI_TT_SIZE, use_book=True):
+        """
+        Initialize search engine
+
+        Args:
+            time_limit: Wall-clock budget per move in seconds
+            max_depth: Maximum iterative deepening depth
+            branch_limit: Number of best-ordered moves searched below the root
+            tt_size: Transposition table entries (kept between moves)
+            use_book: Play opening book moves without searching
+        """
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.branch_limit = branch_limit
+        self.tt = TranspositionTable(tt_size)
+        self.threat_solver = ThreatSolver()
+        self.book = get_opening_book() if use_book else None
+
+        # Search state
+        self.state = None
+        self.deadline = 0
+        self.nodes = 0
+        self.root_ply = 0
+
+        # Statistics of the last search
+        self.last_depth = 0
+        self.last_score = 0
+        self.last_nodes = 0
+        self.last_threat = None
+
+    def get_best_move(self, board, ai_player, human_player):
+        """
+        Get the best move for AI
+
+        Args:
+            board: 2D array, Bitboard or BoardState representing the game board
+            ai_player: AI's player marker (1 or 2)
+            human_player: Human's player marker (1 or 2)
+
+        Returns:
+            Point object representing the best move, or None if board is full
+        """
+        state = self._make_state(board)
+        index = self.search(state, ai_player)
+        if index is None:
+            return None
+        return Point(*divmod(index, BITBOARD_WIDTH))
+
+    def close(self):
+        """Release engine resources (nothing to do for the serial search)"""
+        pass
+
+    @staticmethod
+    def _make_state(board):
+        """Private BoardState copy of any supported board type"""
+        if isinstance(board, BoardState):
+            return board.copy()
+        if isinstance(board, Bitboard):
+            board = board.to_board()
+        return BoardState.from_board(board)
+
+    def search(self, state, player, root_moves=None):
+        """
+        Run iterative deepening search
+
+        Args:
+            state: BoardState to search (restored before returning); a
+                pattern evaluator is attached to it if it has none
+            player: Player marker to move
+            root_moves: Optional list of cell indexes to restrict the root to
+
+        Returns:
+            Cell index of the best move, or None if there is no move
+        """
+        start = time.time()
+        self.state = state
+        self.deadline = start + self.time_limit
+        self.nodes = 0
+        self.root_ply = state.get_move_count()
+        self.last_depth = 0
+        self.last_score = 0
+        self.last_threat = None
+        self.tt.new_search()
+        if state.patterns is None:
+            state.patterns = PatternState.from_state(state)
+
+        moves = root_moves if root_moves is not None else self._generate_moves(player)
+        if not moves:
+            return None
+
+        # Forced moves need no search
+        if root_moves is None:
+            forced = self.find_forced_move(state, player)
+        else:
+            forced = self._find_forced_move(moves, player)
+        if forced is not None:
+            self.last_nodes = self.nodes
+            return forced
+
+        moves = self._order_moves(moves, player)
+        best_move = moves[0]
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self._search_root(moves, depth, player)
+            except SearchTimeout:
+                # Unwind the moves made by the interrupted iteration
+                while state.get_move_count() > self.root_ply:
+                    state.undo()
+                break
+
+            best_move = move
+            self.last_depth = depth
+            self.last_score = score
+
+            # Search the best move first in the next iteration
+            moves.remove(move)
+            moves.insert(0, move)
+
+            if abs(score) >= WIN_SCORE - self.max_depth or time.time() >= self.deadline:
+                break
+
+        self.last_nodes = self.nodes
+        return best_move
+
+    def find_forced_move(self, state, player):
+        """
+        Find a move that needs no search
+
+        Args:
+            state: BoardState (restored before returning)
+            player: Player marker to move
+
+        Returns:
+            Cell index of an opening book move, of an immediate win, of
+            the block of an opponent win or of the first move of a proven
+            threat sequence; None if the position needs a full search
+        """
+        self.state = state
+        self.last_threat = None
+        if self.book is not None:
+            book_move = self.book.lookup(state.bitboard, player)
+            if book_move is not None:
+                return book_move
+
+        if state.patterns is None:
+            state.patterns = PatternState.from_state(state)
+
+        forced = self._find_forced_move(self._generate_moves(player), player)
+        if forced is not None:
+            return forced
+
+        # A proven forced win by threats beats anything the search finds
+        threat = self.threat_solver.solve(state, player)
+        if threat is not None:
+            self.last_threat = self.threat_solver.last_mode
+        return threat
+
+    def _search_root(self, moves, depth, player):
+        """Search all root moves to depth, return (score, best move)"""
+        alpha = -INFINITY
+        best_move = moves[0]
+        for index in moves:
+            score = self._score_move(index, depth, alpha, INFINITY, player)
+            if score > alpha:
+                alpha = score
+                best_move = index
+        return alpha, best_move
+
+    def _score_move(self, index, depth, alpha, beta, player):
+        """Play index, search the reply and return the score for player"""
+        x, y = divmod(index, BITBOARD_WIDTH)
+        state = self.state
+        if state.play(x, y, player):
+            score = WIN_SCORE - (state.get_move_count() - self.root_ply)
+        elif state.is_full():
+            score = 0
+        else:
+            score = -self._negamax(depth - 1, -beta, -alpha, 3 - player)
+        state.undo()
+        return score
+
+    def _negamax(self, depth, alpha, beta, player):
+        """
+        Negamax with alpha-beta pruning
+
+        Args:
+            depth: Remaining depth
+            alpha, beta: Search window
+            player: Player marker to move
+
+        Returns:
+            Score from the point of view of player
+        """
+        self.nodes += 1
+        if self.nodes & 255 == 0 and time.time() >= self.deadline:
+            raise SearchTimeout()
+
+        if depth <= 0:
+            return self._evaluate(player)
+
+        # Transposition table cutoff
+        key = self.state.hash
+        ply = self.state.get_move_count() - self.root_ply
+        entry = self.tt.probe(key)
+        tt_move = -1
+        if entry is not None:
+            tt_depth, flag, value, tt_move = entry
+            if tt_depth >= depth:
+                value = self._value_from_tt(value, ply)
+                if flag == TranspositionTable.EXACT:
+                    return value
+                if flag == TranspositionTable.LOWER and value >= beta:
+                    return value
+                if flag == TranspositionTable.UPPER and value <= alpha:
+                    return value
+
+        moves = self._generate_moves(player)
+        if not moves:
+            return 0
+        moves = self._order_moves(moves, player)
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        moves = moves[:self.branch_limit]
+
+        alpha_start = alpha
+        best = -INFINITY
+        best_move = -1
+        for index in moves:
+            score = self._score_move(index, depth, alpha, beta, player)
+            if score > best:
+                best = score
+                best_move = index
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best <= alpha_start:
+            flag = TranspositionTable.UPPER
+        elif best >= beta:
+            flag = TranspositionTable.LOWER
+        else:
+            flag = TranspositionTable.EXACT
+        self.tt.store(key, depth, flag, self._value_to_tt(best, ply), best_move)
+        return best
+
+    @staticmethod
+    def _value_to_tt(value, ply):
+        """Make win scores relative to the stored position"""
+        if value >= MATE_BOUND:
+            return value + ply
+        if value <= -MATE_BOUND:
+            return value - ply
+        return value
+
+    @staticmethod
+    def _value_from_tt(value, ply):
+        """Make stored win scores relative to the search root again"""
+        if value >= MATE_BOUND:
+            return value - ply
+        if value <= -MATE_BOUND:
+            return value + ply
+        return value
+
+    def _evaluate(self, player):
+        """Static evaluation from the point of view of player"""
+        score = self.state.patterns.evaluate(player)
+        return max(-MATE_BOUND + 1, min(MATE_BOUND - 1, score))
+
+    def _generate_moves(self, player):
+        """Candidate cells near existing stones (center on an empty board)"""
+        return self.state.get_candidates()
+
+    def _order_moves(self, moves, player):
+        """Sort moves by pattern score, best first"""
+        return self.state.patterns.order_moves(moves, player)
+
+    def _find_forced_move(self, moves, player):
+        """Own winning move, else the single cell blocking an opponent win"""
+        bitboard = self.state.bitboard
+        for target in (player, 3 - player):
+            for index in moves:
+                x, y = divmod(index, BITBOARD_WIDTH)
+                bitboard.place(x, y, target)
+                won = bitboard.is_win(x, y, target)
+                bitboard.remove(x, y, target)
+                if won:
+                    return index
+        return None
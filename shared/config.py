@@ -10,6 +10,8 @@ class Config:
     # Server settings
     SERVER_HOST = DEFAULT_SERVER_HOST
     SERVER_PORT = DEFAULT_SERVER_PORT
+    SERVER_MODE = SERVER_MODE
+    SLOW_CONSUMER_POLICY = SLOW_CONSUMER_POLICY
     
     # Game settings
     BOARD_SIZE = BOARD_SIZE
@@ -19,6 +21,8 @@ class Config:
     
     # Database
     DATABASE_PATH = DATABASE_PATH
+    STATS_DURABILITY = STATS_DURABILITY
+    PRESENCE_SNAPSHOT_INTERVAL = PRESENCE_SNAPSHOT_INTERVAL
     
     # Debug mode
     DEBUG = True
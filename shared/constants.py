@@ -7,6 +7,7 @@ DEFAULT_SERVER_HOST = "127.0.0.1"
 DEFAULT_SERVER_PORT = 7777
 BUFFER_SIZE = 4096
 ENCODING = "utf-8"
+MAX_FRAME_SIZE = 64 * 1024  # longest accepted protocol message in bytes
 
 # Game Settings
 BOARD_SIZE = 15
@@ -14,6 +15,29 @@ WIN_CONDITION = 5
 TURN_TIME_LIMIT = 30  # seconds
 CELL_SIZE = 40  # pixels
 
+# AI Settings
+AI_TIME_LIMIT = 0.5  # seconds per move
+AI_MAX_DEPTH = 10  # plies
+AI_BRANCH_LIMIT = 12  # moves searched per node below the root
+AI_CANDIDATE_DISTANCE = 2  # candidate moves lie this close to a stone along a line
+AI_TT_SIZE = 1 << 16  # transposition table entries (about 17 bytes each)
+AI_ZOBRIST_SEED = 20240615  # fixed so hashes match across processes
+AI_PATTERN_CACHE_PATH = "cache/pattern_table.bin"
+AI_VCF_DEPTH = 12  # attacker fours in a VCF sequence
+AI_VCT_DEPTH = 4  # attacker threats (threes or fours) in a VCT sequence
+AI_THREAT_NODE_LIMIT = 20000  # threat solver nodes per move
+AI_THREAT_TIME_LIMIT = 0.1  # threat solver seconds per move
+AI_THREAT_CACHE_SIZE = 1 << 16  # proof cache entries
+AI_OPENING_BOOK_PATH = "assets/book/opening_book.bin"
+AI_BOOK_MAX_PLY = 10  # stones on the board up to which the book is consulted
+AI_ENGINE = "alphabeta"  # "alphabeta" or "mcts"
+AI_PARALLEL = False  # search on a process pool instead of one core
+AI_WORKERS = 0  # worker processes for the parallel search (0 = one per CPU core)
+AI_PARALLEL_MARGIN = 0.05  # seconds kept back for collecting worker results
+AI_MCTS_BATCH = 64  # random playouts per expanded MCTS leaf
+AI_MCTS_EXPLORATION = 1.4  # UCT exploration constant
+AI_MCTS_BRANCH_LIMIT = 10  # best-ordered moves expanded per MCTS node
+
 # Room Settings
 MIN_ROOM_ID = 100
 MAX_ROOMS = 100
@@ -24,8 +48,34 @@ MIN_THREADS = 10
 MAX_THREADS = 100
 THREAD_TIMEOUT = 10  # seconds
 
+# Server Mode
+SERVER_MODE = "thread"  # "thread" (one pooled thread per client) or "asyncio" (one event loop)
+ASYNC_BACKLOG = 1024  # pending connections queued by the asyncio listener
+
+# Outbound Queue
+OUTBOUND_QUEUE_LIMIT = 256 * 1024  # bytes queued per client before the slow-consumer policy applies
+OUTBOUND_BATCH_SIZE = 64 * 1024  # most bytes joined into one send
+OUTBOUND_SEND_TIMEOUT = 10  # seconds a send may block before the client is dropped
+SLOW_CONSUMER_POLICY = "drop_chat"  # "drop_chat" (drop chat, disconnect otherwise) or "disconnect"
+
+# Matchmaking (ratings are calculate_mark() values)
+MATCH_BUCKET_SIZE = 25  # rating points per queue bucket
+MATCH_WINDOW_BASE = 20  # rating difference accepted right away
+MATCH_WINDOW_GROWTH = 10  # accepted difference added per second of waiting
+MATCH_WINDOW_MAX = 1000  # largest rating difference ever accepted
+MATCH_INTERVAL = 0.5  # seconds between pairing passes
+
 # Database
 DATABASE_PATH = "database/caro_game.db"
+DB_READER_POOL_SIZE = 8  # most read-only connections open at once
+DB_SYNCHRONOUS = "NORMAL"  # SQLite synchronous setting ("NORMAL" is safe with WAL, "FULL" also survives power loss)
+DB_BUSY_TIMEOUT = 5.0  # seconds a connection waits for a lock held by another
+PRESENCE_SNAPSHOT_INTERVAL = 0  # seconds between copies of online/playing state to SQLite (0 = memory only)
+STATS_FLUSH_INTERVAL = 0.5  # seconds player stat updates are held before one batched write
+STATS_FLUSH_EVENTS = 100  # pending stat updates that trigger a write right away
+STATS_DURABILITY = "batched"  # "batched" (a crash loses at most the pending updates) or "immediate"
+FRIEND_CACHE_SIZE = 10000  # users whose friend sets are kept in memory (least recently used dropped first)
+FRIEND_NICKNAME_CACHE_SIZE = 50000  # friend nicknames kept in memory
 
 # Avatar
 AVATAR_COUNT = 6  # 0.jpg to 5.jpg
@@ -93,6 +143,7 @@ PROTOCOL_ROOM_NOT_FOUND = "room-not-found"
 PROTOCOL_ROOM_WRONG_PASSWORD = "room-wrong-password"
 PROTOCOL_GET_RANK_CHARTS = "get-rank-charts"
 PROTOCOL_RETURN_GET_RANK_CHARTS = "return-get-rank-charts"
+PROTOCOL_RANK_CHARTS_NOT_MODIFIED = "rank-charts-not-modified"
 PROTOCOL_CHECK_FRIEND = "check-friend"
 PROTOCOL_CHECK_FRIEND_RESPONSE = "check-friend-response"
 PROTOCOL_MAKE_FRIEND = "make-friend"
@@ -0,0 +1,200 @@
+"""
+Dispatch - Command dispatch tables for protocol message handlers
+
+A message is routed with one dict lookup on its command instead of a
+chain of string comparisons, so the position of a command in the table
+does not matter and adding commands does not slow the others down.
+"""
+
+import time
+import threading
+
+
+def _adapt(name, argument):
+    """
+    Wrap a handler method into the uniform (owner, message, parts) signature
+
+    The method is looked up on the owner at call time, so subclasses
+    overriding a handler share the table of their base class.
+
+    Args:
+        name: Handler method name
+        argument: 'parts', 'message' or None (handler takes no argument)
+
+    Returns:
+        Callable (owner, message, parts)
+    """
+    if argument == 'parts':
+        return lambda owner, message, parts: getattr(owner, name)(parts)
+    if argument == 'message':
+        return lambda owner, message, parts: getattr(owner, name)(message)
+    return lambda owner, message, parts: getattr(owner, name)()
+
+
+class CommandDispatcher:
+    """Table from protocol command to handler"""
+
+    def __init__(self, handlers=None):
+        """
+        Initialize dispatcher
+
+        Args:
+            handlers: Optional dict from command to callable (owner, message, parts)
+        """
+        self.handlers = dict(handlers or {})
+        self.hooks = []
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        Build a table from a handler spec
+
+        Args:
+            spec: Sequence of (command, method name, argument), argument as
+                in _adapt()
+
+        Returns:
+            CommandDispatcher
+        """
+        return cls({
+            command: _adapt(name, argument)
+            for command, name, argument in spec
+        })
+
+    def register(self, command, handler):
+        """
+        Add or replace the handler of a command
+
+        Args:
+            command: Protocol command string
+            handler: Callable (owner, message, parts)
+        """
+        self.handlers[command] = handler
+
+    def unregister(self, command):
+        """Remove the handler of a command"""
+        self.handlers.pop(command, None)
+
+    def add_hook(self, hook):
+        """
+        Add a metrics hook
+
+        Args:
+            hook: Callable (command, elapsed seconds), called after every
+                handled message
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """Remove a metrics hook"""
+        if hook in self.hooks:
+            self.hooks.remove(hook)
+
+    def dispatch(self, owner, message):
+        """
+        Route one message to its handler
+
+        Args:
+            owner: Object the handler runs on (connection or socket handle)
+            message: Message string
+
+        Returns:
+            True if a handler ran, False for an unknown command
+        """
+        parts = message.split(',')
+        command = parts[0]
+        handler = self.handlers.get(command)
+        if handler is None:
+            return False
+
+        if not self.hooks:
+            handler(owner, message, parts)
+            return True
+
+        start = time.perf_counter()
+        try:
+            handler(owner, message, parts)
+        finally:
+            elapsed = time.perf_counter() - start
+            for hook in self.hooks:
+                hook(command, elapsed)
+        return True
+
+
+class CommandHandlerMixin:
+    """
+    Class-level dispatch table for classes listing COMMAND_HANDLERS
+
+    COMMAND_HANDLERS is a spec as in CommandDispatcher.from_spec. The
+    table belongs to the class defining it and is shared by its
+    subclasses.
+    """
+
+    @classmethod
+    def get_dispatcher(cls):
+        """
+        Get the command dispatch table (built on first use)
+
+        Returns:
+            CommandDispatcher
+        """
+        owner = next(klass for klass in cls.__mro__ if 'COMMAND_HANDLERS' in klass.__dict__)
+        dispatcher = owner.__dict__.get('_dispatcher')
+        if dispatcher is None:
+            dispatcher = CommandDispatcher.from_spec(owner.COMMAND_HANDLERS)
+            owner._dispatcher = dispatcher
+        return dispatcher
+
+    @classmethod
+    def register_handler(cls, command, handler):
+        """
+        Add or replace a command handler for all instances
+
+        Args:
+            command: Protocol command string
+            handler: Callable (owner, message, parts)
+        """
+        cls.get_dispatcher().register(command, handler)
+
+
+class CommandStats:
+    """Metrics hook counting calls and handler time per command"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}  # command -> [count, total seconds, max seconds]
+
+    def __call__(self, command, elapsed):
+        with self.lock:
+            entry = self.stats.get(command)
+            if entry is None:
+                self.stats[command] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                if elapsed > entry[2]:
+                    entry[2] = elapsed
+
+    def snapshot(self):
+        """
+        Get current metrics
+
+        Returns:
+            Dict from command to dict with count, total, average and max
+            handler time in seconds
+        """
+        with self.lock:
+            return {
+                command: {
+                    'count': count,
+                    'total': total,
+                    'average': total / count,
+                    'max': longest,
+                }
+                for command, (count, total, longest) in self.stats.items()
+            }
+
+    def reset(self):
+        """Clear all metrics"""
+        with self.lock:
+            self.stats.clear()
@@ -0,0 +1,100 @@
+"""
+Framing - Newline-delimited message framing for the socket protocol
+
+TCP is a byte stream: one recv() may hold several messages or part of
+one. LineDecoder buffers received bytes and hands out complete lines
+only, however the stream was split.
+"""
+
+from shared.constants import *
+
+
+class FrameTooLarge(ValueError):
+    """Raised when a message grows past the frame size limit"""
+    pass
+
+
+def encode_line(message):
+    """
+    Encode one message for sending
+
+    Args:
+        message: Message string (without newline)
+
+    Returns:
+        Bytes of the message followed by a newline
+    """
+    return (message + '\n').encode(ENCODING)
+
+
+class LineDecoder:
+    """
+    Incremental newline-delimited message decoder
+
+    Received data is appended to one bytearray and lines are decoded
+    straight from memoryview slices of it; consumed bytes are dropped
+    once per feed() call, not once per line.
+    """
+
+    def __init__(self, max_frame=MAX_FRAME_SIZE, encoding=ENCODING):
+        """
+        Initialize decoder
+
+        Args:
+            max_frame: Longest accepted message in bytes
+            encoding: Text encoding of the messages
+        """
+        self.max_frame = max_frame
+        self.encoding = encoding
+        self.buffer = bytearray()
+        # Bytes at the start of the buffer already known to hold no newline
+        self.scanned = 0
+
+    def feed(self, data):
+        """
+        Add received bytes and return the messages they complete
+
+        Args:
+            data: Bytes-like object (bytes, bytearray or memoryview)
+
+        Returns:
+            List of message strings, stripped, empty lines skipped
+
+        Raises:
+            FrameTooLarge: If a message exceeds max_frame bytes
+        """
+        buffer = self.buffer
+        buffer += data
+        messages = []
+        start = 0
+        end = buffer.find(b'\n', self.scanned)
+        if end >= 0:
+            view = memoryview(buffer)
+            try:
+                while end >= 0:
+                    if end - start > self.max_frame:
+                        self.reset()
+                        raise FrameTooLarge(f"Message of {end - start} bytes exceeds {self.max_frame}")
+                    message = str(view[start:end], self.encoding, 'replace').strip()
+                    if message:
+                        messages.append(message)
+                    start = end + 1
+                    end = buffer.find(b'\n', start)
+            finally:
+                view.release()
+            del buffer[:start]
+
+        if len(buffer) > self.max_frame:
+            self.reset()
+            raise FrameTooLarge(f"Unterminated message exceeds {self.max_frame} bytes")
+        self.scanned = len(buffer)
+        return messages
+
+    def pending(self):
+        """Number of buffered bytes of an incomplete message"""
+        return len(self.buffer)
+
+    def reset(self):
+        """Drop buffered data"""
+        self.buffer = bytearray()
+        self.scanned = 0
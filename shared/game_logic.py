@@ -6,6 +6,500 @@ from shared.constants import *
 from shared.point import Point
 import random
 
+# Bitboard layout: cell (x, y) maps to bit x * BITBOARD_WIDTH + y. Every row is
+# padded with one guard column that never holds a stone, so shifting a board
+# along any line direction cannot wrap a run from one row into the next.
+BITBOARD_WIDTH = BOARD_SIZE + 1
+
+# Bit shift for one step along each line direction
+BITBOARD_SHIFTS = (
+    1,                    # Horizontal
+    BITBOARD_WIDTH,       # Vertical
+    BITBOARD_WIDTH + 1,   # Diagonal \
+    BITBOARD_WIDTH - 1,   # Diagonal /
+)
+
+# All playable cells (guard column excluded)
+BITBOARD_MASK = 0
+for _x in range(BOARD_SIZE):
+    BITBOARD_MASK |= ((1 << BOARD_SIZE) - 1) << (_x * BITBOARD_WIDTH)
+
+
+def _build_five_masks():
+    """
+    For every cell and direction, precompute the bits where a run of
+    WIN_CONDITION stones covering that cell may start
+    """
+    masks = {}
+    for x in range(BOARD_SIZE):
+        for y in range(BOARD_SIZE):
+            index = x * BITBOARD_WIDTH + y
+            cell_masks = []
+            for shift in BITBOARD_SHIFTS:
+                mask = 0
+                for k in range(WIN_CONDITION):
+                    start = index - k * shift
+                    if start >= 0:
+                        mask |= 1 << start
+                cell_masks.append((shift, mask & BITBOARD_MASK))
+            masks[index] = tuple(cell_masks)
+    return masks
+
+
+_FIVE_MASKS = _build_five_masks()
+
+
+def _build_zobrist_keys():
+    """Random 64-bit key per (player, cell), indexed by player marker"""
+    rng = random.Random(AI_ZOBRIST_SEED)
+    size = BOARD_SIZE * BITBOARD_WIDTH
+    return [
+        None,
+        [rng.getrandbits(64) for _ in range(size)],
+        [rng.getrandbits(64) for _ in range(size)],
+    ]
+
+
+# Zobrist keys: the hash of a position is the XOR of the keys of its stones
+ZOBRIST_KEYS = _build_zobrist_keys()
+
+
+def _build_neighbourhoods():
+    """
+    For every cell, the cells up to AI_CANDIDATE_DISTANCE away along the
+    4 line directions (the only cells a stone can form a pattern with)
+    """
+    neighbourhoods = {}
+    for x in range(BOARD_SIZE):
+        for y in range(BOARD_SIZE):
+            cells = []
+            for dx, dy in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                for step in range(1, AI_CANDIDATE_DISTANCE + 1):
+                    for sign in (1, -1):
+                        nx, ny = x + sign * step * dx, y + sign * step * dy
+                        if 0 <= nx < BOARD_SIZE and 0 <= ny < BOARD_SIZE:
+                            cells.append(nx * BITBOARD_WIDTH + ny)
+            neighbourhoods[x * BITBOARD_WIDTH + y] = tuple(cells)
+    return neighbourhoods
+
+
+_NEIGHBOURHOODS = _build_neighbourhoods()
+
+
+def iter_bits(mask):
+    """
+    Iterate over the indexes of set bits, lowest first
+    
+    Args:
+        mask: Bitboard integer
+    
+    Yields:
+        Bit index of each set bit
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Bitboard:
+    """
+    Compact board representation: one Python int per player
+    
+    Win detection is done with shift-and-AND masks instead of walking
+    the board cell by cell. Use Bitboard.from_board() to adapt the
+    list-of-lists boards used by the GUI.
+    """
+    
+    def __init__(self):
+        # Indexed by player marker (index 0 unused)
+        self.stones = [0, 0, 0]
+    
+    @staticmethod
+    def from_board(board):
+        """
+        Build a bitboard from a 2D list board
+        
+        Args:
+            board: 2D array representing the game board
+        
+        Returns:
+            Bitboard with the same stones
+        """
+        bitboard = Bitboard()
+        stones = bitboard.stones
+        for x in range(BOARD_SIZE):
+            row = board[x]
+            base = x * BITBOARD_WIDTH
+            for y in range(BOARD_SIZE):
+                player = row[y]
+                if player:
+                    stones[player] |= 1 << (base + y)
+        return bitboard
+    
+    def to_board(self):
+        """Convert back to a 2D list board"""
+        board = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+        for player in (1, 2):
+            for index in iter_bits(self.stones[player]):
+                x, y = divmod(index, BITBOARD_WIDTH)
+                board[x][y] = player
+        return board
+    
+    def copy(self):
+        """Return an independent copy"""
+        bitboard = Bitboard()
+        bitboard.stones = self.stones[:]
+        return bitboard
+    
+    def get(self, x, y):
+        """Get player marker at (x, y), 0 if empty"""
+        bit = 1 << (x * BITBOARD_WIDTH + y)
+        if self.stones[1] & bit:
+            return 1
+        if self.stones[2] & bit:
+            return 2
+        return 0
+    
+    def place(self, x, y, player):
+        """Put a stone of player at (x, y)"""
+        self.stones[player] |= 1 << (x * BITBOARD_WIDTH + y)
+    
+    def remove(self, x, y, player):
+        """Take the stone of player at (x, y) off the board"""
+        self.stones[player] &= ~(1 << (x * BITBOARD_WIDTH + y))
+    
+    def occupied(self):
+        """Bitmask of all stones"""
+        return self.stones[1] | self.stones[2]
+    
+    def empty(self):
+        """Bitmask of all empty playable cells"""
+        return BITBOARD_MASK & ~(self.stones[1] | self.stones[2])
+    
+    def neighbours(self):
+        """Bitmask of empty cells adjacent (8 directions) to any stone"""
+        occupied = self.stones[1] | self.stones[2]
+        spread = occupied
+        for shift in BITBOARD_SHIFTS:
+            spread |= (occupied << shift) | (occupied >> shift)
+        return spread & BITBOARD_MASK & ~occupied
+    
+    def is_win(self, x, y, player):
+        """
+        Check if player has WIN_CONDITION in a row through (x, y)
+        
+        Args:
+            x: Row position
+            y: Column position
+            player: Player marker (1 for X, 2 for O)
+        
+        Returns:
+            True if a winning line covers (x, y), False otherwise
+        """
+        stones = self.stones[player]
+        for shift, mask in _FIVE_MASKS[x * BITBOARD_WIDTH + y]:
+            pairs = stones & (stones >> shift)
+            fours = pairs & (pairs >> (2 * shift))
+            if fours & (stones >> (4 * shift)) & mask:
+                return True
+        return False
+    
+    def has_five(self, player):
+        """Check if player has WIN_CONDITION in a row anywhere on the board"""
+        stones = self.stones[player]
+        for shift in BITBOARD_SHIFTS:
+            pairs = stones & (stones >> shift)
+            fours = pairs & (pairs >> (2 * shift))
+            if fours & (stones >> (4 * shift)):
+                return True
+        return False
+    
+    def run_lengths(self, x, y, player):
+        """
+        Length of the run of player stones through (x, y) in each direction
+        
+        Args:
+            x, y: Position (assumed to hold a stone of player)
+            player: Player marker
+        
+        Returns:
+            Tuple of 4 run lengths, in BITBOARD_SHIFTS order
+        """
+        stones = self.stones[player]
+        index = x * BITBOARD_WIDTH + y
+        runs = []
+        for shift in BITBOARD_SHIFTS:
+            count = 1
+            bit = index + shift
+            while (stones >> bit) & 1:
+                count += 1
+                bit += shift
+            bit = index - shift
+            while bit >= 0 and (stones >> bit) & 1:
+                count += 1
+                bit -= shift
+            runs.append(count)
+        return tuple(runs)
+    
+    def longest_run(self, x, y, player):
+        """Length of the longest run of player stones through (x, y)"""
+        return max(self.run_lengths(x, y, player))
+    
+    def line_cells(self, x, y, player, direction):
+        """
+        Collect the run of player stones through (x, y) along one direction
+        
+        Args:
+            x, y: Position (assumed to hold a stone of player)
+            player: Player marker
+            direction: Index into BITBOARD_SHIFTS
+        
+        Returns:
+            List of Point objects forming the run
+        """
+        stones = self.stones[player]
+        shift = BITBOARD_SHIFTS[direction]
+        index = x * BITBOARD_WIDTH + y
+        cells = [Point(x, y)]
+        bit = index + shift
+        while (stones >> bit) & 1:
+            cells.append(Point(*divmod(bit, BITBOARD_WIDTH)))
+            bit += shift
+        bit = index - shift
+        while bit >= 0 and (stones >> bit) & 1:
+            cells.append(Point(*divmod(bit, BITBOARD_WIDTH)))
+            bit -= shift
+        return cells
+
+
+class BoardState:
+    """
+    Stateful game board updated incrementally on every move
+    
+    Keeps a 2D list view (so board[x][y] reads keep working), a Bitboard,
+    the set of empty cells, the set of candidate moves (empty cells near a
+    stone), the Zobrist hash of the position and the run lengths created
+    by each move. An optional pattern evaluator attached
+    as `patterns` (see shared.pattern_eval) is updated along with it.
+    play() and undo() are O(1), so checking for a win, a full board or
+    listing moves never rescans the whole board.
+    """
+    
+    def __init__(self, first_player=1):
+        """
+        Initialize an empty board
+        
+        Args:
+            first_player: Player marker that moves first (1 or 2)
+        """
+        self.cells = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+        self.bitboard = Bitboard()
+        self.empty_cells = set(iter_bits(BITBOARD_MASK))
+        self.empty_count = BOARD_SIZE * BOARD_SIZE
+        # Number of stones in each cell's neighbourhood, and the empty cells
+        # where it is non-zero
+        self.near_counts = [0] * (BOARD_SIZE * BITBOARD_WIDTH)
+        self.candidates = set()
+        self.first_player = first_player
+        # Each entry: (x, y, player, run_lengths)
+        self.history = []
+        self.winner = 0
+        self.hash = 0
+        self.patterns = None
+    
+    @staticmethod
+    def from_board(board, first_player=1):
+        """
+        Build a board state from a 2D list board
+        
+        Args:
+            board: 2D array representing the game board
+            first_player: Player marker that moved first
+        
+        Returns:
+            BoardState with the same stones (move order is not known,
+            so undo() is only possible for moves played afterwards)
+        """
+        state = BoardState(first_player)
+        count = 0
+        for x in range(BOARD_SIZE):
+            for y in range(BOARD_SIZE):
+                player = board[x][y]
+                if player:
+                    state._add_stone(x, y, player)
+                    count += 1
+        # Stones already on the board decide whose turn it is
+        if count % 2:
+            state.first_player = 3 - first_player
+        return state
+    
+    def __getitem__(self, x):
+        return self.cells[x]
+    
+    def copy(self):
+        """Return an independent copy"""
+        state = BoardState(self.first_player)
+        state.cells = [row[:] for row in self.cells]
+        state.bitboard = self.bitboard.copy()
+        state.empty_cells = set(self.empty_cells)
+        state.empty_count = self.empty_count
+        state.near_counts = self.near_counts[:]
+        state.candidates = set(self.candidates)
+        state.history = self.history[:]
+        state.winner = self.winner
+        state.hash = self.hash
+        if self.patterns is not None:
+            state.patterns = self.patterns.copy()
+        return state
+    
+    def to_board(self):
+        """Return a 2D list copy of the board"""
+        return [row[:] for row in self.cells]
+    
+    def get_current_player(self):
+        """Player marker whose turn it is"""
+        if self.history:
+            return 3 - self.history[-1][2]
+        return self.first_player
+    
+    def get_last_move(self):
+        """Last move as Point, or None"""
+        if self.history:
+            x, y = self.history[-1][:2]
+            return Point(x, y)
+        return None
+    
+    def get_move_count(self):
+        return len(self.history)
+    
+    def play(self, x, y, player=None):
+        """
+        Play a move
+        
+        Args:
+            x, y: Position
+            player: Player marker, defaults to the side to move
+        
+        Returns:
+            True if this move wins the game, False otherwise
+        
+        Raises:
+            ValueError: If the cell is outside the board or occupied
+        """
+        if not (0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE) or self.cells[x][y] != 0:
+            raise ValueError(f"Invalid move ({x}, {y})")
+        if player is None:
+            player = self.get_current_player()
+        
+        self._add_stone(x, y, player)
+        
+        runs = self.bitboard.run_lengths(x, y, player)
+        self.history.append((x, y, player, runs))
+        if not self.winner and max(runs) >= WIN_CONDITION:
+            self.winner = player
+            return True
+        return False
+    
+    def undo(self):
+        """
+        Take back the last move
+        
+        Returns:
+            Point of the move taken back, or None if there is none
+        """
+        if not self.history:
+            return None
+        x, y, player, runs = self.history.pop()
+        
+        self._remove_stone(x, y, player)
+        
+        # The player may still have an earlier five
+        if self.winner == player and max(runs) >= WIN_CONDITION and not self.bitboard.has_five(player):
+            self.winner = 0
+        return Point(x, y)
+    
+    def _add_stone(self, x, y, player):
+        """Put a stone on the board and update every incremental structure"""
+        index = x * BITBOARD_WIDTH + y
+        self.cells[x][y] = player
+        self.bitboard.place(x, y, player)
+        self.empty_cells.discard(index)
+        self.empty_count -= 1
+        self.hash ^= ZOBRIST_KEYS[player][index]
+        
+        near_counts = self.near_counts
+        candidates = self.candidates
+        empty_cells = self.empty_cells
+        candidates.discard(index)
+        for cell in _NEIGHBOURHOODS[index]:
+            near_counts[cell] += 1
+            if near_counts[cell] == 1 and cell in empty_cells:
+                candidates.add(cell)
+        
+        if self.patterns is not None:
+            self.patterns.play(index, player)
+    
+    def _remove_stone(self, x, y, player):
+        """Take a stone off the board and update every incremental structure"""
+        index = x * BITBOARD_WIDTH + y
+        self.cells[x][y] = 0
+        self.bitboard.remove(x, y, player)
+        self.empty_cells.add(index)
+        self.empty_count += 1
+        self.hash ^= ZOBRIST_KEYS[player][index]
+        
+        near_counts = self.near_counts
+        candidates = self.candidates
+        for cell in _NEIGHBOURHOODS[index]:
+            near_counts[cell] -= 1
+            if near_counts[cell] == 0:
+                candidates.discard(cell)
+        if near_counts[index]:
+            candidates.add(index)
+        
+        if self.patterns is not None:
+            self.patterns.undo(index, player)
+    
+    def get_candidates(self):
+        """
+        Candidate moves: empty cells within AI_CANDIDATE_DISTANCE of a stone
+        along a line, or the center cell on an empty board
+        
+        Returns:
+            List of cell indexes (bitboard layout)
+        """
+        if self.empty_count == BOARD_SIZE * BOARD_SIZE:
+            center = BOARD_SIZE // 2
+            return [center * BITBOARD_WIDTH + center]
+        return list(self.candidates)
+    
+    def is_win(self, x, y, player):
+        """Check if player has a winning line through (x, y)"""
+        return self.bitboard.is_win(x, y, player)
+    
+    def is_full(self):
+        """Check if no empty cell is left"""
+        return self.empty_count == 0
+    
+    def get_winning_cells(self):
+        """
+        Cells of the winning line created by the winning move
+        
+        Returns:
+            List of Point objects, or empty list if nobody has won
+        """
+        for x, y, player, runs in reversed(self.history):
+            if player == self.winner and max(runs) >= WIN_CONDITION:
+                direction = runs.index(max(runs))
+                return self.bitboard.line_cells(x, y, player, direction)
+        return []
+    
+    def get_valid_moves(self):
+        """List of Point objects for all empty cells"""
+        return [Point(*divmod(index, BITBOARD_WIDTH)) for index in self.empty_cells]
+
+
 class GameLogic:
     """Core game logic for Caro game"""
     
@@ -23,6 +517,9 @@ class GameLogic:
         Returns:
             True if this move wins the game, False otherwise
         """
+        if isinstance(board, (Bitboard, BoardState)):
+            return board.is_win(x, y, player)
+        
         directions = [
             (0, 1),   # Horizontal
             (1, 0),   # Vertical
@@ -83,6 +580,14 @@ class GameLogic:
         Returns:
             List of Point objects forming the winning line, or empty list
         """
+        if isinstance(board, (Bitboard, BoardState)):
+            if isinstance(board, BoardState):
+                board = board.bitboard
+            runs = board.run_lengths(x, y, player)
+            if board.get(x, y) != player or max(runs) < WIN_CONDITION:
+                return []
+            return board.line_cells(x, y, player, runs.index(max(runs)))
+        
         directions = [
             (0, 1),   # Horizontal
             (1, 0),   # Vertical
@@ -127,6 +632,11 @@ class GameLogic:
         Returns:
             True if board is full, False otherwise
         """
+        if isinstance(board, BoardState):
+            return board.is_full()
+        if isinstance(board, Bitboard):
+            return board.empty() == 0
+        
         for row in board:
             for cell in row:
                 if cell == 0:  # Empty cell
@@ -144,6 +654,11 @@ class GameLogic:
         Returns:
             List of Point objects representing valid moves
         """
+        if isinstance(board, BoardState):
+            return board.get_valid_moves()
+        if isinstance(board, Bitboard):
+            return [Point(*divmod(index, BITBOARD_WIDTH)) for index in iter_bits(board.empty())]
+        
         valid_moves = []
         for x in range(BOARD_SIZE):
             for y in range(BOARD_SIZE):
@@ -161,103 +676,97 @@ class SimpleAI:
         Get the best move for AI using simple strategy
         
         Strategy:
+        0. Play the opening book move if the position is in the book
         1. Check if AI can win in next move
         2. Check if need to block human from winning
         3. Look for good offensive positions
         4. Random move near existing pieces
         
         Args:
-            board: 2D array representing the game board
+            board: 2D array, Bitboard or BoardState representing the game board
             ai_player: AI's player marker (1 or 2)
             human_player: Human's player marker (1 or 2)
         
         Returns:
             Point object representing the best move
         """
+        # Work on a bitboard copy so trial moves never touch the caller's board
+        if isinstance(board, BoardState):
+            bitboard = board.bitboard.copy()
+        elif isinstance(board, Bitboard):
+            bitboard = board.copy()
+        else:
+            bitboard = Bitboard.from_board(board)
+        
+        # 0. Opening book (imported here: the book module builds on this one)
+        from shared.opening_book import get_opening_book
+        book_move = get_opening_book().get_move(bitboard, ai_player)
+        if book_move:
+            return book_move
+        
         # 1. Check if AI can win
-        winning_move = SimpleAI._find_winning_move(board, ai_player)
+        winning_move = SimpleAI._find_winning_move(bitboard, ai_player)
         if winning_move:
             return winning_move
         
         # 2. Block human from winning
-        blocking_move = SimpleAI._find_winning_move(board, human_player)
+        blocking_move = SimpleAI._find_winning_move(bitboard, human_player)
         if blocking_move:
             return blocking_move
         
         # 3. Find offensive move (create threat)
-        offensive_move = SimpleAI._find_offensive_move(board, ai_player)
+        offensive_move = SimpleAI._find_offensive_move(bitboard, ai_player)
         if offensive_move:
             return offensive_move
         
         # 4. Move near existing pieces
-        nearby_move = SimpleAI._find_nearby_move(board)
+        nearby_move = SimpleAI._find_nearby_move(bitboard)
         if nearby_move:
             return nearby_move
         
         # 5. Random move (fallback)
-        valid_moves = GameLogic.get_valid_moves(board)
+        valid_moves = GameLogic.get_valid_moves(bitboard)
         if valid_moves:
             return random.choice(valid_moves)
         
         return None
     
     @staticmethod
-    def _find_winning_move(board, player):
+    def _find_winning_move(bitboard, player):
         """Find a move that wins the game"""
-        for x in range(BOARD_SIZE):
-            for y in range(BOARD_SIZE):
-                if board[x][y] == 0:
-                    # Try this move
-                    board[x][y] = player
-                    if GameLogic.check_win(board, x, y, player):
-                        board[x][y] = 0  # Undo
-                        return Point(x, y)
-                    board[x][y] = 0  # Undo
+        # A winning cell always touches an existing stone
+        for index in iter_bits(bitboard.neighbours()):
+            x, y = divmod(index, BITBOARD_WIDTH)
+            # Try this move
+            bitboard.place(x, y, player)
+            won = bitboard.is_win(x, y, player)
+            bitboard.remove(x, y, player)  # Undo
+            if won:
+                return Point(x, y)
         return None
     
     @staticmethod
-    def _find_offensive_move(board, player):
+    def _find_offensive_move(bitboard, player):
         """Find a move that creates a strong threat (3 in a row)"""
-        for x in range(BOARD_SIZE):
-            for y in range(BOARD_SIZE):
-                if board[x][y] == 0:
-                    # Try this move
-                    board[x][y] = player
-                    threat_count = SimpleAI._count_threats(board, x, y, player)
-                    board[x][y] = 0  # Undo
-                    
-                    if threat_count >= 3:  # Creates 3+ in a row
-                        return Point(x, y)
+        for index in iter_bits(bitboard.neighbours()):
+            x, y = divmod(index, BITBOARD_WIDTH)
+            # Try this move
+            bitboard.place(x, y, player)
+            threat_count = SimpleAI._count_threats(bitboard, x, y, player)
+            bitboard.remove(x, y, player)  # Undo
+            
+            if threat_count >= 3:  # Creates 3+ in a row
+                return Point(x, y)
         return None
     
     @staticmethod
-    def _count_threats(board, x, y, player):
+    def _count_threats(bitboard, x, y, player):
         """Count consecutive pieces for threat evaluation"""
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        max_count = 0
-        
-        for dx, dy in directions:
-            count = 1
-            count += GameLogic._count_consecutive(board, x, y, dx, dy, player)
-            count += GameLogic._count_consecutive(board, x, y, -dx, -dy, player)
-            max_count = max(max_count, count)
-        
-        return max_count
+        return bitboard.longest_run(x, y, player)
     
     @staticmethod
-    def _find_nearby_move(board):
+    def _find_nearby_move(bitboard):
         """Find a move near existing pieces"""
-        for x in range(BOARD_SIZE):
-            for y in range(BOARD_SIZE):
-                if board[x][y] != 0:
-                    # Check adjacent cells
-                    for dx in [-1, 0, 1]:
-                        for dy in [-1, 0, 1]:
-                            if dx == 0 and dy == 0:
-                                continue
-                            nx, ny = x + dx, y + dy
-                            if (0 <= nx < BOARD_SIZE and 
-                                0 <= ny < BOARD_SIZE and 
-                                board[nx][ny] == 0):
-                                return Point(nx, ny)
+        for index in iter_bits(bitboard.neighbours()):
+            return Point(*divmod(index, BITBOARD_WIDTH))
         return None
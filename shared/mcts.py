@@ -0,0 +1,302 @@
+"""
+MCTS - Monte Carlo Tree Search engine for the AI opponent
+
+UCT tree search whose leaves are rated by random playouts. Playouts run
+in batches: with NumPy, a batch is a stack of boards filled in random
+order all at once, and the winner of each is the player whose first
+five-in-a-row window completes earliest (window completion times come
+from strided slices, so no game is played move by move). Without NumPy
+the same number of games is played out one by one on bitboards.
+"""
+
+import math
+import random
+import time
+from shared.constants import *
+from shared.point import Point
+from shared.game_logic import BITBOARD_WIDTH
+from shared.pattern_eval import PatternState, SHAPE_FIVE
+from shared.ai_search import AlphaBetaAI
+from shared.opening_book import get_opening_book
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Completion time of a window that never completes
+_NEVER = BOARD_SIZE * BOARD_SIZE + 1
+
+
+def _window_slices():
+    """Index slices of the 5 cells of every window, per direction"""
+    span = BOARD_SIZE - WIN_CONDITION + 1
+    full = slice(0, BOARD_SIZE)
+    directions = []
+    for dx, dy in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        cells = []
+        for k in range(WIN_CONDITION):
+            rows = slice(k, k + span) if dx else full
+            if dy > 0:
+                cols = slice(k, k + span)
+            elif dy < 0:
+                cols = slice(WIN_CONDITION - 1 - k, WIN_CONDITION - 1 - k + span)
+            else:
+                cols = full
+            cells.append((slice(None), rows, cols))
+        directions.append(cells)
+    return directions
+
+
+_WINDOWS = _window_slices()
+
+
+def batch_playouts(board, player, count, rng):
+    """
+    Play count random games to the end from one position with NumPy
+
+    Args:
+        board: 2D array (BOARD_SIZE x BOARD_SIZE) of 0/1/2, nobody has won
+        player: Player marker to move
+        count: Number of games
+        rng: numpy.random.Generator
+
+    Returns:
+        List [draws, wins of player 1, wins of player 2]
+    """
+    flat = np.asarray(board, dtype=np.int8).reshape(-1)
+    empty = np.flatnonzero(flat == 0)
+    if len(empty) == 0:
+        return [count, 0, 0]
+
+    # Fill order: rank r of an empty cell means it is the r-th move played
+    ranks = rng.permuted(np.tile(np.arange(len(empty), dtype=np.int16), (count, 1)), axis=1)
+    times = np.full((count, flat.size), -1, dtype=np.int16)
+    times[:, empty] = ranks
+    owners = np.repeat(flat[np.newaxis, :], count, axis=0)
+    owners[:, empty] = np.where(ranks % 2 == 0, player, 3 - player)
+
+    shape = (count, BOARD_SIZE, BOARD_SIZE)
+    times = times.reshape(shape)
+    owners = owners.reshape(shape)
+
+    finish = []
+    for marker in (1, 2):
+        own = owners == marker
+        first = np.full(count, _NEVER, dtype=np.int16)
+        for cells in _WINDOWS:
+            complete = np.logical_and.reduce([own[s] for s in cells])
+            done_at = np.maximum.reduce([times[s] for s in cells])
+            done_at = np.where(complete, done_at, _NEVER)
+            first = np.minimum(first, done_at.reshape(count, -1).min(axis=1))
+        finish.append(first)
+
+    wins_1 = int(np.count_nonzero(finish[0] < finish[1]))
+    wins_2 = int(np.count_nonzero(finish[1] < finish[0]))
+    return [count - wins_1 - wins_2, wins_1, wins_2]
+
+
+def python_playouts(state, player, count, rng):
+    """
+    Play count random games to the end one by one (no NumPy)
+
+    Args:
+        state: BoardState, nobody has won
+        player: Player marker to move
+        count: Number of games
+        rng: random.Random
+
+    Returns:
+        List [draws, wins of player 1, wins of player 2]
+    """
+    results = [0, 0, 0]
+    empties = list(state.empty_cells)
+    for _ in range(count):
+        bitboard = state.bitboard.copy()
+        rng.shuffle(empties)
+        winner = 0
+        mover = player
+        for index in empties:
+            x, y = divmod(index, BITBOARD_WIDTH)
+            bitboard.place(x, y, mover)
+            if bitboard.is_win(x, y, mover):
+                winner = mover
+                break
+            mover = 3 - mover
+        results[winner] += 1
+    return results
+
+
+class _Node:
+    """Search tree node: the position after player played move"""
+
+    def __init__(self, move, player, parent=None):
+        self.move = move
+        self.player = player
+        self.parent = parent
+        self.children = []
+        self.untried = None  # Moves not expanded yet (filled on first visit)
+        self.terminal = None  # Winner (or 0 for a draw) if the game is over
+        self.visits = 0
+        self.wins = 0.0  # From the point of view of player
+
+    def select_child(self, exploration):
+        """Child with the highest UCT value"""
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits
+            + exploration * math.sqrt(log_visits / child.visits),
+        )
+
+
+class MCTSAI:
+    """
+    UCT Monte Carlo Tree Search with batched random playouts
+
+    Usable anywhere SimpleAI is: get_best_move(board, ai_player,
+    human_player) returns the most visited root move when time runs out.
+    """
+
+    def __init__(self, time_limit=AI_TIME_LIMIT, batch_size=AI_MCTS_BATCH,
+                 exploration=AI_MCTS_EXPLORATION, branch_limit=AI_MCTS_BRANCH_LIMIT, seed=None,
+                 use_book=True):
+        """
+        Initialize search engine
+
+        Args:
+            time_limit: Wall-clock budget per move in seconds
+            batch_size: Playouts per expanded leaf
+            exploration: UCT exploration constant
+            branch_limit: Best pattern-ordered moves expanded per node
+            seed: Random seed (None for a random one)
+            use_book: Play opening book moves without searching
+        """
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self.branch_limit = branch_limit
+        self.rng = np.random.default_rng(seed) if np is not None else random.Random(seed)
+        self.book = get_opening_book() if use_book else None
+
+        # Statistics of the last search
+        self.last_iterations = 0
+        self.last_playouts = 0
+
+    def get_best_move(self, board, ai_player, human_player):
+        """
+        Get the best move for AI
+
+        Args:
+            board: 2D array, Bitboard or BoardState representing the game board
+            ai_player: AI's player marker (1 or 2)
+            human_player: Human's player marker (1 or 2)
+
+        Returns:
+            Point object representing the best move, or None if board is full
+        """
+        state = AlphaBetaAI._make_state(board)
+        index = self.search(state, ai_player)
+        if index is None:
+            return None
+        return Point(*divmod(index, BITBOARD_WIDTH))
+
+    def close(self):
+        """Release engine resources (nothing to do for MCTS)"""
+        pass
+
+    def search(self, state, player):
+        """
+        Run tree search until the time budget is used up
+
+        Args:
+            state: BoardState to search (restored before returning); a
+                pattern evaluator is attached to it if it has none
+            player: Player marker to move
+
+        Returns:
+            Cell index of the best move, or None if there is no move
+        """
+        deadline = time.time() + self.time_limit
+        self.last_iterations = 0
+        self.last_playouts = 0
+        if state.patterns is None:
+            state.patterns = PatternState.from_state(state)
+        if state.is_full() or state.winner:
+            return None
+
+        if self.book is not None:
+            book_move = self.book.lookup(state.bitboard, player)
+            if book_move is not None:
+                return book_move
+
+        forced = self._find_forced_move(state, player)
+        if forced is not None:
+            return forced
+
+        root = _Node(-1, 3 - player)
+        root_ply = state.get_move_count()
+        while True:
+            self._iterate(root, state)
+            while state.get_move_count() > root_ply:
+                state.undo()
+            self.last_iterations += 1
+            if time.time() >= deadline:
+                break
+
+        if not root.children:
+            return state.get_candidates()[0]
+        return max(root.children, key=lambda child: child.visits).move
+
+    def _iterate(self, root, state):
+        """One selection, expansion, simulation and backup pass"""
+        node = root
+        # Selection: descend while the node is fully expanded
+        while node.terminal is None and node.untried is not None and not node.untried and node.children:
+            node = node.select_child(self.exploration)
+            x, y = divmod(node.move, BITBOARD_WIDTH)
+            state.play(x, y, node.player)
+
+        if node.terminal is None:
+            if node.untried is None:
+                node.untried = state.patterns.order_moves(
+                    state.get_candidates(), 3 - node.player, self.branch_limit)
+            if node.untried:
+                # Expansion: best-ordered move first
+                move = node.untried.pop(0)
+                child = _Node(move, 3 - node.player, node)
+                node.children.append(child)
+                node = child
+                x, y = divmod(move, BITBOARD_WIDTH)
+                if state.play(x, y, node.player):
+                    node.terminal = node.player
+                elif state.is_full():
+                    node.terminal = 0
+
+        # Simulation
+        if node.terminal is not None:
+            results = [0, 0, 0]
+            results[node.terminal] = self.batch_size
+        elif np is not None:
+            results = batch_playouts(state.cells, 3 - node.player, self.batch_size, self.rng)
+        else:
+            results = python_playouts(state, 3 - node.player, self.batch_size, self.rng)
+        self.last_playouts += self.batch_size
+
+        # Backup
+        draws = results[0] * 0.5
+        while node is not None:
+            node.visits += self.batch_size
+            node.wins += results[node.player] + draws
+            node = node.parent
+
+    @staticmethod
+    def _find_forced_move(state, player):
+        """Own winning move, else the cell blocking an opponent win"""
+        patterns = state.patterns
+        moves = state.get_candidates()
+        for target in (player, 3 - player):
+            for index in moves:
+                if patterns.get_move_shape(index, target) == SHAPE_FIVE:
+                    return index
+        return None
@@ -0,0 +1,254 @@
+"""
+Opening Book - Precomputed AI moves for the first plies
+
+The book is a binary file of fixed-size records sorted by position key,
+memory-mapped and binary-searched, so lookups cost a few reads and the
+file is never parsed. Positions are stored once for all 8 rotations and
+reflections of the board, and from the point of view of the side to move,
+so one entry serves both colours.
+
+File layout: magic b'COB1', record count (uint32), then records of
+(position key uint64, canonical move uint16, weight uint16), little-endian.
+"""
+
+import os
+import mmap
+import struct
+from shared.constants import *
+from shared.utils import log, get_project_root, create_dirs_if_not_exists
+from shared.point import Point
+from shared.game_logic import Bitboard, BoardState, BITBOARD_WIDTH, ZOBRIST_KEYS, iter_bits
+
+_MAGIC = b'COB1'
+_HEADER = struct.Struct('<4sI')
+_RECORD = struct.Struct('<QHH')
+_KEY = struct.Struct('<Q')
+
+
+def _build_symmetries():
+    """
+    Cell index maps of the 8 board symmetries and their inverses
+
+    Returns:
+        (maps, inverses), each a list of 8 dicts from cell index to cell index
+    """
+    last = BOARD_SIZE - 1
+    transforms = (
+        lambda x, y: (x, y),
+        lambda x, y: (y, last - x),
+        lambda x, y: (last - x, last - y),
+        lambda x, y: (last - y, x),
+        lambda x, y: (x, last - y),
+        lambda x, y: (last - x, y),
+        lambda x, y: (y, x),
+        lambda x, y: (last - y, last - x),
+    )
+    maps = []
+    inverses = []
+    for transform in transforms:
+        forward = {}
+        backward = {}
+        for x in range(BOARD_SIZE):
+            for y in range(BOARD_SIZE):
+                nx, ny = transform(x, y)
+                forward[x * BITBOARD_WIDTH + y] = nx * BITBOARD_WIDTH + ny
+                backward[nx * BITBOARD_WIDTH + ny] = x * BITBOARD_WIDTH + y
+        maps.append(forward)
+        inverses.append(backward)
+    return maps, inverses
+
+
+SYMMETRIES, INVERSE_SYMMETRIES = _build_symmetries()
+
+
+def canonical_key(own, other):
+    """
+    Symmetry-independent key of a position
+
+    Args:
+        own: Stone bitmask of the side to move
+        other: Stone bitmask of the other side
+
+    Returns:
+        Tuple (key, symmetry): the smallest Zobrist hash over the 8
+        symmetries, and the index of the symmetry that gives it
+    """
+    own_cells = list(iter_bits(own))
+    other_cells = list(iter_bits(other))
+    own_keys = ZOBRIST_KEYS[1]
+    other_keys = ZOBRIST_KEYS[2]
+    best = None
+    for symmetry, cell_map in enumerate(SYMMETRIES):
+        key = 0
+        for index in own_cells:
+            key ^= own_keys[cell_map[index]]
+        for index in other_cells:
+            key ^= other_keys[cell_map[index]]
+        if best is None or key < best[0]:
+            best = (key, symmetry)
+    return best
+
+
+def position_key(bitboard, player):
+    """
+    canonical_key() of a bitboard with player to move
+
+    Args:
+        bitboard: Bitboard
+        player: Player marker to move
+
+    Returns:
+        Tuple (key, symmetry)
+    """
+    return canonical_key(bitboard.stones[player], bitboard.stones[3 - player])
+
+
+def write_book(path, records):
+    """
+    Write a book file
+
+    Args:
+        path: Output file path
+        records: Iterable of (key, canonical move, weight); several moves
+            may share a key
+    """
+    records = sorted(records)
+    create_dirs_if_not_exists(os.path.dirname(path) or '.')
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, len(records)))
+        for key, move, weight in records:
+            f.write(_RECORD.pack(key, move, min(weight, 0xFFFF)))
+    os.replace(temp_path, path)
+
+
+class OpeningBook:
+    """Memory-mapped opening book"""
+
+    def __init__(self, path=None, max_ply=AI_BOOK_MAX_PLY):
+        """
+        Open a book file (a missing file gives an empty book)
+
+        Args:
+            path: Book file path (default AI_OPENING_BOOK_PATH)
+            max_ply: Positions with more stones than this are not looked up
+        """
+        self.path = path or os.path.join(get_project_root(), AI_OPENING_BOOK_PATH)
+        self.max_ply = max_ply
+        self.data = None
+        self.count = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < _HEADER.size:
+                    return
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            log(f"Opening book {self.path} not found", "DEBUG")
+            return
+
+        magic, count = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or len(data) != _HEADER.size + count * _RECORD.size:
+            log(f"Opening book {self.path} is invalid, ignoring it", "WARNING")
+            data.close()
+            return
+        self.data = data
+        self.count = count
+        log(f"Opening book loaded: {count} positions", "INFO")
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """Unmap the book file"""
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+            self.count = 0
+
+    def _find(self, key):
+        """Index of the first record with key, or -1"""
+        data = self.data
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if _KEY.unpack_from(data, _HEADER.size + middle * _RECORD.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and _KEY.unpack_from(data, _HEADER.size + low * _RECORD.size)[0] == key:
+            return low
+        return -1
+
+    def lookup(self, bitboard, player):
+        """
+        Book move for a position
+
+        Args:
+            bitboard: Bitboard of the position
+            player: Player marker to move
+
+        Returns:
+            Cell index of the heaviest book move, or None if the position
+            is not in the book
+        """
+        if not self.count:
+            return None
+        stones = bitboard.stones
+        if bin(stones[1]).count('1') + bin(stones[2]).count('1') > self.max_ply:
+            return None
+
+        key, symmetry = position_key(bitboard, player)
+        position = self._find(key)
+        if position < 0:
+            return None
+
+        best_move, best_weight = -1, -1
+        while position < self.count:
+            record_key, move, weight = _RECORD.unpack_from(self.data, _HEADER.size + position * _RECORD.size)
+            if record_key != key:
+                break
+            if weight > best_weight:
+                best_move, best_weight = move, weight
+            position += 1
+
+        index = INVERSE_SYMMETRIES[symmetry].get(best_move)
+        if index is None or bitboard.get(*divmod(index, BITBOARD_WIDTH)):
+            # Hash collision or corrupt record
+            return None
+        return index
+
+    def get_move(self, board, player):
+        """
+        Book move for any supported board type
+
+        Args:
+            board: 2D array, Bitboard or BoardState
+            player: Player marker to move
+
+        Returns:
+            Point object, or None if the position is not in the book
+        """
+        if isinstance(board, BoardState):
+            bitboard = board.bitboard
+        elif isinstance(board, Bitboard):
+            bitboard = board
+        else:
+            bitboard = Bitboard.from_board(board)
+        index = self.lookup(bitboard, player)
+        if index is None:
+            return None
+        return Point(*divmod(index, BITBOARD_WIDTH))
+
+
+_book = None
+
+
+def get_opening_book():
+    """Get the shared opening book instance"""
+    global _book
+    if _book is None:
+        _book = OpeningBook()
+    return _book
@@ -0,0 +1,291 @@
+"""
+Parallel Search - Root-parallel AI search on a process pool
+
+Threads share one interpreter lock, so the search only scales across
+cores in separate processes. ParallelAI splits the root moves between
+worker processes, each running an AlphaBetaAI on its share, and keeps the
+best result that arrives within the time budget. Positions travel as the
+two stone bitmasks, a few dozen bytes per task.
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from shared.constants import *
+from shared.utils import log
+from shared.point import Point
+from shared.game_logic import Bitboard, BoardState, BITBOARD_WIDTH
+from shared.ai_search import AlphaBetaAI, WIN_SCORE
+from shared.mcts import MCTSAI
+
+# Engine of a worker process, kept between tasks so its transposition
+# table carries over from one move to the next
+_worker_engine = None
+
+
+def encode_state(state):
+    """
+    Compact, picklable form of a position
+
+    Args:
+        state: BoardState
+
+    Returns:
+        Tuple (X stones, O stones) of bitboard integers
+    """
+    stones = state.bitboard.stones
+    return stones[1], stones[2]
+
+
+def decode_state(stones):
+    """
+    Rebuild a BoardState from encode_state() output
+
+    Args:
+        stones: Tuple (X stones, O stones)
+
+    Returns:
+        BoardState with the same stones
+    """
+    bitboard = Bitboard()
+    bitboard.stones[1], bitboard.stones[2] = stones
+    return BoardState.from_board(bitboard.to_board())
+
+
+def _init_worker():
+    """Build the worker engine before the first task arrives"""
+    global _worker_engine
+    _worker_engine = AlphaBetaAI()
+
+
+def _search_moves(stones, player, moves, time_limit, max_depth, branch_limit):
+    """
+    Worker task: search a share of the root moves
+
+    Returns:
+        Tuple (move, score, depth, nodes); depth is 0 if not even the
+        first iteration finished
+    """
+    global _worker_engine
+    if _worker_engine is None:
+        _init_worker()
+    engine = _worker_engine
+    engine.time_limit = time_limit
+    engine.max_depth = max_depth
+    engine.branch_limit = branch_limit
+
+    state = decode_state(stones)
+    move = engine.search(state, player, root_moves=list(moves))
+    return move, engine.last_score, engine.last_depth, engine.last_nodes
+
+
+class ParallelAI:
+    """
+    Root-parallel search over a ProcessPoolExecutor
+
+    Drop-in replacement for AlphaBetaAI. Immediate wins, blocks and
+    threat-sequence wins are still found in this process; only the full
+    search is split. Falls back to a serial search if the pool cannot be
+    used.
+    """
+
+    def __init__(self, workers=AI_WORKERS, time_limit=AI_TIME_LIMIT,
+                 max_depth=AI_MAX_DEPTH, branch_limit=AI_BRANCH_LIMIT):
+        """
+        Initialize search engine
+
+        Args:
+            workers: Worker processes (0 = one per CPU core)
+            time_limit: Wall-clock budget per move in seconds
+            max_depth: Maximum iterative deepening depth
+            branch_limit: Number of best-ordered moves searched below the root
+        """
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.branch_limit = branch_limit
+        self.engine = AlphaBetaAI(time_limit, max_depth, branch_limit)
+        self.executor = None
+
+        # Statistics of the last search
+        self.last_depth = 0
+        self.last_score = 0
+        self.last_nodes = 0
+        self.last_parallel = False
+
+    def get_best_move(self, board, ai_player, human_player):
+        """
+        Get the best move for AI
+
+        Args:
+            board: 2D array, Bitboard or BoardState representing the game board
+            ai_player: AI's player marker (1 or 2)
+            human_player: Human's player marker (1 or 2)
+
+        Returns:
+            Point object representing the best move, or None if board is full
+        """
+        state = AlphaBetaAI._make_state(board)
+        index = self.search(state, ai_player)
+        if index is None:
+            return None
+        return Point(*divmod(index, BITBOARD_WIDTH))
+
+    def search(self, state, player):
+        """
+        Search the position on all workers
+
+        Args:
+            state: BoardState to search (restored before returning)
+            player: Player marker to move
+
+        Returns:
+            Cell index of the best move, or None if there is no move
+        """
+        start = time.time()
+        self.last_parallel = False
+        moves = state.get_candidates()
+        if not moves:
+            return None
+
+        forced = self.engine.find_forced_move(state, player)
+        if forced is not None:
+            self.last_depth = 0
+            self.last_nodes = 0
+            return forced
+
+        moves = state.patterns.order_moves(moves, player)
+        count = min(self.workers, len(moves))
+        if count > 1:
+            budget = self.time_limit - (time.time() - start) - AI_PARALLEL_MARGIN
+            result = self._search_parallel(state, player, moves, count, budget)
+            if result is not None:
+                self.last_parallel = True
+                return result
+
+        return self._search_serial(state, player, start)
+
+    def _search_parallel(self, state, player, moves, count, budget):
+        """Spread moves over count workers; None if no worker answered"""
+        executor = self._get_executor()
+        if executor is None or budget <= 0:
+            return None
+
+        stones = encode_state(state)
+        try:
+            # Round-robin split, so every worker gets some of the best moves
+            futures = [
+                executor.submit(_search_moves, stones, player, moves[i::count],
+                                budget, self.max_depth, self.branch_limit)
+                for i in range(count)
+            ]
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._disable(e)
+            return None
+
+        done, not_done = wait(futures, timeout=budget + AI_PARALLEL_MARGIN)
+        for future in not_done:
+            future.cancel()
+
+        best = None
+        nodes = 0
+        for future in done:
+            try:
+                move, score, depth, worker_nodes = future.result()
+            except BrokenProcessPool as e:
+                self._disable(e)
+                continue
+            except Exception as e:
+                log(f"AI worker failed: {e}", "WARNING")
+                continue
+            nodes += worker_nodes
+            if move is None or depth == 0:
+                continue
+            if best is None or self._rank(score, depth) > self._rank(best[0], best[2]):
+                best = (score, move, depth)
+
+        if best is None:
+            return None
+        self.last_score, move, self.last_depth = best
+        self.last_nodes = nodes
+        return move
+
+    def _rank(self, score, depth):
+        """
+        Sort key of a worker result
+
+        Scores of different depths are not comparable, so among unproven
+        scores the deepest completed iteration wins and the score only
+        breaks ties. A proven win or loss ends a worker's deepening early:
+        proven wins beat any depth, proven losses lose to any other move.
+        """
+        if score >= WIN_SCORE - self.max_depth:
+            return (1, score, depth)
+        if score <= -(WIN_SCORE - self.max_depth):
+            return (-1, score, depth)
+        return (0, depth, score)
+
+    def _search_serial(self, state, player, start):
+        """Single-process search with whatever time is left"""
+        engine = self.engine
+        engine.time_limit = max(self.time_limit - (time.time() - start), AI_PARALLEL_MARGIN)
+        move = engine.search(state, player)
+        engine.time_limit = self.time_limit
+        self.last_depth = engine.last_depth
+        self.last_score = engine.last_score
+        self.last_nodes = engine.last_nodes
+        return move
+
+    def _get_executor(self):
+        """Process pool, started on first use"""
+        if self.executor is None and self.workers > 1:
+            try:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # Spawned workers do not inherit GUI or socket threads
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                )
+            except (OSError, ValueError) as e:
+                self._disable(e)
+        return self.executor
+
+    def _disable(self, error):
+        """Stop using the pool after a failure"""
+        log(f"Parallel AI unavailable, searching serially: {error}", "WARNING")
+        self.close()
+        self.workers = 1
+
+    def warm_up(self):
+        """Start the worker processes ahead of the first search"""
+        executor = self._get_executor()
+        if executor is not None:
+            for _ in range(self.workers):
+                executor.submit(_init_worker)
+
+    def close(self):
+        """Shut the worker processes down"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+def create_ai(time_limit=AI_TIME_LIMIT):
+    """
+    AI engine selected by the AI_ENGINE and AI_PARALLEL settings
+
+    Args:
+        time_limit: Wall-clock budget per move in seconds
+
+    Returns:
+        MCTSAI, ParallelAI (workers started) or AlphaBetaAI
+    """
+    if AI_ENGINE == "mcts":
+        return MCTSAI(time_limit=time_limit)
+    if AI_PARALLEL:
+        ai = ParallelAI(time_limit=time_limit)
+        ai.warm_up()
+        return ai
+    return AlphaBetaAI(time_limit=time_limit)
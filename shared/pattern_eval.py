@@ -0,0 +1,370 @@
+"""
+Pattern Evaluator - Table-driven position evaluation for the AI
+
+Every stone is rated by the 9-cell line window centred on it in each of
+the 4 directions. A window is encoded as a base-3 index (0 = empty,
+1 = own stone, 2 = opponent stone or off-board) into a shape table that
+is computed once and cached on disk. PatternState keeps the window codes
+and the total score of each player up to date as moves are played, so
+only the 4 lines through the last move are ever touched.
+"""
+
+import os
+from array import array
+from shared.constants import *
+from shared.utils import log, get_project_root, create_dirs_if_not_exists
+from shared.game_logic import BITBOARD_WIDTH, BITBOARD_MASK, iter_bits
+
+# Window geometry
+WINDOW_HALF = 4
+WINDOW_SIZE = 2 * WINDOW_HALF + 1
+POW3 = [3 ** k for k in range(WINDOW_SIZE)]
+TABLE_SIZE = 3 ** WINDOW_SIZE
+CENTER_POWER = POW3[WINDOW_HALF]
+
+# Digits
+EMPTY = 0
+OWN = 1
+BLOCKED = 2
+
+# Shapes, weakest to strongest
+SHAPE_DEAD = 0
+SHAPE_ONE = 1
+SHAPE_TWO = 2
+SHAPE_OPEN_TWO = 3
+SHAPE_THREE = 4
+SHAPE_OPEN_THREE = 5
+SHAPE_FOUR = 6
+SHAPE_OPEN_FOUR = 7
+SHAPE_FIVE = 8
+
+# Score of one stone by the shape of its window
+SHAPE_SCORES = (0, 1, 10, 50, 100, 600, 800, 10000, 100000)
+
+# Shape one stone weaker than the shape it can be extended to
+_WEAKER_SHAPE = {
+    SHAPE_OPEN_FOUR: SHAPE_OPEN_THREE,
+    SHAPE_FOUR: SHAPE_THREE,
+    SHAPE_OPEN_THREE: SHAPE_OPEN_TWO,
+    SHAPE_THREE: SHAPE_TWO,
+    SHAPE_OPEN_TWO: SHAPE_ONE,
+    SHAPE_TWO: SHAPE_ONE,
+}
+
+# Line directions as (dx, dy), same order as BITBOARD_SHIFTS
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# Cache file header: magic, format version
+_CACHE_MAGIC = b'CPT1'
+
+
+def _decode(index):
+    """Split a window index into its 9 digits"""
+    digits = []
+    for _ in range(WINDOW_SIZE):
+        index, digit = divmod(index, 3)
+        digits.append(digit)
+    return digits
+
+
+def build_shape_table():
+    """
+    Classify every window index
+
+    A window is rated by what its centre stone can still become:
+    five, open four (two ways to make five), four (one way), and
+    recursively open three / three / two for windows one move away
+    from those shapes.
+
+    Returns:
+        bytearray of shape codes, indexed by window index
+    """
+    table = bytearray(TABLE_SIZE)
+    done = bytearray(TABLE_SIZE)
+    segments = [range(start, start + WIN_CONDITION)
+                for start in range(WINDOW_SIZE - WIN_CONDITION + 1)]
+
+    def classify(index):
+        if done[index]:
+            return table[index]
+        digits = _decode(index)
+        shape = SHAPE_DEAD
+        if digits[WINDOW_HALF] == OWN:
+            win_points = set()
+            live = False
+            for segment in segments:
+                cells = [digits[k] for k in segment]
+                if BLOCKED in cells:
+                    continue
+                live = True
+                empties = [k for k in segment if digits[k] == EMPTY]
+                if not empties:
+                    win_points = None
+                    break
+                if len(empties) == 1:
+                    win_points.add(empties[0])
+
+            if win_points is None:
+                shape = SHAPE_FIVE
+            elif len(win_points) >= 2:
+                shape = SHAPE_OPEN_FOUR
+            elif win_points:
+                shape = SHAPE_FOUR
+            elif live:
+                best = SHAPE_DEAD
+                for k in range(WINDOW_SIZE):
+                    if digits[k] == EMPTY:
+                        best = max(best, classify(index + POW3[k]))
+                shape = _WEAKER_SHAPE.get(best, SHAPE_ONE)
+        table[index] = shape
+        done[index] = 1
+        return shape
+
+    for index in range(TABLE_SIZE):
+        classify(index)
+    return table
+
+
+def _cache_path():
+    return os.path.join(get_project_root(), AI_PATTERN_CACHE_PATH)
+
+
+def load_shape_table():
+    """
+    Load the shape table from the disk cache, building it if needed
+
+    Returns:
+        bytes/bytearray of shape codes
+    """
+    path = _cache_path()
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] == _CACHE_MAGIC and len(data) == 4 + TABLE_SIZE:
+            return data[4:]
+        log(f"Pattern cache {path} is stale, rebuilding", "WARNING")
+    except OSError:
+        pass
+
+    table = build_shape_table()
+    try:
+        create_dirs_if_not_exists(os.path.dirname(path))
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(_CACHE_MAGIC + bytes(table))
+        os.replace(temp_path, path)
+    except OSError as e:
+        log(f"Cannot write pattern cache {path}: {e}", "WARNING")
+    return table
+
+
+SHAPE_TABLE = load_shape_table()
+SCORE_TABLE = array('i', [SHAPE_SCORES[shape] for shape in SHAPE_TABLE])
+
+
+def _build_geometry():
+    """
+    Precompute, for every cell and direction, the empty-board window code
+    and the cells whose windows contain it
+
+    Returns:
+        (initial codes per direction, affected cells per cell)
+    """
+    size = BOARD_SIZE * BITBOARD_WIDTH
+    initial = [array('i', bytes(4 * size)) for _ in DIRECTIONS]
+    affected = [None] * size
+    for x in range(BOARD_SIZE):
+        for y in range(BOARD_SIZE):
+            index = x * BITBOARD_WIDTH + y
+            per_direction = []
+            for d, (dx, dy) in enumerate(DIRECTIONS):
+                code = 0
+                cells = []
+                for k in range(WINDOW_SIZE):
+                    offset = k - WINDOW_HALF
+                    nx, ny = x + offset * dx, y + offset * dy
+                    if not (0 <= nx < BOARD_SIZE and 0 <= ny < BOARD_SIZE):
+                        code += BLOCKED * POW3[k]
+                    elif offset != 0:
+                        # This cell sits at the mirrored position of nx, ny's window
+                        cells.append((nx * BITBOARD_WIDTH + ny, POW3[WINDOW_HALF - offset]))
+                initial[d][index] = code
+                per_direction.append(tuple(cells))
+            affected[index] = tuple(per_direction)
+    return initial, affected
+
+
+_INITIAL_CODES, _AFFECTED = _build_geometry()
+
+
+class PatternState:
+    """
+    Incrementally maintained pattern evaluation of a position
+
+    Attach to a BoardState (state.patterns) and it is updated on every
+    play()/undo().
+    """
+
+    def __init__(self):
+        # Window codes, indexed [player][direction][cell]
+        self.codes = [
+            None,
+            [codes[:] for codes in _INITIAL_CODES],
+            [codes[:] for codes in _INITIAL_CODES],
+        ]
+        # Sum of SCORE_TABLE over every stone and direction, per player
+        self.scores = [0, 0, 0]
+
+    @staticmethod
+    def from_state(state):
+        """
+        Build pattern state for the stones of a BoardState
+
+        Args:
+            state: BoardState
+
+        Returns:
+            PatternState matching the position
+        """
+        patterns = PatternState()
+        stones = state.bitboard.stones
+        for player in (1, 2):
+            for index in iter_bits(stones[player] & BITBOARD_MASK):
+                patterns.play(index, player)
+        return patterns
+
+    def copy(self):
+        """Return an independent copy"""
+        patterns = PatternState.__new__(PatternState)
+        patterns.codes = [
+            None,
+            [codes[:] for codes in self.codes[1]],
+            [codes[:] for codes in self.codes[2]],
+        ]
+        patterns.scores = self.scores[:]
+        return patterns
+
+    def play(self, index, player):
+        """
+        Update windows for a stone placed on cell index
+
+        Args:
+            index: Cell index (bitboard layout)
+            player: Player marker
+        """
+        self._update(index, player, 1)
+
+    def undo(self, index, player):
+        """
+        Update windows for a stone taken off cell index
+
+        Args:
+            index: Cell index (bitboard layout)
+            player: Player marker
+        """
+        self._update(index, player, -1)
+
+    def _update(self, index, player, sign):
+        opponent = 3 - player
+        own_codes = self.codes[player]
+        opp_codes = self.codes[opponent]
+        scores = self.scores
+        table = SCORE_TABLE
+
+        if sign < 0:
+            # The stone stops scoring before its windows change
+            for d in range(4):
+                scores[player] -= table[own_codes[d][index]]
+
+        for d in range(4):
+            own = own_codes[d]
+            opp = opp_codes[d]
+            own[index] += sign * CENTER_POWER
+            opp[index] += sign * BLOCKED * CENTER_POWER
+            for cell, power in _AFFECTED[index][d]:
+                # Only stones score, so only their windows change the totals
+                old = own[cell]
+                own[cell] = old + sign * power
+                if old // CENTER_POWER % 3 == OWN:
+                    scores[player] += table[old + sign * power] - table[old]
+                old = opp[cell]
+                opp[cell] = old + sign * BLOCKED * power
+                if old // CENTER_POWER % 3 == OWN:
+                    scores[opponent] += table[old + sign * BLOCKED * power] - table[old]
+
+        if sign > 0:
+            for d in range(4):
+                scores[player] += table[own_codes[d][index]]
+
+    def get_move_shape(self, index, player):
+        """
+        Strongest shape player makes by playing the empty cell index
+
+        Args:
+            index: Empty cell index (bitboard layout)
+            player: Player marker
+
+        Returns:
+            Shape code (SHAPE_*)
+        """
+        codes = self.codes[player]
+        table = SHAPE_TABLE
+        return max(table[codes[0][index] + CENTER_POWER], table[codes[1][index] + CENTER_POWER],
+                   table[codes[2][index] + CENTER_POWER], table[codes[3][index] + CENTER_POWER])
+
+    def get_move_score(self, index, player):
+        """
+        Heuristic value of playing the empty cell index
+
+        Adds the pattern score the move makes for player (counted twice,
+        since it is player's tempo) to the score it takes away from the
+        opponent by occupying the cell.
+
+        Args:
+            index: Empty cell index (bitboard layout)
+            player: Player marker
+
+        Returns:
+            Move score (higher is better)
+        """
+        own = self.codes[player]
+        opp = self.codes[3 - player]
+        table = SCORE_TABLE
+        attack = (table[own[0][index] + CENTER_POWER] + table[own[1][index] + CENTER_POWER]
+                  + table[own[2][index] + CENTER_POWER] + table[own[3][index] + CENTER_POWER])
+        defence = (table[opp[0][index] + CENTER_POWER] + table[opp[1][index] + CENTER_POWER]
+                   + table[opp[2][index] + CENTER_POWER] + table[opp[3][index] + CENTER_POWER])
+        return 2 * attack + defence
+
+    def order_moves(self, moves, player, limit=None):
+        """
+        Rank candidate moves by pattern score
+
+        Args:
+            moves: Iterable of empty cell indexes
+            player: Player marker to move
+            limit: Keep only the best limit moves (None keeps all)
+
+        Returns:
+            List of cell indexes, best first
+        """
+        ranked = sorted(moves, key=lambda index: self.get_move_score(index, player), reverse=True)
+        if limit is not None:
+            return ranked[:limit]
+        return ranked
+
+    def evaluate(self, player):
+        """
+        Static evaluation
+
+        Args:
+            player: Player marker to score for
+
+        Returns:
+            Score of player minus score of the opponent
+        """
+        return self.scores[player] - self.scores[3 - player]
+
+    def get_score(self, player):
+        """Total pattern score of one player"""
+        return self.scores[player]
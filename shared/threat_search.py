@@ -0,0 +1,253 @@
+"""
+Threat Search - Solver for forced wins by continuous threats
+
+VCF (victory by continuous fours) only plays fours, so every defence is
+a single forced block and the tree stays narrow. VCT (victory by
+continuous threats) also plays open threes; the defender may then answer
+on any cell where the attacker could make a four, or counter with a four
+of its own. Both either prove a win or give up within a node and time
+budget, so the solver is cheap to try before the general search.
+"""
+
+import time
+from shared.constants import *
+from shared.game_logic import BITBOARD_WIDTH
+from shared.pattern_eval import PatternState, SHAPE_OPEN_THREE, SHAPE_FOUR, SHAPE_OPEN_FOUR, SHAPE_FIVE
+
+
+class ThreatLimit(Exception):
+    """Raised inside the solver when the node or time budget is used up"""
+    pass
+
+
+class ThreatSolver:
+    """
+    VCF/VCT solver with a proof cache
+
+    Results are cached by (position hash, attacker, mode) together with
+    the depth they were found at: a win proven at some depth holds at any
+    greater depth, a refutation at any smaller one. The cache is kept
+    between calls, so proofs found for one move are reused on the next.
+    """
+
+    # Search modes
+    VCF = 0
+    VCT = 1
+
+    def __init__(self, vcf_depth=AI_VCF_DEPTH, vct_depth=AI_VCT_DEPTH,
+                 node_limit=AI_THREAT_NODE_LIMIT, time_limit=AI_THREAT_TIME_LIMIT,
+                 cache_size=AI_THREAT_CACHE_SIZE):
+        """
+        Initialize solver
+
+        Args:
+            vcf_depth: Maximum attacker fours in a VCF
+            vct_depth: Maximum attacker threats in a VCT
+            node_limit: Nodes per solve() call
+            time_limit: Seconds per solve() call
+            cache_size: Proof cache entries before it is cleared
+        """
+        self.vcf_depth = vcf_depth
+        self.vct_depth = vct_depth
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.cache_size = cache_size
+        self.cache = {}
+
+        # Search state
+        self.state = None
+        self.deadline = 0
+        self.nodes = 0
+
+        # Statistics of the last solve
+        self.last_nodes = 0
+        self.last_mode = None
+
+    def solve(self, state, player):
+        """
+        Look for a forced win, VCF first and then VCT
+
+        Args:
+            state: BoardState (restored before returning); a pattern
+                evaluator is attached to it if it has none
+            player: Attacking player marker, to move
+
+        Returns:
+            Cell index of the first winning move, or None if no win was
+            proven within the budget
+        """
+        self._begin(state)
+        self.last_mode = None
+        for mode, max_depth in ((self.VCF, self.vcf_depth), (self.VCT, self.vct_depth)):
+            move = self._run(player, mode, max_depth)
+            if move is not None:
+                self.last_mode = mode
+                break
+        self.last_nodes = self.nodes
+        return move
+
+    def find_vcf(self, state, player):
+        """Winning first move of a VCF for player, or None"""
+        self._begin(state)
+        move = self._run(player, self.VCF, self.vcf_depth)
+        self.last_mode = self.VCF if move is not None else None
+        self.last_nodes = self.nodes
+        return move
+
+    def find_vct(self, state, player):
+        """Winning first move of a VCT for player, or None"""
+        self._begin(state)
+        move = self._run(player, self.VCT, self.vct_depth)
+        self.last_mode = self.VCT if move is not None else None
+        self.last_nodes = self.nodes
+        return move
+
+    def clear(self):
+        """Drop all cached proofs"""
+        self.cache.clear()
+
+    def _begin(self, state):
+        self.state = state
+        self.nodes = 0
+        self.deadline = time.time() + self.time_limit
+        if state.patterns is None:
+            state.patterns = PatternState.from_state(state)
+
+    def _run(self, player, mode, max_depth):
+        """Iterative deepening, so the shortest win is found first"""
+        try:
+            for depth in range(1, max_depth + 1):
+                move = self._attack(player, depth, mode)
+                if move is not None:
+                    return move
+        except ThreatLimit:
+            pass
+        return None
+
+    def _attack(self, player, depth, mode):
+        """
+        Attacker to move: find a threat that wins by force
+
+        Args:
+            player: Attacking player marker
+            depth: Threats the attacker may still make
+            mode: VCF or VCT
+
+        Returns:
+            Winning cell index, or None
+        """
+        self.nodes += 1
+        if self.nodes > self.node_limit or (self.nodes & 63 == 0 and time.time() >= self.deadline):
+            raise ThreatLimit()
+
+        key = (self.state.hash, player, mode)
+        entry = self.cache.get(key)
+        if entry is not None:
+            result, cached_depth = entry
+            if result is not None and cached_depth <= depth:
+                return result
+            if result is None and cached_depth >= depth:
+                return None
+
+        result = self._find_attack(player, depth, mode)
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+        self.cache[key] = (result, depth)
+        return result
+
+    def _find_attack(self, player, depth, mode):
+        state = self.state
+        patterns = state.patterns
+        opponent = 3 - player
+        threshold = SHAPE_FOUR if mode == self.VCF else SHAPE_OPEN_THREE
+        threats = []
+        blocks = []
+        for index in state.get_candidates():
+            shape = patterns.get_move_shape(index, player)
+            if shape == SHAPE_FIVE:
+                return index
+            if shape >= threshold:
+                threats.append((shape, index))
+            if patterns.get_move_shape(index, opponent) == SHAPE_FIVE:
+                blocks.append(index)
+        if depth <= 0:
+            return None
+
+        # An opponent four must be blocked, and the block must be a threat too
+        if len(blocks) > 1:
+            return None
+        if blocks:
+            threats = [(shape, index) for shape, index in threats if index == blocks[0]]
+        threats.sort(reverse=True)
+
+        for shape, index in threats:
+            x, y = divmod(index, BITBOARD_WIDTH)
+            state.play(x, y, player)
+            try:
+                if shape >= SHAPE_FOUR:
+                    won = self._defend_four(player, depth, mode, shape)
+                else:
+                    won = self._defend_three(player, depth, mode)
+            finally:
+                state.undo()
+            if won:
+                return index
+        return None
+
+    def _defend_four(self, player, depth, mode, shape):
+        """
+        Defender must block the four; True if the attacker still wins
+
+        The defender moves first, so a four it already has (a cell where
+        it makes five) wins before the attacker's. Otherwise any new four
+        of the defender comes too late, since the attacker completes five
+        first, and an open or double four is a proven win.
+        """
+        state = self.state
+        patterns = state.patterns
+        opponent = 3 - player
+        wins = []
+        for index in state.get_candidates():
+            if patterns.get_move_shape(index, opponent) == SHAPE_FIVE:
+                return False
+            if patterns.get_move_shape(index, player) == SHAPE_FIVE:
+                wins.append(index)
+        if shape == SHAPE_OPEN_FOUR or len(wins) > 1:
+            # Two winning cells cannot both be blocked
+            return True
+        if not wins:
+            return False
+
+        x, y = divmod(wins[0], BITBOARD_WIDTH)
+        state.play(x, y, 3 - player)
+        try:
+            return self._attack(player, depth - 1, mode) is not None
+        finally:
+            state.undo()
+
+    def _defend_three(self, player, depth, mode):
+        """
+        Defender answers an open three; True if every answer still loses
+
+        Answers are the cells where the attacker could make a four, plus
+        any four the defender can make as a counter-threat.
+        """
+        state = self.state
+        patterns = state.patterns
+        opponent = 3 - player
+        replies = [index for index in state.get_candidates()
+                   if patterns.get_move_shape(index, player) >= SHAPE_FOUR
+                   or patterns.get_move_shape(index, opponent) >= SHAPE_FOUR]
+        if not replies:
+            return False
+
+        for index in replies:
+            x, y = divmod(index, BITBOARD_WIDTH)
+            state.play(x, y, opponent)
+            try:
+                won = self._attack(player, depth - 1, mode) is not None
+            finally:
+                state.undo()
+            if not won:
+                return False
+        return True
@@ -0,0 +1,442 @@
+"""
+Test script for the game engine (board representation and AI)
+"""
+
+import sys
+import os
+import random
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.constants import *
+from shared.point import Point
+from shared.game_logic import GameLogic, SimpleAI, Bitboard, BoardState
+from shared.ai_search import AlphaBetaAI, TranspositionTable, WIN_SCORE
+from shared.threat_search import ThreatSolver
+from shared.mcts import MCTSAI, batch_playouts, python_playouts, np
+from shared.opening_book import OpeningBook, SYMMETRIES, position_key, write_book
+from shared.parallel_search import ParallelAI, encode_state, decode_state
+from shared.pattern_eval import PatternState, SHAPE_TABLE, POW3, SHAPE_OPEN_THREE, SHAPE_THREE, SHAPE_OPEN_FOUR, SHAPE_FOUR
+
+print("=" * 60)
+print("CARO GAME PYTHON - GAME ENGINE TEST")
+print("=" * 60)
+
+
+def empty_board():
+    return [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+
+
+# Test 1: Bitboard win detection matches the list-board scan
+print("\n[1/11] Testing bitboard win detection...")
+try:
+    rng = random.Random(1234)
+    checked = 0
+    for _ in range(200):
+        board = empty_board()
+        cells = [(x, y) for x in range(BOARD_SIZE) for y in range(BOARD_SIZE)]
+        rng.shuffle(cells)
+        for i, (x, y) in enumerate(cells[:rng.randint(10, 120)]):
+            board[x][y] = 1 + i % 2
+        bitboard = Bitboard.from_board(board)
+        assert bitboard.to_board() == board, "Round trip changed the board"
+        for x, y in cells[:40]:
+            player = board[x][y]
+            if player:
+                expected = GameLogic.check_win(board, x, y, player)
+                assert GameLogic.check_win(bitboard, x, y, player) == expected, \
+                    f"Mismatch at ({x}, {y})"
+                checked += 1
+
+    # Edge wins: runs touching the board border must not wrap between rows
+    board = empty_board()
+    for y in range(BOARD_SIZE - 3, BOARD_SIZE):
+        board[0][y] = 1
+    board[1][0] = 1
+    board[1][1] = 1
+    bitboard = Bitboard.from_board(board)
+    assert not GameLogic.check_win(bitboard, 1, 0, 1), "Run wrapped across rows"
+
+    board = empty_board()
+    for i in range(5):
+        board[BOARD_SIZE - 1 - i][i] = 2
+    assert GameLogic.check_win(Bitboard.from_board(board), BOARD_SIZE - 1, 0, 2)
+    print(f"✅ Bitboard OK - {checked} positions cross-checked")
+except AssertionError as e:
+    print(f"❌ Bitboard FAILED: {e}")
+    sys.exit(1)
+
+# Test 2: SimpleAI wins and blocks
+print("\n[2/11] Testing SimpleAI...")
+try:
+    board = empty_board()
+    for y in range(4):
+        board[7][3 + y] = 2
+    move = SimpleAI.get_best_move(board, 2, 1)
+    assert (move.x, move.y) in ((7, 2), (7, 7)), f"AI missed win: {move}"
+
+    board = empty_board()
+    for x in range(4):
+        board[3 + x][5] = 1
+    board[0][0] = 2
+    move = SimpleAI.get_best_move(board, 2, 1)
+    assert (move.x, move.y) in ((2, 5), (7, 5)), f"AI missed block: {move}"
+    assert board[2][5] == 0 and board[7][5] == 0, "AI modified the caller's board"
+    print("✅ SimpleAI OK")
+except AssertionError as e:
+    print(f"❌ SimpleAI FAILED: {e}")
+    sys.exit(1)
+
+# Test 3: BoardState play/undo bookkeeping
+print("\n[3/11] Testing BoardState...")
+try:
+    state = BoardState()
+    assert not state.is_full() and len(state.get_valid_moves()) == BOARD_SIZE * BOARD_SIZE
+    moves = [(7, 7), (0, 0), (7, 8), (0, 1), (7, 9), (0, 2), (7, 10), (0, 3)]
+    for x, y in moves:
+        assert not state.play(x, y), f"Unexpected win at ({x}, {y})"
+    assert state.get_current_player() == 1
+    assert state[7][8] == 1 and state[0][3] == 2
+    try:
+        state.play(7, 7)
+        assert False, "Occupied cell accepted"
+    except ValueError:
+        pass
+    assert state.play(7, 11), "Win not detected"
+    assert state.winner == 1
+    assert sorted((p.x, p.y) for p in state.get_winning_cells()) == [(7, y) for y in range(7, 12)]
+    assert GameLogic.check_win(state, 7, 9, 1)
+    state.undo()
+    assert state.winner == 0 and state[7][11] == 0
+    assert state.empty_count == BOARD_SIZE * BOARD_SIZE - len(moves)
+    assert len(state.get_valid_moves()) == state.empty_count
+    while state.undo():
+        pass
+    assert state.to_board() == empty_board() and state.empty_count == BOARD_SIZE * BOARD_SIZE
+
+    # Undoing a second five keeps the win of the first
+    two = BoardState()
+    for y in range(5):
+        two.play(2, y, 1)
+    assert two.winner == 1
+    for x in range(3, 8):
+        two.play(x, 10, 1)
+    assert two.bitboard.is_win(7, 10, 1) and two.winner == 1
+    two.undo()
+    assert two.winner == 1, "Winner cleared although a five remains"
+    assert sorted((p.x, p.y) for p in two.get_winning_cells()) == [(2, y) for y in range(5)]
+    for _ in range(4):
+        two.undo()
+    assert two.winner == 1
+    two.undo()
+    assert two.winner == 0
+
+    full = BoardState()
+    for x in range(BOARD_SIZE):
+        for y in range(BOARD_SIZE):
+            full.play(x, y, 1 + (x // 2 + y) % 2)
+    assert GameLogic.is_board_full(full) and not full.get_valid_moves()
+    print("✅ BoardState OK")
+except AssertionError as e:
+    print(f"❌ BoardState FAILED: {e}")
+    sys.exit(1)
+
+# Test 4: Alpha-beta search
+print("\n[4/11] Testing AlphaBetaAI...")
+try:
+    ai = AlphaBetaAI(time_limit=0.3, use_book=False)
+
+    # Open three for O must be answered before it becomes an open four
+    state = BoardState()
+    for x, y, player in [(7, 6, 2), (7, 7, 2), (7, 8, 2), (0, 0, 1), (14, 14, 1)]:
+        state.play(x, y, player)
+    start = time.time()
+    move = ai.get_best_move(state, 1, 2)
+    elapsed = time.time() - start
+    depth = ai.last_depth
+    assert (move.x, move.y) in ((7, 5), (7, 9), (7, 4), (7, 10)), f"Open three not blocked: {move}"
+    assert elapsed < 1.0, f"Search overran its budget: {elapsed:.2f}s"
+    assert state.get_move_count() == 5, "Search modified the caller's board"
+
+    # Winning move is taken immediately from a list board
+    board = empty_board()
+    for y in range(4):
+        board[3][y + 1] = 1
+    move = ai.get_best_move(board, 1, 2)
+    assert (move.x, move.y) in ((3, 0), (3, 5)), f"AI missed win: {move}"
+    print(f"✅ AlphaBetaAI OK - depth {depth}, {elapsed * 1000:.0f} ms")
+except AssertionError as e:
+    print(f"❌ AlphaBetaAI FAILED: {e}")
+    sys.exit(1)
+
+# Test 5: Zobrist hashing and transposition table
+print("\n[5/11] Testing Zobrist hashing and transposition table...")
+try:
+    a = BoardState()
+    b = BoardState()
+    for x, y, player in [(7, 7, 1), (6, 6, 2), (8, 8, 1), (5, 5, 2)]:
+        a.play(x, y, player)
+    for x, y, player in [(8, 8, 1), (5, 5, 2), (7, 7, 1), (6, 6, 2)]:
+        b.play(x, y, player)
+    assert a.hash == b.hash != 0, "Transposed move orders hash differently"
+    assert BoardState.from_board(a.to_board()).hash == a.hash
+    a.undo()
+    a.undo()
+    a.undo()
+    a.undo()
+    assert a.hash == 0, "Undo did not restore the hash"
+
+    tt = TranspositionTable(1000)
+    assert tt.size == 1024
+    assert tt.probe(b.hash) is None
+    tt.store(b.hash, 3, TranspositionTable.EXACT, 42, 17)
+    assert tt.probe(b.hash) == (3, TranspositionTable.EXACT, 42, 17)
+    # Shallower result from the same search does not evict a deeper one
+    other = b.hash ^ (tt.size << 1)
+    tt.store(other, 1, TranspositionTable.LOWER, 5, 3)
+    assert tt.probe(other) is None and tt.probe(b.hash) is not None
+    # Entries from an older search are replaced
+    tt.new_search()
+    tt.store(other, 1, TranspositionTable.LOWER, 5, 3)
+    assert tt.probe(other) == (1, TranspositionTable.LOWER, 5, 3)
+    stats = tt.get_stats()
+    assert stats['hits'] == 3 and stats['probes'] == 5 and stats['overwrites'] == 1
+
+    ai = AlphaBetaAI(time_limit=0.3, use_book=False)
+    ai.get_best_move(b, 1, 2)
+    assert ai.tt.probes > 0 and ai.tt.hits > 0, "Search never hit the table"
+    print(f"✅ Transposition table OK - hit rate {ai.tt.hit_rate():.0%}, "
+          f"{ai.tt.memory_bytes() // 1024} KB")
+except AssertionError as e:
+    print(f"❌ Transposition table FAILED: {e}")
+    sys.exit(1)
+
+# Test 6: Pattern evaluator
+print("\n[6/11] Testing pattern evaluator...")
+try:
+    def window(text):
+        digits = {'.': 0, 'X': 1, 'O': 2}
+        return sum(digits[c] * POW3[k] for k, c in enumerate(text))
+
+    assert SHAPE_TABLE[window("..XXXX...")] == SHAPE_OPEN_FOUR
+    assert SHAPE_TABLE[window("OXXXX...O")] == SHAPE_FOUR
+    assert SHAPE_TABLE[window("...XXX...")] == SHAPE_OPEN_THREE
+    assert SHAPE_TABLE[window("..X.XX...")] == SHAPE_OPEN_THREE
+    assert SHAPE_TABLE[window("O.XXX.O..")] == SHAPE_THREE
+
+    # Incremental updates must match a from-scratch evaluation
+    rng = random.Random(99)
+    for _ in range(30):
+        state = BoardState()
+        state.patterns = PatternState()
+        cells = [(x, y) for x in range(BOARD_SIZE) for y in range(BOARD_SIZE)]
+        rng.shuffle(cells)
+        for x, y in cells[:rng.randint(5, 80)]:
+            state.play(x, y)
+            if rng.random() < 0.2:
+                state.undo()
+        fresh = PatternState.from_state(state)
+        assert fresh.scores == state.patterns.scores, "Incremental score drifted"
+        assert fresh.codes == state.patterns.codes, "Incremental windows drifted"
+    print("✅ Pattern evaluator OK")
+except AssertionError as e:
+    print(f"❌ Pattern evaluator FAILED: {e}")
+    sys.exit(1)
+
+# Test 7: Candidate moves and ordering
+print("\n[7/11] Testing candidate moves...")
+try:
+    def brute_candidates(state):
+        result = set()
+        for x in range(BOARD_SIZE):
+            for y in range(BOARD_SIZE):
+                if state[x][y]:
+                    continue
+                for dx, dy in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    for step in (-2, -1, 1, 2):
+                        nx, ny = x + step * dx, y + step * dy
+                        if 0 <= nx < BOARD_SIZE and 0 <= ny < BOARD_SIZE and state[nx][ny]:
+                            result.add((x, y))
+        return result
+
+    state = BoardState()
+    assert len(state.get_candidates()) == 1, "Empty board should offer the center"
+    rng = random.Random(7)
+    cells = [(x, y) for x in range(BOARD_SIZE) for y in range(BOARD_SIZE)]
+    rng.shuffle(cells)
+    for x, y in cells[:60]:
+        state.play(x, y)
+        if rng.random() < 0.3:
+            state.undo()
+        if not state.get_move_count():
+            continue
+        got = {divmod(index, 16) for index in state.get_candidates()}
+        assert got == brute_candidates(state), "Candidate set drifted"
+
+    # Ordering puts the winning move first, ahead of the blocks
+    state = BoardState()
+    state.patterns = PatternState()
+    for x, y, player in [(10, 3, 1), (10, 4, 1), (10, 5, 1), (10, 6, 1), (3, 3, 2), (4, 4, 2), (5, 5, 2), (6, 6, 2)]:
+        state.play(x, y, player)
+    ranked = state.patterns.order_moves(state.get_candidates(), 2)
+    first = divmod(ranked[0], 16)
+    assert first in ((2, 2), (7, 7)), f"Winning move not ranked first: {first}"
+    assert {divmod(index, 16) for index in ranked[:4]} == {(10, 2), (10, 7), (2, 2), (7, 7)}
+    print("✅ Candidate moves OK")
+except AssertionError as e:
+    print(f"❌ Candidate moves FAILED: {e}")
+    sys.exit(1)
+
+# Test 8: Threat-space solver
+print("\n[8/11] Testing threat solver...")
+try:
+    def position(stones):
+        state = BoardState()
+        for x, y, player in stones:
+            state.play(x, y, player)
+        return state
+
+    solver = ThreatSolver()
+
+    # Two closed threes crossing on an empty cell: a double four (VCF)
+    state = position([(7, 3, 2), (7, 4, 1), (7, 5, 1), (7, 6, 1),
+                      (3, 7, 2), (4, 7, 1), (5, 7, 1), (6, 7, 1), (0, 0, 2)])
+    key = state.hash
+    move = solver.solve(state, 1)
+    assert move is not None and divmod(move, 16) == (7, 7), f"VCF not found: {move}"
+    assert solver.last_mode == ThreatSolver.VCF
+    assert state.hash == key and state.get_move_count() == 9, "Solver modified the board"
+
+    # Two open twos: no four to start with, but a win through threes (VCT)
+    state = position([(7, 7, 1), (7, 8, 1), (9, 6, 1), (10, 6, 1),
+                      (0, 0, 2), (0, 14, 2), (14, 0, 2), (14, 14, 2)])
+    assert solver.find_vcf(state, 1) is None, "VCF claimed without fours"
+    assert solver.find_vct(state, 1) is not None, "VCT not found"
+
+    # An open four does not win if the defender already has a four
+    state = position([(7, 4, 1), (7, 5, 1), (7, 6, 1), (7, 7, 1),
+                      (3, 10, 2), (4, 10, 2), (5, 10, 2), (6, 10, 2), (7, 10, 1)])
+    solver._begin(state)
+    assert not solver._defend_four(1, 1, ThreatSolver.VCF, SHAPE_OPEN_FOUR), "Defender five ignored"
+    state.play(2, 10, 1)
+    solver._begin(state)
+    assert solver._defend_four(1, 1, ThreatSolver.VCF, SHAPE_OPEN_FOUR), "Open four not a win"
+
+    # Quiet opening: nothing to prove
+    state = position([(7, 7, 1), (7, 8, 2)])
+    assert solver.solve(state, 1) is None, "Win claimed from a quiet position"
+
+    # The main AI plays the proven win
+    ai = AlphaBetaAI(time_limit=0.3, use_book=False)
+    state = position([(7, 7, 1), (7, 8, 1), (9, 6, 1), (10, 6, 1),
+                      (0, 0, 2), (0, 14, 2), (14, 0, 2), (14, 14, 2)])
+    ai.get_best_move(state, 1, 2)
+    assert ai.last_threat == ThreatSolver.VCT, "AlphaBetaAI skipped the threat solver"
+    print(f"✅ Threat solver OK - {solver.last_nodes} nodes")
+except AssertionError as e:
+    print(f"❌ Threat solver FAILED: {e}")
+    sys.exit(1)
+
+# Test 9: Parallel search plumbing (worker processes are not started here)
+print("\n[9/11] Testing parallel search...")
+try:
+    state = BoardState()
+    for x, y, player in [(7, 7, 1), (7, 8, 2), (8, 8, 1), (6, 6, 2), (0, 14, 1)]:
+        state.play(x, y, player)
+    encoded = encode_state(state)
+    assert all(isinstance(stones, int) for stones in encoded)
+    decoded = decode_state(encoded)
+    assert decoded.to_board() == state.to_board() and decoded.hash == state.hash
+    assert decoded.get_current_player() == state.get_current_player()
+
+    ai = ParallelAI(workers=1, time_limit=0.2)
+    move = ai.get_best_move(state, 2, 1)
+    assert move is not None and state[move.x][move.y] == 0
+    assert not ai.last_parallel and ai.executor is None, "Single worker should search serially"
+
+    # Worker results: the deepest iteration wins, unless a win or loss is proven
+    ranked = sorted([(WIN_SCORE - 2, 2), (60, 5), (-(WIN_SCORE - 4), 6), (500, 3), (40, 5)],
+                    key=lambda r: ai._rank(*r))
+    assert ranked == [(-(WIN_SCORE - 4), 6), (500, 3), (40, 5), (60, 5), (WIN_SCORE - 2, 2)], ranked
+    assert ai._rank(0, 2) > ai._rank(-(WIN_SCORE - 3), 4), "Deeper proven loss preferred"
+    ai.close()
+    print("✅ Parallel search OK")
+except AssertionError as e:
+    print(f"❌ Parallel search FAILED: {e}")
+    sys.exit(1)
+
+# Test 10: Monte Carlo Tree Search
+print("\n[10/11] Testing MCTS...")
+try:
+    # X has a four on row 7, so random games favour X even with O to move
+    state = BoardState()
+    for x, y, player in [(7, 3, 1), (7, 4, 1), (7, 5, 1), (7, 6, 1), (0, 0, 2), (14, 14, 2), (0, 14, 2)]:
+        state.play(x, y, player)
+    results = python_playouts(state, 2, 100, random.Random(5))
+    assert sum(results) == 100 and results[1] > results[2], f"Python playouts wrong: {results}"
+    if np is not None:
+        results = batch_playouts(state.cells, 2, 1000, np.random.default_rng(5))
+        assert sum(results) == 1000 and results[1] > results[2], f"Batch playouts wrong: {results}"
+    else:
+        print("⚠️  NumPy not installed - batch playouts skipped")
+
+    ai = MCTSAI(time_limit=0.3, seed=3, use_book=False)
+    move = ai.get_best_move(state, 2, 1)
+    assert (move.x, move.y) in ((7, 2), (7, 7)), f"MCTS missed block: {move}"
+    state = BoardState()
+    for x, y, player in [(7, 7, 1), (7, 8, 2), (8, 8, 1)]:
+        state.play(x, y, player)
+    move = ai.get_best_move(state, 2, 1)
+    assert state[move.x][move.y] == 0 and state.get_move_count() == 3
+    assert ai.last_playouts > 0 and ai.last_iterations > 0
+    print(f"✅ MCTS OK - {ai.last_playouts} playouts in 0.3s")
+except AssertionError as e:
+    print(f"❌ MCTS FAILED: {e}")
+    sys.exit(1)
+
+# Test 11: Opening book
+print("\n[11/11] Testing opening book...")
+try:
+    import tempfile
+
+    def stones_of(cells):
+        bitboard = Bitboard()
+        for x, y, player in cells:
+            bitboard.place(x, y, player)
+        return bitboard
+
+    opening = [(7, 7, 1), (6, 8, 2), (8, 8, 1)]
+    key, symmetry = position_key(stones_of(opening), 2)
+    # Every rotation and reflection maps to the same key
+    for cell_map in SYMMETRIES:
+        moved = stones_of([(*divmod(cell_map[x * 16 + y], 16), p) for x, y, p in opening])
+        assert position_key(moved, 2)[0] == key, "Symmetric positions keyed differently"
+    # Colours are seen from the side to move
+    swapped = stones_of([(x, y, 3 - p) for x, y, p in opening])
+    assert position_key(swapped, 1)[0] == key
+
+    path = os.path.join(tempfile.mkdtemp(), "book.bin")
+    answer = SYMMETRIES[symmetry][9 * 16 + 9]
+    write_book(path, [(key, answer, 3), (key, SYMMETRIES[symmetry][5 * 16 + 5], 1), (key ^ 1, 0, 9)])
+    book = OpeningBook(path)
+    assert len(book) == 3
+    for cell_map in SYMMETRIES:
+        moved = stones_of([(*divmod(cell_map[x * 16 + y], 16), p) for x, y, p in opening])
+        move = book.lookup(moved, 2)
+        assert move == cell_map[9 * 16 + 9], "Book move not mapped back to the board"
+    assert book.get_move(stones_of(opening).to_board(), 2) == Point(9, 9)
+    assert book.lookup(stones_of(opening[:2]), 1) is None
+    book.close()
+
+    missing = OpeningBook(os.path.join(os.path.dirname(path), "missing.bin"))
+    assert len(missing) == 0 and missing.lookup(stones_of(opening), 2) is None
+    print("✅ Opening book OK")
+except AssertionError as e:
+    print(f"❌ Opening book FAILED: {e}")
+    sys.exit(1)
+
+print("\n" + "=" * 60)
+print("🎉 ALL TESTS PASSED!")
+print("=" * 60)
@@ -0,0 +1,889 @@
+"""
+Test script for the server core (networking, rooms, services)
+
+Runs against a temporary database and a free local port.
+"""
+
+import sys
+import os
+import socket
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import server.dao.database as database
+database._db_instance = database.Database(os.path.join(tempfile.mkdtemp(), "caro_test.db"))
+
+from shared.constants import *
+from shared.utils import create_message
+from shared.framing import LineDecoder, FrameTooLarge, encode_line
+from shared.dispatch import CommandStats
+from server.controller.server import Server
+from server.controller.server_thread import ServerThread
+from server.controller.outbound_queue import OutboundQueue
+from server.controller.room_registry import ROOM_CREATED, ROOM_FILLED, ROOM_CLOSED
+from server.controller.async_server import AsyncServer, AsyncServerThread
+from client.controller.socket_handle import SocketHandle
+from server.dao.user_dao import UserDAO
+from server.dao.stats_aggregator import StatsAggregator
+from server.dao.leaderboard import Leaderboard, ChunkedSortedList
+from server.dao.presence import PresenceService, get_presence
+from server.dao.friend_graph import FriendGraph, get_friend_graph
+
+print("=" * 60)
+print("CARO GAME PYTHON - SERVER CORE TEST")
+print("=" * 60)
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class TestClient:
+    """Minimal line-based protocol client"""
+
+    def __init__(self, port):
+        self.socket = socket.create_connection(("127.0.0.1", port), timeout=5)
+        self.buffer = b""
+
+    def send(self, *parts):
+        self.socket.sendall((create_message(*parts) + "\n").encode(ENCODING))
+
+    def receive(self):
+        while b"\n" not in self.buffer:
+            data = self.socket.recv(BUFFER_SIZE)
+            if not data:
+                raise ConnectionError("connection closed")
+            self.buffer += data
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return line.decode(ENCODING)
+
+    def expect(self, command, text=""):
+        """Skip lines until one starting with command (and containing text) arrives"""
+        while True:
+            line = self.receive()
+            if line.split(",")[0] == command and text in line:
+                return line
+
+    def close(self):
+        self.socket.close()
+
+
+def login(port, username, password="pass123"):
+    """Connect and log in a test client"""
+    client = TestClient(port)
+    client.expect(PROTOCOL_SERVER_SEND_ID)
+    client.send(PROTOCOL_CLIENT_VERIFY, username, password)
+    client.expect(PROTOCOL_LOGIN_SUCCESS)
+    return client
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+# Test 1: Asyncio server mode
+print("\n[1/15] Testing asyncio server...")
+try:
+    port = free_port()
+    server = AsyncServer("127.0.0.1", port)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert wait_until(lambda: server.running), "Server did not start"
+
+    # Many idle connections, no thread per socket
+    threads_before = threading.active_count()
+    idle = [TestClient(port) for _ in range(300)]
+    assert wait_until(lambda: server.get_active_connections() == 300)
+    assert threading.active_count() - threads_before < 20, "A thread was started per connection"
+
+    alice = TestClient(port)
+    alice.expect(PROTOCOL_SERVER_SEND_ID)
+    alice.send(PROTOCOL_CLIENT_VERIFY, "admin", "admin123")
+    assert alice.expect(PROTOCOL_LOGIN_SUCCESS).split(",")[2] == "admin"
+
+    # Chat reaches the other connections
+    alice.send(PROTOCOL_CHAT_SERVER, "xin chao")
+    assert idle[0].expect(PROTOCOL_CHAT_SERVER, "xin chao")
+
+    for client in idle:
+        client.close()
+    assert wait_until(lambda: server.get_active_connections() == 1), "Closed connections not cleaned up"
+    alice.close()
+    server.stop()
+    print("✅ Asyncio server OK")
+except (AssertionError, OSError) as e:
+    print(f"❌ Asyncio server FAILED: {e}")
+    sys.exit(1)
+
+# Test 2: Newline framing
+print("\n[2/15] Testing message framing...")
+try:
+    decoder = LineDecoder(max_frame=64)
+    assert decoder.feed(b"caro,1,2\nchat,hi\n") == ["caro,1,2", "chat,hi"], "Coalesced lines not split"
+    assert decoder.feed(b"caro,3") == [] and decoder.pending() == 6
+    assert decoder.feed(memoryview(b",4\r\n\n")) == ["caro,3,4"], "Split line not joined"
+    # A multi-byte character cut between two reads
+    data = encode_line("chat,đang online")
+    assert decoder.feed(data[:7]) == [] and decoder.feed(data[7:]) == ["chat,đang online"]
+    try:
+        decoder.feed(b"x" * 65)
+        assert False, "Oversized frame accepted"
+    except FrameTooLarge:
+        pass
+    assert decoder.pending() == 0 and decoder.feed(b"ok\n") == ["ok"]
+
+    # Threaded server: several messages in one segment, one message in pieces
+    port = free_port()
+    server = Server("127.0.0.1", port)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert wait_until(lambda: server.running), "Server did not start"
+    alice = TestClient(port)
+    bob = TestClient(port)
+    alice.expect(PROTOCOL_SERVER_SEND_ID)
+    bob.expect(PROTOCOL_SERVER_SEND_ID)
+    alice.socket.sendall(encode_line(create_message(PROTOCOL_CLIENT_VERIFY, "admin", "admin123"))
+                         + encode_line(create_message(PROTOCOL_CHAT_SERVER, "mot"))
+                         + encode_line(create_message(PROTOCOL_CHAT_SERVER, "hai")))
+    assert alice.expect(PROTOCOL_LOGIN_SUCCESS)
+    assert bob.expect(PROTOCOL_CHAT_SERVER, "mot") and bob.expect(PROTOCOL_CHAT_SERVER, "hai")
+    line = encode_line(create_message(PROTOCOL_CHAT_SERVER, "ba bon nam"))
+    alice.socket.sendall(line[:9])
+    time.sleep(0.1)
+    alice.socket.sendall(line[9:])
+    assert bob.expect(PROTOCOL_CHAT_SERVER, "ba bon nam"), "Split message lost"
+    alice.close()
+    bob.close()
+    server.stop()
+    print("✅ Message framing OK")
+except (AssertionError, OSError) as e:
+    print(f"❌ Message framing FAILED: {e}")
+    sys.exit(1)
+
+# Test 3: Command dispatch table
+print("\n[3/15] Testing command dispatch...")
+try:
+    dispatcher = ServerThread.get_dispatcher()
+    assert AsyncServerThread.get_dispatcher() is dispatcher, "Subclass did not share the dispatch table"
+    assert SocketHandle.get_dispatcher() is not dispatcher, "Client and server share a dispatch table"
+    assert SocketHandle.get_dispatcher() is SocketHandle.get_dispatcher()
+    stats = CommandStats()
+    dispatcher.add_hook(stats)
+    ServerThread.register_handler("ping", lambda connection, message, parts: connection.write("pong," + parts[1]))
+
+    port = free_port()
+    server = Server("127.0.0.1", port)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert wait_until(lambda: server.running), "Server did not start"
+    alice = TestClient(port)
+    alice.expect(PROTOCOL_SERVER_SEND_ID)
+    alice.send("unknown-command", "x")
+    alice.send("ping", "42")
+    assert alice.expect("pong") == "pong,42", "Registered handler not called"
+    alice.send(PROTOCOL_CLIENT_VERIFY, "admin", "admin123")
+    assert alice.expect(PROTOCOL_LOGIN_SUCCESS)
+
+    # Hooks run after the handler, i.e. after its reply was sent
+    assert wait_until(lambda: PROTOCOL_CLIENT_VERIFY in stats.snapshot()), "Metrics hook not called"
+    metrics = stats.snapshot()
+    assert metrics["ping"]["count"] == 1 and "unknown-command" not in metrics
+
+    dispatcher.remove_hook(stats)
+    dispatcher.unregister("ping")
+    alice.close()
+    server.stop()
+    print("✅ Command dispatch OK")
+except (AssertionError, OSError, KeyError) as e:
+    print(f"❌ Command dispatch FAILED: {e}")
+    sys.exit(1)
+
+# Test 4: Outbound queue
+print("\n[4/15] Testing outbound queue...")
+try:
+    gate = threading.Event()
+    sent = []
+    events = []
+
+    def slow_send(data):
+        gate.wait()
+        sent.append(data)
+
+    queue = OutboundQueue(slow_send, on_close=lambda: events.append("closed"),
+                          on_overflow=lambda: events.append("overflow"),
+                          name="TestWriter", limit=100, policy="drop_chat")
+    assert queue.put(b"first\n")
+    assert wait_until(lambda: queue.pending() == 0), "Writer did not take the message"
+
+    # Writer is blocked: messages pile up, chat is dropped once the limit is reached
+    for i in range(5):
+        assert queue.put(b"caro,%d\n" % i)
+    assert not queue.put(b"chat," + b"x" * 80 + b"\n", droppable=True)
+    assert queue.dropped == 1 and not events
+
+    gate.set()
+    assert wait_until(lambda: len(sent) == 2), "Queued messages not sent"
+    assert sent[1] == b"caro,0\ncaro,1\ncaro,2\ncaro,3\ncaro,4\n", "Messages not coalesced"
+    assert queue.batches == 2 and queue.messages == 6
+
+    # A message that cannot be dropped disconnects the slow client
+    gate.clear()
+    assert queue.put(b"a" * 10) and wait_until(lambda: queue.pending() == 0)
+    assert queue.put(b"b" * 90)
+    assert not queue.put(b"c" * 20)
+    assert events == ["overflow"], "Slow consumer not disconnected"
+    gate.set()
+    assert wait_until(lambda: events == ["overflow", "closed"]), "Queue not closed"
+    assert sent[-1] == b"a" * 10 and not queue.put(b"late")
+    print("✅ Outbound queue OK")
+except AssertionError as e:
+    print(f"❌ Outbound queue FAILED: {e}")
+    sys.exit(1)
+
+# Test 5: Room registry
+print("\n[5/15] Testing room registry...")
+try:
+    port = free_port()
+    server = Server("127.0.0.1", port)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert wait_until(lambda: server.running), "Server did not start"
+    registry = server.server_thread_bus.room_registry
+    server.server_thread_bus.matchmaker.base_window = MATCH_WINDOW_MAX  # quick match takes any waiting room
+    events = []
+    registry.add_listener(lambda event, room: events.append((event, room.get_id())))
+
+    p1, p2, p3 = login(port, "player1"), login(port, "player2"), login(port, "player3")
+    p1.send(PROTOCOL_CREATE_ROOM, "abc")
+    locked_id = int(p1.expect(PROTOCOL_YOUR_CREATED_ROOM).split(",")[1])
+    p2.send(PROTOCOL_QUICK_ROOM)  # the locked room is not offered
+    open_id = int(p2.expect(PROTOCOL_YOUR_CREATED_ROOM).split(",")[1])
+    assert registry.get_length() == 2 and registry.get_open_count() == 1
+
+    p3.send(PROTOCOL_VIEW_ROOM_LIST)
+    assert p3.expect(PROTOCOL_ROOM_LIST).split(",")[1:] == [str(locked_id), "abc", str(open_id), " "]
+    p3.send(PROTOCOL_GO_TO_ROOM, locked_id, "sai")
+    assert p3.expect(PROTOCOL_ROOM_WRONG_PASSWORD)
+    p3.send(PROTOCOL_GO_TO_ROOM, locked_id, "abc")
+    assert p3.expect(PROTOCOL_GO_TO_ROOM).split(",")[1] == str(locked_id)
+    p3.send(PROTOCOL_GO_TO_ROOM, 99999)
+    assert p3.expect(PROTOCOL_ROOM_NOT_FOUND)
+
+    # Leaving closes the room; quick match then fills the open one
+    p3.send(PROTOCOL_LEFT_ROOM)
+    assert p1.expect(PROTOCOL_LEFT_ROOM)
+    assert wait_until(lambda: registry.get(locked_id) is None), "Left room not closed"
+    p1.send(PROTOCOL_QUICK_ROOM)
+    assert p1.expect(PROTOCOL_GO_TO_ROOM).split(",")[1] == str(open_id)
+    assert p2.expect(PROTOCOL_GO_TO_ROOM).split(",")[1] == str(open_id)
+    assert registry.get_open_count() == 0
+
+    # Disconnect closes the room of the leaving player
+    p2.close()
+    assert p1.expect(PROTOCOL_LEFT_ROOM)
+    assert wait_until(lambda: registry.get_length() == 0), "Room of disconnected player not closed"
+    assert events == [(ROOM_CREATED, locked_id), (ROOM_CREATED, open_id), (ROOM_FILLED, locked_id),
+                      (ROOM_CLOSED, locked_id), (ROOM_FILLED, open_id), (ROOM_CLOSED, open_id)], events
+
+    p1.close()
+    p3.close()
+    server.stop()
+    print("✅ Room registry OK")
+except (AssertionError, OSError) as e:
+    print(f"❌ Room registry FAILED: {e}")
+    sys.exit(1)
+
+# Test 6: User index of the thread bus
+print("\n[6/15] Testing user index...")
+try:
+    port = free_port()
+    server = Server("127.0.0.1", port)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert wait_until(lambda: server.running), "Server did not start"
+    bus = server.server_thread_bus
+
+    p1, p2 = login(port, "player1"), login(port, "player2")
+    id1 = bus.get_list_server_threads()[0].get_user().get_id()
+    id2 = bus.get_list_server_threads()[1].get_user().get_id()
+    assert bus.get_server_thread_by_user_id(id1).get_user().get_nickname() == "Player One"
+
+    # Targeted messages go through the index
+    p1.send(PROTOCOL_DUEL_REQUEST, id2)
+    assert p2.expect(PROTOCOL_DUEL_NOTICE).split(",")[1] == str(id1)
+
+    # A second login of player2 replaces the old connection in the index
+    old_thread = bus.get_server_thread_by_user_id(id2)
+    p2_again = login(port, "player2")
+    assert wait_until(lambda: bus.get_server_thread_by_user_id(id2) not in (None, old_thread))
+    assert bus.get_server_thread(old_thread.get_client_number()) is None, "Old connection still on the bus"
+
+    # Logout and disconnect drop the entries
+    p1.send(PROTOCOL_OFFLINE, id1)
+    assert wait_until(lambda: bus.get_server_thread_by_user_id(id1) is None), "Logout not indexed"
+    p2_again.close()
+    assert wait_until(lambda: bus.get_server_thread_by_user_id(id2) is None), "Disconnect not indexed"
+    assert not bus.send_message_to_user_id(id2, create_message(PROTOCOL_CHAT_SERVER, "x"))
+
+    p1.close()
+    p2.close()
+    server.stop()
+    print("✅ User index OK")
+except (AssertionError, OSError) as e:
+    print(f"❌ User index FAILED: {e}")
+    sys.exit(1)
+
+# Test 7: Broadcast fan-out
+print("\n[7/15] Testing broadcast fan-out...")
+try:
+    port = free_port()
+    server = Server("127.0.0.1", port)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert wait_until(lambda: server.running), "Server did not start"
+    bus = server.server_thread_bus
+
+    listeners = [TestClient(port) for _ in range(50)]
+    assert wait_until(lambda: bus.get_length() == 50)
+    sender = login(port, "player3")
+    sender.send(PROTOCOL_CHAT_SERVER, "chao ca nha")
+    for client in listeners:
+        assert client.expect(PROTOCOL_CHAT_SERVER, "chao ca nha")
+
+    # The sender is excluded; server-side broadcasts (None) reach everyone
+    assert bus.broadcast(None, create_message(PROTOCOL_ADMIN_BROADCAST, "bao tri")) == 51
+    assert sender.expect(PROTOCOL_ADMIN_BROADCAST) == create_message(PROTOCOL_ADMIN_BROADCAST, "bao tri")
+
+    stats = bus.broadcast_stats.snapshot()
+    assert stats[PROTOCOL_CHAT_SERVER]["count"] >= 1 and stats[PROTOCOL_ADMIN_BROADCAST]["count"] == 1
+    assert stats[PROTOCOL_CHAT_SERVER]["max"] < 0.5, "Fan-out too slow"
+
+    for client in listeners:
+        client.close()
+    sender.close()
+    server.stop()
+    print("✅ Broadcast fan-out OK")
+except (AssertionError, OSError, KeyError) as e:
+    print(f"❌ Broadcast fan-out FAILED: {e}")
+    sys.exit(1)
+
+# Test 8: Matchmaking
+print("\n[8/15] Testing matchmaking...")
+try:
+    port = free_port()
+    server = Server("127.0.0.1", port)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert wait_until(lambda: server.running), "Server did not start"
+    matchmaker = server.server_thread_bus.matchmaker
+    matchmaker.base_window = 30
+    matchmaker.growth = 100
+
+    # Ratings (calculate_mark): player1 80, player2 105, player3 140, admin 0
+    p1, p2, p3, admin = login(port, "player1"), login(port, "player2"), login(port, "player3"), login(port, "admin", "admin123")
+    p1.send(PROTOCOL_QUICK_ROOM)
+    room_a = p1.expect(PROTOCOL_YOUR_CREATED_ROOM).split(",")[1]
+    p2.send(PROTOCOL_QUICK_ROOM)  # within the base window: matched at once
+    assert p2.expect(PROTOCOL_GO_TO_ROOM).split(",")[1] == room_a
+    assert p1.expect(PROTOCOL_GO_TO_ROOM).split(",")[1] == room_a
+
+    p3.send(PROTOCOL_QUICK_ROOM)
+    room_b = p3.expect(PROTOCOL_YOUR_CREATED_ROOM).split(",")[1]
+    admin.send(PROTOCOL_QUICK_ROOM)  # 140 apart: both wait until the windows widen
+    room_c = admin.expect(PROTOCOL_YOUR_CREATED_ROOM).split(",")[1]
+    assert matchmaker.get_stats()["queued"] == 2
+
+    # The pairing pass moves the newer player into the room of the older one
+    assert admin.expect(PROTOCOL_GO_TO_ROOM).split(",")[1] == room_b
+    assert p3.expect(PROTOCOL_GO_TO_ROOM).split(",")[1] == room_b
+    assert server.server_thread_bus.room_registry.get(int(room_c)) is None, "Room left by matched player not closed"
+
+    stats = matchmaker.get_stats()
+    assert stats["queued"] == 0 and stats["matches"] == 2, stats
+    assert 1.0 <= stats["max_wait"] < 3, stats
+
+    # Rooms made with create-room are not queued, so never merged
+    registry = server.server_thread_bus.room_registry
+    p1.send(PROTOCOL_CREATE_ROOM)
+    room_d = p1.expect(PROTOCOL_YOUR_CREATED_ROOM).split(",")[1]
+    p2.send(PROTOCOL_CREATE_ROOM)
+    room_e = p2.expect(PROTOCOL_YOUR_CREATED_ROOM).split(",")[1]
+    time.sleep(4 * matchmaker.interval)
+    assert matchmaker.get_stats()["queued"] == 0
+    assert registry.get(int(room_d)).get_number_of_user() == 1, "Created room matched"
+    assert registry.get(int(room_e)).get_number_of_user() == 1, "Created room matched"
+
+    # A partner disconnecting between pairing and seating: the owner waits on
+    def disconnecting_on_match(ticket, partner):
+        p3.close()
+        assert wait_until(lambda: partner.server_thread.is_closed)
+        on_match(ticket, partner)
+        seated.append(ticket)
+
+    on_match, seated = matchmaker.on_match, []
+    matchmaker.on_match = disconnecting_on_match
+    p1.send(PROTOCOL_QUICK_ROOM)
+    room_f = p1.expect(PROTOCOL_YOUR_CREATED_ROOM).split(",")[1]
+    p3.send(PROTOCOL_QUICK_ROOM)
+    p3.expect(PROTOCOL_YOUR_CREATED_ROOM)
+    assert wait_until(lambda: seated), "Pair not made"
+    matchmaker.on_match = on_match
+    assert registry.is_waiting(registry.get(int(room_f))), "Room of the owner not left open"
+    assert matchmaker.get_stats()["queued"] == 1, "Owner not queued again"
+    p2.send(PROTOCOL_QUICK_ROOM)
+    assert p2.expect(PROTOCOL_GO_TO_ROOM).split(",")[1] == room_f
+    assert p1.expect(PROTOCOL_GO_TO_ROOM).split(",")[1] == room_f
+
+    for client in (p1, p2, p3, admin):
+        client.close()
+    server.stop()
+    print("✅ Matchmaking OK")
+except (AssertionError, OSError) as e:
+    print(f"❌ Matchmaking FAILED: {e}")
+    sys.exit(1)
+
+# Test 9: Server-side game state
+print("\n[9/15] Testing move validation...")
+try:
+    port = free_port()
+    server = Server("127.0.0.1", port)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert wait_until(lambda: server.running), "Server did not start"
+    server.server_thread_bus.matchmaker.base_window = MATCH_WINDOW_MAX
+    user_dao = UserDAO()
+    wins1 = user_dao.verify_user("player1", "pass123").get_number_of_win()
+    wins2 = user_dao.verify_user("player2", "pass123").get_number_of_win()
+
+    p1, p2 = login(port, "player1"), login(port, "player2")
+    p1.send(PROTOCOL_QUICK_ROOM)
+    p1.expect(PROTOCOL_YOUR_CREATED_ROOM)
+    p2.send(PROTOCOL_QUICK_ROOM)  # the joining player moves first
+    assert p2.expect(PROTOCOL_GO_TO_ROOM).split(",")[3] == "0"
+    p1.expect(PROTOCOL_GO_TO_ROOM)
+
+    p1.send(PROTOCOL_CARO, 9, 9)  # out of turn
+    p1.send(PROTOCOL_WIN)  # nothing won yet
+    p2.send(PROTOCOL_CARO, 5, 5)
+    assert p1.expect(PROTOCOL_CARO) == "caro,5,5"
+    p1.send(PROTOCOL_CARO, 5, 5)  # taken
+    p1.send(PROTOCOL_CARO, 0, 0)
+    assert p2.expect(PROTOCOL_CARO) == "caro,0,0", "Invalid move forwarded"
+
+    # Five in a row for player2, then the win is credited once
+    for i in range(1, 5):
+        p2.send(PROTOCOL_CARO, 5, 5 + i)
+        assert p1.expect(PROTOCOL_CARO) == f"caro,5,{5 + i}"
+        if i < 4:
+            p1.send(PROTOCOL_CARO, 0, i)
+            assert p2.expect(PROTOCOL_CARO) == f"caro,0,{i}"
+    # The winning move ends the game; win claims change nothing
+    assert p1.expect(PROTOCOL_NEW_GAME) and p2.expect(PROTOCOL_NEW_GAME)
+    p1.send(PROTOCOL_WIN)
+    p2.send(PROTOCOL_WIN, 5, 9)
+
+    # The other player moves first in the next game, right after NEW_GAME
+    p2.send(PROTOCOL_CARO, 7, 7)
+    p1.send(PROTOCOL_CARO, 8, 8)
+    assert p2.expect(PROTOCOL_CARO) == "caro,8,8", "First move did not alternate"
+    assert user_dao.verify_user("player1", "pass123").get_number_of_win() == wins1
+    assert user_dao.verify_user("player2", "pass123").get_number_of_win() == wins2 + 1
+
+    # A move sent as soon as DRAW_GAME arrives is accepted too
+    first, other = p1, p2
+    for i in range(10):
+        other.send(PROTOCOL_DRAW_REQUEST)
+        first.expect(PROTOCOL_DRAW_REQUEST)
+        first.send(PROTOCOL_DRAW_CONFIRM)
+        other.expect(PROTOCOL_DRAW_GAME)
+        other.send(PROTOCOL_CARO, 3, i)
+        first.expect(PROTOCOL_DRAW_GAME)
+        assert first.expect(PROTOCOL_CARO) == f"caro,3,{i}", "Move after DRAW_GAME rejected"
+        first, other = other, first
+
+    p1.close()
+    p2.close()
+    server.stop()
+    print("✅ Move validation OK")
+except (AssertionError, OSError) as e:
+    print(f"❌ Move validation FAILED: {e}")
+    sys.exit(1)
+
+# Test 10: Write-behind stat counters
+print("\n[10/15] Testing stats write-behind...")
+try:
+    db = database._db_instance
+    user_id = UserDAO().verify_user("player3", "pass123").get_id()
+
+    def stored():
+        row = db.fetch_one("SELECT NumberOfGame, NumberOfWin, NumberOfDraw FROM user WHERE ID = ?", (user_id,))
+        return tuple(row)
+
+    before = stored()
+    stats = StatsAggregator(db, interval=60, max_events=4)
+    stats.add(user_id, games=1)
+    stats.add(user_id, wins=1)
+    stats.add(user_id, games=1, draws=1)
+    assert stored() == before, "Written before the batch was due"
+    assert stats.get_pending(user_id) == (2, 1, 1)
+
+    # The event threshold writes all deltas in one transaction
+    stats.add(user_id, games=-1)
+    assert wait_until(lambda: stored() == (before[0] + 1, before[1] + 1, before[2] + 1))
+    assert stats.get_pending(user_id) == (0, 0, 0)
+    assert stats.get_stats()["flushes"] == 1
+
+    # The interval writes a lone update; the game count stays non-negative
+    stats = StatsAggregator(db, interval=0.1)
+    stats.add(user_id, games=-(before[0] + 5))
+    assert wait_until(lambda: stored()[0] == 0)
+
+    # Immediate durability writes each update before returning
+    stats = StatsAggregator(db, durability="immediate")
+    stats.add(user_id, wins=1)
+    assert stored()[1] == before[1] + 2
+    assert stats.get_stats() == {"updates": 1, "flushes": 1, "pending": 0}
+
+    # A read during flushes counts every delta exactly once
+    stats = StatsAggregator(db, interval=60)
+    flushing = threading.Event()
+    flushing.set()
+
+    def flush_loop():
+        while flushing.is_set():
+            stats.flush()
+
+    flusher = threading.Thread(target=flush_loop, daemon=True)
+    flusher.start()
+    base = stored()[1]
+    try:
+        for i in range(1, 201):
+            stats.add(user_id, wins=1)
+            row, pending = stats.read(lambda: db.fetch_one("SELECT NumberOfWin FROM user WHERE ID = ?", (user_id,)))
+            wins = row[0] + pending.get(user_id, (0, 0, 0))[1]
+            assert wins == base + i, f"Read {wins} wins, expected {base + i}"
+    finally:
+        flushing.clear()
+        flusher.join()
+    stats.add(user_id, wins=-200)
+    stats.flush()
+    print("✅ Stats write-behind OK")
+except (AssertionError, OSError) as e:
+    print(f"❌ Stats write-behind FAILED: {e}")
+    sys.exit(1)
+
+# Test 11: Database connection pool
+print("\n[11/15] Testing database connection pool...")
+try:
+    db = database.Database(os.path.join(tempfile.mkdtemp(), "pool_test.db"), pool_size=2)
+    assert db.init_database()
+    assert db.fetch_one("PRAGMA journal_mode")[0] == "wal"
+    query = "SELECT NumberOfWin FROM user WHERE Username = 'player1'"
+    wins = db.fetch_one(query)[0]
+
+    # Readers see the last commit while a write transaction is open
+    with db.write_lock:
+        db.connection.execute("UPDATE user SET NumberOfWin = NumberOfWin + 1 WHERE Username = 'player1'")
+        started = time.time()
+        assert db.fetch_one(query)[0] == wins
+        assert time.time() - started < 1, "Reader waited for the writer"
+        db.connection.commit()
+    assert db.fetch_one(query)[0] == wins + 1
+
+    # Reader connections are read-only and bounded
+    with db.reader() as conn:
+        try:
+            conn.execute("DELETE FROM user")
+            assert False, "Reader connection accepted a write"
+        except sqlite3.OperationalError:
+            pass
+
+    results = []
+    with db.reader(), db.reader():
+        waiting = threading.Thread(target=lambda: results.append(db.fetch_one(query)[0]))
+        waiting.start()
+        time.sleep(0.2)
+        assert not results, "Pool opened more than pool_size readers"
+    waiting.join(5)
+    assert results == [wins + 1] and db.reader_count == 2
+
+    # Concurrent readers and writers from many threads
+    errors = []
+    def worker(index):
+        try:
+            for i in range(20):
+                assert db.execute_query("UPDATE user SET NumberOfDraw = NumberOfDraw + 1 WHERE Username = 'player2'")
+                assert db.fetch_one("SELECT COUNT(*) FROM user")[0] > 0
+                # Each thread gets the ID of its own insert
+                name = f"pool_{index}_{i}"
+                user_id = db.execute_insert("INSERT INTO user (Username, Password, Nickname) VALUES (?, '', '')", (name,))
+                assert db.fetch_one("SELECT Username FROM user WHERE ID = ?", (user_id,))[0] == name
+                assert db.get_last_insert_id() == user_id
+        except Exception as e:
+            errors.append(e)
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(10)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    assert not errors, errors
+    assert db.fetch_one("SELECT NumberOfDraw FROM user WHERE Username = 'player2'")[0] >= 200
+    db.disconnect()
+    print("✅ Database connection pool OK")
+except (AssertionError, OSError, sqlite3.Error) as e:
+    print(f"❌ Database connection pool FAILED: {e}")
+    sys.exit(1)
+
+# Test 12: Leaderboard
+print("\n[12/15] Testing leaderboard...")
+try:
+    board = Leaderboard([(1, 5, 10), (2, 9, 12), (3, 5, 6), (4, 0, 0)])
+    assert [board.get_rank(user_id) for user_id in (1, 2, 3, 4)] == [2, 1, 2, 4]
+    assert board.top(3) == [(2, 1), (3, 2), (1, 2)]
+    board.update(4, games=1, wins=200)  # beyond the initial tree size
+    assert board.top(1) == [(4, 1)] and board.get_rank(2) == 2
+    assert board.get_rank(99) == 0
+
+    # The chunked chart order matches a plain sorted list
+    rng = random.Random(7)
+    order, expected = ChunkedSortedList(load=4), []
+    for _ in range(3000):
+        if expected and rng.random() < 0.45:
+            item = expected.pop(rng.randrange(len(expected)))
+            order.remove(item)
+        else:
+            item = (rng.randrange(-20, 0), rng.randrange(30), rng.randrange(10 ** 6))
+            order.add(item)
+            expected.append(item)
+            expected.sort()
+        assert len(order) == len(expected)
+    assert order.head(len(expected) + 5) == expected and order.head(7) == expected[:7]
+    assert all(len(chunk) <= 8 for chunk in order.chunks)
+
+    # Random updates agree with counting players with more wins
+    board = Leaderboard([(user_id, 0, 0) for user_id in range(50)])
+    wins = dict.fromkeys(range(50), 0)
+    for _ in range(2000):
+        user_id = rng.randrange(50)
+        if rng.random() < 0.6:
+            board.update(user_id, games=1, wins=1)
+            wins[user_id] += 1
+        else:
+            board.update(user_id, games=1)
+    for user_id in wins:
+        assert board.get_rank(user_id) == 1 + sum(1 for other in wins.values() if other > wins[user_id])
+    ranked = [user_id for user_id, _ in board.top(50)]
+    assert [wins[user_id] for user_id in ranked] == sorted(wins.values(), reverse=True)
+
+    # Game counts are clamped like the database: per flush, not per update
+    db = database._db_instance
+    stats = StatsAggregator(db, interval=60)
+    board = Leaderboard.from_database(db, stats)
+    user_id = UserDAO().verify_user("player3", "pass123").get_id()
+
+    def shown():
+        row, pending = stats.read(lambda: db.fetch_one("SELECT NumberOfGame FROM user WHERE ID = ?", (user_id,)))
+        return max(row[0] + pending.get(user_id, (0, 0, 0))[0], 0)
+
+    games = board.users[user_id][1]
+    for delta, flush in ((-(games + 3), False), (2, False), (0, True), (1, False), (games - 1, True)):
+        if delta:
+            stats.add(user_id, games=delta)
+            board.update(user_id, games=delta)
+        if flush:
+            stats.flush()
+        assert board.users[user_id][1] == shown(), (delta, board.users[user_id], shown())
+    assert shown() == games
+
+    # The chart agrees with the rank and counters returned at login
+    user_dao = UserDAO()
+    chart = user_dao.get_user_static_rank()
+    assert chart and [user.get_rank() for user in chart] == sorted(user.get_rank() for user in chart)
+    for user in chart:
+        logged_in = user_dao.verify_user(user.get_username(), user.get_password())
+        assert logged_in.get_rank() == user.get_rank(), user.get_username()
+        assert logged_in.get_number_of_win() == user.get_number_of_win()
+    winner = chart[-1]
+    user_dao.add_win_game(winner.get_id())
+    assert user_dao.verify_user(winner.get_username(), winner.get_password()).get_rank() == \
+        1 + sum(1 for user in chart if user.get_number_of_win() > winner.get_number_of_win() + 1)
+    print("✅ Leaderboard OK")
+except (AssertionError, OSError) as e:
+    print(f"❌ Leaderboard FAILED: {e}")
+    sys.exit(1)
+
+# Test 13: Cached rank chart
+print("\n[13/15] Testing rank chart cache...")
+try:
+    port = free_port()
+    server = Server("127.0.0.1", port)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert wait_until(lambda: server.running), "Server did not start"
+    cache = server.server_thread_bus.rank_chart
+
+    p1 = login(port, "player1")
+    p1.send(PROTOCOL_GET_RANK_CHARTS)
+    chart = p1.expect(PROTOCOL_RETURN_GET_RANK_CHARTS).split(",")
+    version = chart[1]
+    users = [chart[i:i + 9] for i in range(2, len(chart), 9)]
+    assert users and all(len(user) == 9 and user[2] == "" for user in users), "Passwords sent"
+    assert [int(user[8]) for user in users] == sorted(int(user[8]) for user in users)
+
+    # The cached version is answered with not-modified, without a rebuild
+    p1.send(PROTOCOL_GET_RANK_CHARTS, version)
+    assert p1.expect(PROTOCOL_RANK_CHARTS_NOT_MODIFIED) == f"{PROTOCOL_RANK_CHARTS_NOT_MODIFIED},{version}"
+    p1.send(PROTOCOL_GET_RANK_CHARTS)
+    assert p1.expect(PROTOCOL_RETURN_GET_RANK_CHARTS).split(",") == chart
+    assert cache.get_stats() == {"builds": 1, "not_modified": 1}
+
+    # A stat change invalidates it
+    UserDAO().add_draw_game(int(users[0][0]))
+    p1.send(PROTOCOL_GET_RANK_CHARTS, version)
+    new_chart = p1.expect(PROTOCOL_RETURN_GET_RANK_CHARTS).split(",")
+    assert new_chart[1] != version and int(new_chart[9]) == int(users[0][7]) + 1
+    assert cache.get_stats()["builds"] == 2
+
+    # The client keeps the chart and shows it again on not-modified
+    shown = []
+    class RankClient:
+        on_rank_list = staticmethod(shown.append)
+    handle = SocketHandle(RankClient())
+    handle.dispatcher.dispatch(handle, ",".join(new_chart))
+    handle.dispatcher.dispatch(handle, create_message(PROTOCOL_RANK_CHARTS_NOT_MODIFIED, new_chart[1]))
+    assert handle.rank_chart_version == new_chart[1]
+    assert len(shown) == 2 and shown[0] is shown[1] and len(shown[0]) == len(users)
+    assert shown[0][0].get_id() == int(users[0][0]) and shown[0][0].get_password() == ""
+
+    p1.close()
+    server.stop()
+    print("✅ Rank chart cache OK")
+except (AssertionError, OSError) as e:
+    print(f"❌ Rank chart cache FAILED: {e}")
+    sys.exit(1)
+
+# Test 14: Presence
+print("\n[14/15] Testing presence...")
+try:
+    port = free_port()
+    server = Server("127.0.0.1", port)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert wait_until(lambda: server.running), "Server did not start"
+    server.server_thread_bus.matchmaker.base_window = MATCH_WINDOW_MAX
+    user_dao = UserDAO()
+    db = database._db_instance
+    id1 = user_dao.verify_user("player1", "pass123").get_id()
+    id2 = user_dao.verify_user("player2", "pass123").get_id()
+    user_dao.make_friend(id1, id2)
+
+    def friend_status(client):
+        client.send(PROTOCOL_VIEW_FRIEND_LIST)
+        parts = client.expect(PROTOCOL_RETURN_FRIEND_LIST).split(",")
+        return parts[1:][parts[1:].index(str(id2)) + 2:][:2]
+
+    p1, p2 = login(port, "player1"), login(port, "player2")
+    assert get_presence().is_online(id2) and friend_status(p1) == ["1", "0"]
+    p1.send(PROTOCOL_QUICK_ROOM)
+    p1.expect(PROTOCOL_YOUR_CREATED_ROOM)
+    p2.send(PROTOCOL_QUICK_ROOM)
+    p2.expect(PROTOCOL_GO_TO_ROOM)
+    assert wait_until(lambda: get_presence().is_playing(id2))
+    assert friend_status(p1) == ["1", "1"]
+    assert user_dao.get_user_by_id(id2).get_is_playing()
+
+    # Nothing was written to the database
+    row = db.fetch_one("SELECT IsOnline, IsPlaying FROM user WHERE ID = ?", (id2,))
+    assert tuple(row) == (0, 0), tuple(row)
+
+    p2.close()
+    assert wait_until(lambda: not get_presence().is_online(id2)), "Disconnect not seen"
+    assert friend_status(p1) == ["0", "0"]
+    p1.close()
+    server.stop()
+
+    # Optional snapshots copy the changed users in one batch
+    presence = PresenceService(db, snapshot_interval=0.1)
+    presence.set_online(id1)
+    presence.set_playing(id1)
+    assert wait_until(lambda: tuple(db.fetch_one("SELECT IsOnline, IsPlaying FROM user WHERE ID = ?", (id1,))) == (1, 1))
+    presence.reset()
+    assert presence.snapshot() == 1 and presence.get_online_ids() == set()
+    assert tuple(db.fetch_one("SELECT IsOnline, IsPlaying FROM user WHERE ID = ?", (id1,))) == (0, 0)
+    print("✅ Presence OK")
+except (AssertionError, OSError) as e:
+    print(f"❌ Presence FAILED: {e}")
+    sys.exit(1)
+
+# Test 15: Friend graph cache
+print("\n[15/15] Testing friend graph...")
+try:
+    user_dao = UserDAO()
+    db = database._db_instance
+    id1, id2, id3 = (user_dao.verify_user(name, "pass123").get_id() for name in ("player1", "player2", "player3"))
+
+    # Loaded once per user, from both directions of the friend table
+    graph = FriendGraph(db)
+    assert id2 in graph.get_friends(id1) and graph.is_friend(id2, id1)
+    assert not graph.is_friend(id1, id3)
+    assert graph.get_stats() == {"cached": 2, "loads": 2}
+    assert graph.get_nickname(id2) == user_dao.get_nickname_by_id(id2)
+
+    # A friendship added while a load runs is not lost
+    fetch_all = db.fetch_all
+    def racing_fetch_all(query, params=None):
+        rows = fetch_all(query, params)
+        if not racing:
+            racing.append(True)
+            db.execute_query("INSERT OR IGNORE INTO friend (ID_User1, ID_User2) VALUES (?, ?)", (id3, id2))
+            graph.add_friendship(id3, id2)
+        return rows
+    racing = []
+    db.fetch_all = racing_fetch_all
+    try:
+        assert id2 in graph.get_friends(id3)
+    finally:
+        del db.fetch_all
+    assert graph.get_stats()["loads"] == 3
+
+    # Caches keep only the most recently used entries
+    small = FriendGraph(db, capacity=1, nickname_capacity=1)
+    small.get_friends(id1)
+    small.get_friends(id2)
+    small.get_friends(id1)
+    assert small.get_stats() == {"cached": 1, "loads": 3}
+    assert len(small.nicknames) == 1
+
+    # make_friend updates cached lists, joined with live presence
+    port = free_port()
+    server = Server("127.0.0.1", port)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert wait_until(lambda: server.running), "Server did not start"
+    shared_graph = get_friend_graph()
+    p1, p3 = login(port, "player1"), login(port, "player3")
+    p1.send(PROTOCOL_VIEW_FRIEND_LIST)
+    assert p1.expect(PROTOCOL_RETURN_FRIEND_LIST).split(",")[1::4] == [str(id2)]
+    loads = shared_graph.get_stats()["loads"]
+    user_dao.make_friend(id1, id3)
+    p1.send(PROTOCOL_VIEW_FRIEND_LIST)
+    friends = p1.expect(PROTOCOL_RETURN_FRIEND_LIST).split(",")[1:]
+    assert friends[:4] == [str(id3), user_dao.get_nickname_by_id(id3), "1", "0"], friends
+    assert friends[4] == str(id2) and friends[6] == "0"
+    assert user_dao.check_is_friend(id3, id1)
+    assert shared_graph.get_stats()["loads"] == loads + 1  # only player3's set was read
+    p1.close()
+    assert wait_until(lambda: id1 not in shared_graph.adjacency), "Set of an offline user kept"
+    p3.close()
+    server.stop()
+    print("✅ Friend graph OK")
+except (AssertionError, OSError) as e:
+    print(f"❌ Friend graph FAILED: {e}")
+    sys.exit(1)
+
+print("\n" + "=" * 60)
+print("🎉 ALL TESTS PASSED!")
+print("=" * 60)
@@ -56,6 +56,7 @@ except Exception as e:
 print("\n[4/8] Testing server controller...")
 try:
     from server.controller.server import Server
+    from server.controller.async_server import AsyncServer
     from server.controller.room import Room
     from server.controller.server_thread_bus import ServerThreadBus
     print("✅ Server controller OK")